@@ -19,6 +19,7 @@ import importlib
 from datetime import datetime, timedelta
 from typing import Dict, Any
 from pathlib import Path
+from types import SimpleNamespace
 
 from vnpy.trader.engine import MainEngine
 from vnpy.event import EventEngine, Event
@@ -112,6 +113,154 @@ def patched_load_strategy_class_from_module(self, module_name: str) -> None:
         self.write_log(_(msg))
 
 
+# DailyResult keeps only aggregated trade stats when enabled, see set_memory_optimize_stats
+MEMORY_OPTIMIZE_STATS = False
+
+# read streaming chunks from the memory-mapped bar cache (vnpy_grid.data.bar_cache), see set_bar_cache
+USE_BAR_CACHE = False
+
+# how streaming backtests treat spans flagged by `--validate` at import: ignore / warn / skip / ffill
+BAD_SPAN_POLICY = "warn"
+
+# chunks loaded ahead on a worker thread while the current one is replayed (0: no prefetch), see set_prefetch_depth
+PREFETCH_DEPTH = 2
+
+# rows per chunk / peak RSS in MB replacing the fixed 15-day chunks (None: fixed), see set_chunk_budget
+CHUNK_ROW_BUDGET = None
+CHUNK_MEMORY_MB = None
+
+# match limit orders through price-sorted books instead of scanning them all (vnpy_grid.backtest.matching), see set_indexed_matching
+INDEXED_MATCHING = True
+
+# finalize DailyResults as days close and release their trades (vnpy_grid.backtest.daily), see set_streaming_results
+STREAMING_RESULTS = False
+
+# fast-forward bars that cannot touch a resting order (vnpy_grid.backtest.skipping), see set_skip_quiet_bars
+SKIP_QUIET_BARS = False
+
+
+def load_quality_index(symbol: str, exchange: Exchange, interval: Interval):
+    """Quality index of the series written at import time, or None."""
+    try:
+        from vnpy_grid.data.quality import QualityIndex
+    except ImportError:
+        return None
+    index = QualityIndex.for_series(symbol, exchange, interval)
+    return index if index.exists else None
+
+
+def apply_bad_span_policy(bars, index, policy: str, log=print):
+    from vnpy_grid.data.quality import apply_policy
+
+    return apply_policy(bars, index, policy, log=log)
+
+
+def attach_streaming_results(engine: BacktestingEngine, log=print) -> None:
+    """Attach or detach the streaming daily aggregator; without vnpy_grid the stock DailyResults stay."""
+    try:
+        from vnpy_grid.backtest.daily import StreamingDailyResults
+    except ImportError:
+        if STREAMING_RESULTS:
+            log("vnpy_grid.backtest.daily unavailable, streaming daily results off")
+        return
+    if STREAMING_RESULTS:
+        StreamingDailyResults.attach(engine)
+    else:
+        StreamingDailyResults.detach(engine)
+
+
+def open_bar_cache(symbol: str, exchange: Exchange, interval: Interval, log=print):
+    """Memory-mapped bar cache of the series, or None (the database is read instead)."""
+    try:
+        from vnpy_grid.data.bar_cache import open_bar_cache as open_cache
+    except ImportError:
+        log("vnpy_grid.data.bar_cache unavailable, reading the database")
+        return None
+    return open_cache(symbol, exchange, interval)
+
+
+def quiet_bar_skipper(engine: BacktestingEngine, log=print):
+    """QuietBarSkipper for the engine, or None (every bar is fed)."""
+    try:
+        from vnpy_grid.backtest.skipping import QuietBarSkipper
+    except ImportError:
+        log("vnpy_grid.backtest.skipping unavailable, feeding every bar")
+        return None
+    return QuietBarSkipper(engine)
+
+
+def install_indexed_matching(enabled: bool, log=print) -> bool:
+    """Apply or remove the price-indexed matching patch; False (stock cross_limit_order kept) without vnpy_grid."""
+    try:
+        from vnpy_grid.backtest.matching import apply_matching_patch, remove_matching_patch
+    except ImportError:
+        if enabled:
+            log("vnpy_grid.backtest.matching unavailable, keeping the stock limit order matching")
+        return False
+    if enabled:
+        apply_matching_patch()
+    else:
+        remove_matching_patch()
+    return True
+
+
+class FixedWindowLoader:
+    """Consecutive `span` windows loaded in turn, as before vnpy_grid's chunking and prefetch."""
+
+    def __init__(self, start: datetime, end: datetime, span: timedelta, load) -> None:
+        self.start = start
+        self.end = end
+        self.span = span
+        self.load = load
+
+    def __iter__(self):
+        cur_start = self.start
+        while cur_start <= self.end:
+            cur_end = min(self.end, cur_start + self.span)
+            # load ranges are inclusive at both ends
+            yield SimpleNamespace(start=cur_start, end=cur_end, bars=self.load(cur_start, cur_end))
+            cur_start = cur_end + timedelta(microseconds=1)
+
+
+def open_chunk_loader(
+    start: datetime,
+    end: datetime,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    chunk_days: int,
+    load,
+    is_tick: bool,
+    log=print,
+):
+    """
+    (windows, loader, meter) of the replay: budgeted windows loaded ahead by
+    vnpy_grid, or fixed windows loaded in turn when it cannot be imported.
+    `meter` reports the tick rate and is None for bars or without vnpy_grid.
+    """
+    try:
+        from vnpy_grid.data.chunking import ChunkBudget, stream_windows
+        from vnpy_grid.data.prefetch import PrefetchLoader
+        from vnpy_grid.data.tick_stream import ReplayMeter, tick_windows
+    except ImportError:
+        log("vnpy_grid chunking unavailable, loading fixed windows without prefetch")
+        span = timedelta(hours=1) if is_tick else timedelta(days=chunk_days)
+        windows = FixedWindowLoader(start, end, span, load)
+        return windows, windows, None
+
+    budget = ChunkBudget(rows=CHUNK_ROW_BUDGET, memory_mb=CHUNK_MEMORY_MB)
+    meter = None
+    if is_tick:
+        # ticks are paged an hour at a time and reported as a rate rather than per window
+        windows = tick_windows(start, end, symbol, exchange, budget, depth=PREFETCH_DEPTH)
+        meter = ReplayMeter("ticks")
+    else:
+        windows = stream_windows(
+            start, end, [(symbol, exchange, interval)], chunk_days, budget, depth=PREFETCH_DEPTH
+        )
+    return windows, PrefetchLoader(windows, load, depth=PREFETCH_DEPTH), meter
+
+
 def patched_run_backtesting(
     self,
     class_name: str,
@@ -161,6 +310,7 @@ def patched_run_backtesting(
     # 娴佸紡鍥炴祴锛氬垎鍧楀姞杞芥暟鎹?
     try:
         # 鍚姩绛栫暐
+        attach_streaming_results(engine, log=self.write_log)
         engine.strategy.on_start()
         engine.strategy.trading = True
 
@@ -171,28 +321,64 @@ def patched_run_backtesting(
         # 鍒嗗潡鎷夊彇涓庡洖鏀?
         chunk_days = 15
         db: BaseDatabase = self.database
-        cur_start = start
+        quality = load_quality_index(symbol, exchange, Interval(interval))
+        cache = None
+        is_tick = mode == BacktestingMode.TICK
+        if USE_BAR_CACHE and not is_tick:
+            cache = open_bar_cache(symbol, exchange, Interval(interval), log=self.write_log)
         total_bars = 0
-        
-        while cur_start <= end:
-            cur_end = min(end, cur_start + timedelta(days=chunk_days))
-            bars = db.load_bar_data(symbol, exchange, Interval(interval), cur_start, cur_end)
-            
-            for bar in bars:
-                engine.new_bar(bar)
-                total_bars += 1
+
+        def load(cur_start: datetime, cur_end: datetime) -> list:
+            if is_tick:
+                return db.load_tick_data(symbol, exchange, cur_start, cur_end)
+            if cache is not None:
+                bars = cache.load_bars(cur_start, cur_end)
+            else:
+                bars = db.load_bar_data(symbol, exchange, Interval(interval), cur_start, cur_end)
+            if quality is not None:
+                bars = apply_bad_span_policy(bars, quality, BAD_SPAN_POLICY, log=self.write_log)
+            return bars
+
+        windows, loader, meter = open_chunk_loader(
+            start, end, symbol, exchange, Interval(interval), chunk_days, load, is_tick, log=self.write_log
+        )
+        feed = engine.new_tick if is_tick else engine.new_bar
+        skipper = None
+        if SKIP_QUIET_BARS and not is_tick:
+            skipper = quiet_bar_skipper(engine, log=self.write_log)
+
+        for chunk in loader:
+            cur_start, cur_end, bars = chunk.start, chunk.end, chunk.bars
+            if skipper is not None:
+                skipper.feed(bars)
+            else:
+                for bar in bars:
+                    feed(bar)
+            total_bars += len(bars)
+            if is_tick:
+                if meter is not None:
+                    meter.add(len(bars))
+                    if meter.due():
+                        self.write_log(meter.line(start, end, cur_end))
+                continue
             
             # 鍚?GUI 鎵撳嵃杩涘害
             try:
                 pct = min(100, int((cur_end - start).days * 100 / max((end - start).days, 1)))
-                self.write_log(_(f"娴佸紡鍥炴斁杩涘害锛歿pct}% {cur_start.date()}->{cur_end.date()} bars={len(bars)}"))
+                self.write_log(_(f"娴佸紡鍥炴斁杩涘害锛歿{pct}% {cur_start.date()}->{cur_end.date()} bars={len(bars)}"))
             except Exception:
                 pass
-            
-            cur_start = cur_end + timedelta(minutes=1)
 
+        if meter is not None:
+            self.write_log(meter.summary())
+        if hasattr(loader, "stats"):
+            self.write_log(loader.stats.summary())
+        if hasattr(windows, "summary"):
+            self.write_log(windows.summary())
+        if skipper is not None:
+            self.write_log(skipper.summary())
         engine.strategy.on_stop()
-        self.write_log(_(f"娴佸紡鍥炴祴瀹屾垚锛屾€昏澶勭悊 {total_bars} 鏍筀绾?))
+        self.write_log(_(f"娴佸紡鍥炴祴瀹屾垚锛屾€昏澶勭悊 {total_bars} 鏍筀绾?"))
         
     except Exception:
         msg: str = _("绛栫暐鍥炴祴澶辫触锛岃Е鍙戝紓甯革細\n{}").format(traceback.format_exc())
@@ -218,42 +404,13 @@ def patched_daily_result_add_trade(self, trade) -> None:
     global MEMORY_OPTIMIZE_STATS
 
     if MEMORY_OPTIMIZE_STATS:
-        # 鍐呭瓨浼樺寲妯″紡锛氬彧淇濆瓨缁熻鑱氬悎锛屼笉淇濆瓨瀹屾暣 TradeData 瀵硅薄
-        # 鎵嬪姩鏇存柊缁熻淇℃伅锛岄伩鍏嶄繚瀛?TradeData 瀵硅薄
-        from vnpy.trader.constant import Direction
-
-        self.trade_count += 1
-
-        # 璁＄畻鎴愪氦棰濆拰鎵嬬画璐癸紙杩欎簺鍦?calculate_pnl 涓細鐢ㄥ埌锛?
-        # 娉ㄦ剰锛氳繖閲岄渶瑕佽闂?DailyResult 鐨勫叾浠栧睘鎬э紝浣嗘垜浠病鏈?size, rate, slippage
-        # 鎵€浠ユ垜浠渶瑕佸湪 calculate_pnl 璋冪敤鏃朵紶鍏ヨ繖浜涘弬鏁?
-        # 涓轰簡绠€鍖栵紝鎴戜滑鍏堣褰曞繀瑕佺殑缁熻淇℃伅
-        if not hasattr(self, '_trade_stats'):
-            self._trade_stats = {
-                'total_volume': 0.0,
-                'total_turnover': 0.0,
-                'long_volume': 0.0,
-                'short_volume': 0.0,
-                'position_changes': []  # 鍙繚瀛樻寔浠撳彉鍖栵紝涓嶄繚瀛樺畬鏁村璞?
-            }
-
-        # 璁板綍鎸佷粨鍙樺寲
-        if trade.direction == Direction.LONG:
-            pos_change = trade.volume
-            self._trade_stats['long_volume'] += trade.volume
-        else:
-            pos_change = -trade.volume
-            self._trade_stats['short_volume'] += trade.volume
-
-        self._trade_stats['position_changes'].append({
-            'pos_change': pos_change,
-            'price': trade.price,
-            'volume': trade.volume
-        })
-
-        self._trade_stats['total_volume'] += trade.volume
-        # turnover 璁＄畻闇€瑕?size锛岃繖閲屽厛璁板綍鍘熷鏁版嵁
-
+        # O(1) per day: running sums instead of a record per trade, see TradeAggregate
+        stats = getattr(self, "_trade_stats", None)
+        if stats is None:
+            from vnpy_grid.backtest.daily import TradeAggregate
+            stats = self._trade_stats = TradeAggregate()
+        stats.add(trade)
+        self.trade_count = stats.count
     else:
         # 鏍囧噯妯″紡锛氫繚瀛樺畬鏁?TradeData 瀵硅薄
         self.trades.append(trade)
@@ -284,23 +441,11 @@ def patched_daily_result_calculate_pnl(
 
     self.holding_pnl = self.start_pos * (self.close_price - self.pre_close) * size
 
-    if MEMORY_OPTIMIZE_STATS and hasattr(self, '_trade_stats'):
-        # 鍐呭瓨浼樺寲妯″紡锛氫娇鐢ㄨ仛鍚堢粺璁¤绠?
-        self.trade_count = len(self._trade_stats['position_changes'])
-
-        for trade_stat in self._trade_stats['position_changes']:
-            pos_change = trade_stat['pos_change']
-            price = trade_stat['price']
-            volume = trade_stat['volume']
-
-            self.end_pos += pos_change
-
-            turnover = volume * size * price
-            self.trading_pnl += pos_change * (self.close_price - price) * size
-            self.slippage += volume * size * slippage
-
-            self.turnover += turnover
-            self.commission += turnover * rate
+    # consumed here: left in __dict__ it would become a daily_df column (only on days with fills)
+    stats = self.__dict__.pop("_trade_stats", None)
+    if stats is not None:
+        # closed form over the day's sums
+        stats.apply(self, size, rate, slippage)
     else:
         # 鏍囧噯妯″紡锛氫娇鐢ㄥ畬鏁?trades 鍒楄〃
         from vnpy.trader.constant import Direction
@@ -347,6 +492,10 @@ def apply_patches():
     DailyResult.add_trade = patched_daily_result_add_trade
     DailyResult.calculate_pnl = patched_daily_result_calculate_pnl
     print("鉁?宸插簲鐢ㄥ唴瀛樹紭鍖栫粺璁¤ˉ涓?")
+
+    # price-indexed limit order matching, same fills as stock
+    if INDEXED_MATCHING and install_indexed_matching(True):
+        print("price-indexed limit order matching applied")
     
     print("=== 琛ヤ竵搴旂敤瀹屾垚 ===")
 
@@ -357,7 +506,75 @@ def set_memory_optimize_stats(enabled: bool):
     """
     global MEMORY_OPTIMIZE_STATS
     MEMORY_OPTIMIZE_STATS = enabled
-    print(f"鍐呭瓨浼樺寲缁熻: {'寮€鍚? if enabled else '鍏抽棴'}")
+    print(f"鍐呭瓨浼樺寲缁熻: {'寮€鍚?' if enabled else '鍏抽棴'}")
+
+
+def set_bar_cache(enabled: bool):
+    """
+    Serve streaming backtests from the memory-mapped bar cache instead of the database.
+    """
+    global USE_BAR_CACHE
+    USE_BAR_CACHE = enabled
+    print(f"bar cache: {'on' if enabled else 'off'}")
+
+
+def set_prefetch_depth(depth: int):
+    """
+    Number of streaming chunks loaded ahead of the replay (0 disables the worker thread).
+    """
+    global PREFETCH_DEPTH
+    PREFETCH_DEPTH = max(0, int(depth))
+    print(f"prefetch depth: {PREFETCH_DEPTH}")
+
+
+def set_chunk_budget(rows: int = None, memory_mb: float = None):
+    """
+    Size streaming chunks from a row budget or a peak memory budget instead of 15 days (both None: fixed).
+    """
+    global CHUNK_ROW_BUDGET, CHUNK_MEMORY_MB
+    CHUNK_ROW_BUDGET = rows
+    CHUNK_MEMORY_MB = memory_mb
+    print(f"chunk budget: rows={rows} memory_mb={memory_mb}")
+
+
+def set_indexed_matching(enabled: bool):
+    """
+    Switch between price-indexed limit order matching and the stock scan (fills are identical).
+    """
+    global INDEXED_MATCHING
+    INDEXED_MATCHING = install_indexed_matching(enabled) and enabled
+    print(f"indexed limit order matching: {'on' if INDEXED_MATCHING else 'off'}")
+
+
+def set_streaming_results(enabled: bool):
+    """
+    Close each day's results during the replay and drop its trades, so memory does not grow with fills.
+    """
+    global STREAMING_RESULTS
+    STREAMING_RESULTS = enabled
+    print(f"streaming daily results: {'on' if enabled else 'off'}")
+
+
+def set_skip_quiet_bars(enabled: bool):
+    """
+    Fast-forward bars that touch no resting order in streaming bar backtests (results are identical).
+    """
+    global SKIP_QUIET_BARS
+    SKIP_QUIET_BARS = enabled
+    print(f"quiet bar skipping: {'on' if enabled else 'off'}")
+
+
+def set_bad_span_policy(policy: str):
+    """
+    Choose how streaming backtests treat spans flagged in the import quality index.
+    """
+    from vnpy_grid.data.quality import POLICIES
+
+    global BAD_SPAN_POLICY
+    if policy not in POLICIES:
+        raise ValueError(f"unknown bad-span policy: {policy} (choose from {', '.join(POLICIES)})")
+    BAD_SPAN_POLICY = policy
+    print(f"bad-span policy: {policy}")
 
 
 def patched_backtester_manager_init_ui(self) -> None:
@@ -13,6 +13,9 @@ setup(
     install_requires=[
         "vnpy>=2.4.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
     include_package_data=True,
     zip_safe=False,
 )
@@ -0,0 +1,5 @@
+"""
+Backtest runtime utilities exposed under `vnpy_grid.backtest`.
+"""
+
+__all__: list[str] = []
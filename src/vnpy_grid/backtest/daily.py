@@ -0,0 +1,186 @@
+"""
+Streaming daily results for long backtests.
+
+`BacktestingEngine` keeps every `TradeData` (and every order) until
+`calculate_result()` sorts them into `DailyResult`s at the end of the run.
+`StreamingDailyResults` finalizes each day as soon as the replay moves past
+it instead:
+
+- the day's trades go through `DailyResult.add_trade` / `calculate_pnl` with
+  the previous close and end position carried over, exactly as
+  `calculate_result()` would do them;
+- one compact row (the `DailyResult` fields without the trade list) is
+  appended to a column table;
+- the day's `DailyResult`, its trades and the finished orders are dropped
+  from the engine.
+
+`calculate_result()` then builds `daily_df` from the table, with the same
+values and columns as the stock one minus `trades`. Memory stays flat with
+the number of fills; `engine.trades` / `get_all_trades()` only hold the
+current day's trades.
+
+The hooks are instance attributes on the engine (`new_bar`, `new_tick`,
+`calculate_result`), so the stock `run_backtesting` loop, the streaming
+runners and engine checkpoints all work unchanged.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from pandas import DataFrame
+from vnpy.trader.constant import Direction
+from vnpy.trader.object import BarData, TickData, TradeData
+from vnpy_ctastrategy.backtesting import BacktestingEngine, DailyResult
+from vnpy_ctastrategy.locale import _
+
+# DailyResult attributes that are per-trade payload, not part of the daily row
+TRADE_FIELDS = ("trades", "_trade_stats")
+
+HOOKS = ("streaming_results", "new_bar", "new_tick", "calculate_result")
+
+
+class TradeAggregate:
+    """
+    Running sums of one day's trades: everything `DailyResult.calculate_pnl`
+    needs, in constant memory however many fills the day has.
+
+    With `net_volume = sum(pos_change)` and `net_notional = sum(pos_change * price)`,
+    trading pnl is `(net_volume * close - net_notional) * size`; turnover,
+    commission and slippage are linear in `notional` and `volume`. The sums are
+    reassociated, so values agree with the per-trade loop up to float rounding.
+    """
+
+    __slots__ = ("count", "volume", "net_volume", "notional", "net_notional")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.volume = 0.0
+        self.net_volume = 0.0
+        self.notional = 0.0
+        self.net_notional = 0.0
+
+    def add(self, trade: TradeData) -> None:
+        volume = trade.volume
+        signed = volume if trade.direction == Direction.LONG else -volume
+        self.count += 1
+        self.volume += volume
+        self.net_volume += signed
+        self.notional += volume * trade.price
+        self.net_notional += signed * trade.price
+
+    def apply(self, result: DailyResult, size: float, rate: float, slippage: float) -> None:
+        """Add the day's trading terms to `result` (its start position and holding pnl already set)."""
+        result.trade_count = self.count
+        result.end_pos += self.net_volume
+        result.trading_pnl += (self.net_volume * result.close_price - self.net_notional) * size
+        result.slippage += self.volume * size * slippage
+        turnover = self.notional * size
+        result.turnover += turnover
+        result.commission += turnover * rate
+
+
+class StreamingDailyResults:
+    """Finalizes `DailyResult`s on date rollover and keeps them as columns."""
+
+    def __init__(self, engine: BacktestingEngine, release_orders: bool = True) -> None:
+        self.engine = engine
+        self.release_orders = release_orders
+        self.columns: Dict[str, List[Any]] = {}
+        self.pre_close: float = 0
+        self.start_pos: float = 0
+        self.released_trades = 0
+        self._next_day: Optional[datetime] = None
+
+    @classmethod
+    def attach(cls, engine: BacktestingEngine, release_orders: bool = True) -> "StreamingDailyResults":
+        """Hook a new aggregator into `engine` (call after `set_parameters`/`clear_data`)."""
+        self = cls(engine, release_orders)
+        engine.streaming_results = self
+        engine.new_bar = self.new_bar
+        engine.new_tick = self.new_tick
+        engine.calculate_result = self.calculate_result
+        return self
+
+    @staticmethod
+    def detach(engine: BacktestingEngine) -> None:
+        """Restore the stock behaviour on an engine that is reused across runs."""
+        for name in HOOKS:
+            engine.__dict__.pop(name, None)
+
+    # ——— replay hooks ———
+    def new_bar(self, bar: BarData) -> None:
+        if self._next_day is None or bar.datetime >= self._next_day:
+            self._roll(bar.datetime)
+        BacktestingEngine.new_bar(self.engine, bar)
+
+    def new_tick(self, tick: TickData) -> None:
+        if self._next_day is None or tick.datetime >= self._next_day:
+            self._roll(tick.datetime)
+        BacktestingEngine.new_tick(self.engine, tick)
+
+    def _roll(self, dt: datetime) -> None:
+        # everything before the new row's date is complete: fills happen on the row that closes them
+        self.finalize(before=dt.date())
+        self._next_day = datetime.combine(dt.date() + timedelta(days=1), time(), tzinfo=dt.tzinfo)
+
+    # ——— aggregation ———
+    def finalize(self, before: Optional[date] = None) -> int:
+        """Close all days before `before` (all days if None); returns how many were closed."""
+        engine = self.engine
+        days = [d for d in engine.daily_results if before is None or d < before]
+        if not days:
+            return 0
+
+        pending: Dict[date, list] = {}
+        closed = set(days)
+        for vt_tradeid, trade in list(engine.trades.items()):
+            if not trade.datetime:
+                continue
+            d = trade.datetime.date()
+            if d in closed:
+                pending.setdefault(d, []).append(trade)
+                del engine.trades[vt_tradeid]
+
+        for d in sorted(days):
+            result: DailyResult = engine.daily_results.pop(d)
+            for trade in pending.get(d, ()):
+                result.add_trade(trade)
+                self.released_trades += 1
+            result.calculate_pnl(self.pre_close, self.start_pos, engine.size, engine.rate, engine.slippage)
+            self.pre_close = result.close_price
+            self.start_pos = result.end_pos
+            self._append(result)
+
+        if self.release_orders:
+            self._release_orders()
+        return len(days)
+
+    def _append(self, result: DailyResult) -> None:
+        row = {k: v for k, v in result.__dict__.items() if k not in TRADE_FIELDS}
+        if not self.columns:
+            self.columns = {k: [] for k in row}
+        for k, v in row.items():
+            self.columns[k].append(v)
+
+    def _release_orders(self) -> None:
+        engine = self.engine
+        for orders, active in (
+            (engine.limit_orders, engine.active_limit_orders),
+            (engine.stop_orders, engine.active_stop_orders),
+        ):
+            for orderid in [k for k in orders if k not in active]:
+                del orders[orderid]
+
+    @property
+    def days(self) -> int:
+        return len(self.columns.get("date", ()))
+
+    def calculate_result(self) -> DataFrame:
+        engine = self.engine
+        engine.output(_("开始计算逐日盯市盈亏"))
+        self.finalize()
+        if self.columns:
+            engine.daily_df = DataFrame(self.columns).set_index("date")
+        engine.output(_("逐日盯市盈亏计算完成"))
+        return engine.daily_df
@@ -0,0 +1,592 @@
+"""
+Array-native simulator for `DynamicHedgedRebateGridStrategy`.
+
+The vnpy engine spends most of a DHRG replay on machinery the grid does not
+need: a `BarData` per row, an `OrderData` per grid order, a full walk of the
+active orders on every bar. `GridSimulator` replays OHLC columns
+(`BarArrays`) directly and runs the strategy's own rules on plain tuples:
+
+- grid layout and incremental shifts (`_compute_grid_prices`,
+  `_rebuild_grid`, maker-only placement, size clamps);
+- the take-profit order of every opening fill, fee / rebate accounting and
+  compounding of the net profit into the leg size, the net exposure
+  reduce order and the drawdown pause;
+- engine semantics: prices through `round_to(price, pricetick)`, order and
+  trade numbering, fills at `min/max(order price, bar open)`, one snapshot of
+  the crossing orders per bar (an order cancelled by an earlier fill of the
+  same bar still trades, as in stock vnpy).
+
+Only bars where some order can cross are visited; the others are skipped with
+a vectorized scan of `low <= best bid` / `high >= best ask`. Daily results are
+computed with vnpy's `DailyResult` and statistics with
+`BacktestingEngine.calculate_statistics`, so the trade log, `daily_df` and
+statistics are those of the engine (`daily_df` without the `trades` column,
+like streaming results).
+
+`check_parity()` runs the same arrays through the vnpy engine and compares
+trades, daily results, statistics and final strategy state.
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from vnpy.trader.constant import Direction, Exchange, Interval, Offset
+from vnpy.trader.utility import round_to
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode, DailyResult
+
+from ..data.history import ColumnarHistory
+from ..data.import_h5_to_vnpy import BarArrays, arrays_to_datetimes
+from ..strategies import DynamicHedgedRebateGridStrategy
+from .daily import TRADE_FIELDS
+
+DAY_NS = 86_400 * 10**9
+GATEWAY = "BACKTESTING"
+
+# strategy variables reported in `GridSimResult.state` (plus the position)
+STATE_FIELDS = tuple(DynamicHedgedRebateGridStrategy.variables)
+
+_round_to = lru_cache(maxsize=1 << 16)(round_to)
+
+# one open order: (price, volume, is_long, is_open)
+Order = Tuple[float, float, bool, bool]
+
+
+def grid_setting(setting: Optional[dict] = None) -> Dict[str, Any]:
+    """Strategy parameters: class defaults updated with `setting`, as `CtaTemplate.update_setting` does."""
+    cls = DynamicHedgedRebateGridStrategy
+    params = {name: getattr(cls, name) for name in cls.parameters}
+    for name, value in (setting or {}).items():
+        if name in params:
+            params[name] = value
+    return params
+
+
+@dataclass
+class Fill:
+    """What `DailyResult.calculate_pnl` reads from a trade."""
+    direction: Direction
+    price: float
+    volume: float
+
+
+@dataclass
+class GridSimResult:
+    trades: DataFrame
+    daily_df: DataFrame
+    statistics: Dict[str, Any]
+    state: Dict[str, Any]
+    bars: int = 0
+    events: int = 0
+    orders: int = 0
+    seconds: float = 0.0
+
+    @property
+    def bars_per_second(self) -> float:
+        return self.bars / self.seconds if self.seconds else 0.0
+
+
+class _GridReplay:
+    """The strategy's state and callbacks, with the engine's order book reduced to a dict of tuples."""
+
+    def __init__(self, params: Dict[str, Any], pricetick: float) -> None:
+        self.__dict__.update(params)
+        self.pricetick = pricetick
+        try:
+            self.dp = int(self.price_round_dp)
+        except Exception:
+            self.dp = 2
+
+        self.base_price = 0.0
+        self.long_size = 0.0
+        self.short_size = 0.0
+        self.rebate_eth_long = 0.0
+        self.rebate_eth_short = 0.0
+        self.realized_pnl_quote = 0.0
+        self.fee_rebate_quote = 0.0
+        self.fee_paid_quote = 0.0
+        self.maker_fills = 0
+        self.taker_fills = 0
+        self.equity_quote = self.initial_equity_quote
+        self.max_drawdown_percent_achieved = 0.0
+        self.paused_by_drawdown = False
+        self.pos = 0.0
+
+        self.active: Dict[int, Order] = {}
+        # (price, order id) sorted, entries of inactive orders are dropped lazily
+        self.buys: List[Tuple[float, int]] = []
+        self.sells: List[Tuple[float, int]] = []
+        self.order_count = 0
+        self.trade_count = 0
+        self.open_long_orders: Dict[float, int] = {}
+        self.open_short_orders: Dict[float, int] = {}
+        self.active_grid_prices: set = set()
+        # take-profit order id -> (leg is long, entry price, volume, open fee)
+        self.take_profit_orders: Dict[int, Tuple[bool, float, float, float]] = {}
+
+        # trade log columns
+        self.t_bar: List[int] = []
+        self.t_order: List[int] = []
+        self.t_long: List[bool] = []
+        self.t_open: List[bool] = []
+        self.t_price: List[float] = []
+        self.t_volume: List[float] = []
+        self.events = 0
+
+    # ——— engine ———
+    def send(self, is_long: bool, is_open: bool, price: float, volume: float) -> int:
+        self.order_count += 1
+        price = _round_to(price, self.pricetick)
+        self.active[self.order_count] = (price, volume, is_long, is_open)
+        insort(self.buys if is_long else self.sells, (price, self.order_count))
+        return self.order_count
+
+    def cancel(self, orderid: int) -> None:
+        self.active.pop(orderid, None)
+
+    def replay(self, arrays: BarArrays) -> None:
+        n = len(arrays)
+        if not n:
+            return
+        self.on_first_bar(float(arrays.close[0]))
+        o, h, l = arrays.open, arrays.high, arrays.low
+        i = 0
+        while self.active:
+            i = self.next_event(l, h, i + 1)
+            if i >= n:
+                break
+            self.cross(i, float(o[i]), float(h[i]), float(l[i]))
+
+    def _compact(self) -> None:
+        active = self.active
+        self.buys = [e for e in self.buys if e[1] in active]
+        self.sells = [e for e in self.sells if e[1] in active]
+
+    def next_event(self, low: np.ndarray, high: np.ndarray, start: int) -> int:
+        """First bar from `start` on where an active order crosses; len(low) if none."""
+        active = self.active
+        if len(self.buys) + len(self.sells) > 2 * len(active) + 64:
+            self._compact()
+        buys, sells = self.buys, self.sells
+        while buys and buys[-1][1] not in active:
+            buys.pop()
+        while sells and sells[0][1] not in active:
+            del sells[0]
+        best_bid = buys[-1][0] if buys else -math.inf
+        best_ask = sells[0][0] if sells else math.inf
+
+        n = len(low)
+        step = 64
+        while start < n:
+            stop = min(n, start + step)
+            lo = low[start:stop]
+            hi = high[start:stop]
+            hit = np.flatnonzero(((lo <= best_bid) & (lo > 0)) | ((hi >= best_ask) & (hi > 0)))
+            if hit.size:
+                return start + int(hit[0])
+            start = stop
+            step = min(step * 4, 1 << 20)
+        return n
+
+    def cross(self, i: int, open_price: float, high: float, low: float) -> None:
+        # the orders the engine's snapshot walk would fill, in insertion (= id) order
+        self.events += 1
+        active = self.active
+        ids: List[int] = []
+        if low > 0:
+            ids += [oid for _, oid in self.buys[bisect_left(self.buys, (low, -1)):] if oid in active]
+        if high > 0:
+            ids += [oid for _, oid in self.sells[:bisect_right(self.sells, (high, math.inf))] if oid in active]
+        ids.sort()
+        crossing = [(oid, active[oid]) for oid in ids]
+
+        for orderid, (price, volume, is_long, is_open) in crossing:
+            self.active.pop(orderid, None)
+            self.trade_count += 1
+            if is_long:
+                trade_price = min(price, open_price)
+                self.pos += volume
+            else:
+                trade_price = max(price, open_price)
+                self.pos -= volume
+            self.t_bar.append(i)
+            self.t_order.append(orderid)
+            self.t_long.append(is_long)
+            self.t_open.append(is_open)
+            self.t_price.append(trade_price)
+            self.t_volume.append(volume)
+            self.on_trade(orderid, is_long, is_open, trade_price, volume)
+
+    # ——— strategy ———
+    def on_first_bar(self, close_price: float) -> None:
+        self.base_price = close_price
+        self.long_size = max(self.long_size_init, self.min_order_size)
+        self.short_size = max(self.short_size_init, self.min_order_size)
+        self._rebuild_grid()
+
+    def _calc_fee(self, price: float, volume: float, is_maker: bool) -> float:
+        notion = abs(price) * abs(volume)
+        fee = (-self.maker_rebate_rate if is_maker else self.taker_fee_rate) * notion
+        if is_maker:
+            self.fee_rebate_quote += -fee
+            self.maker_fills += 1
+        else:
+            self.fee_paid_quote += fee
+            self.taker_fills += 1
+        return fee
+
+    def _round_price(self, p: float) -> float:
+        return round(p, self.dp) if self.dp >= 0 else p
+
+    def _compute_grid_prices(self) -> List[float]:
+        ps: List[float] = []
+        for i in range(1, self.levels + 1):
+            ps.append(self._round_price(self.base_price * (1.0 - self.grid_pct * i)))
+            ps.append(self._round_price(self.base_price * (1.0 + self.grid_pct * i)))
+        return sorted(set(ps))
+
+    def _check_drawdown_and_pause(self) -> None:
+        if self.initial_equity_quote <= 0:
+            return
+        dd = max(0.0, (self.initial_equity_quote - self.equity_quote) / self.initial_equity_quote)
+        self.max_drawdown_percent_achieved = max(self.max_drawdown_percent_achieved, dd)
+        if dd >= self.max_account_drawdown_percent and not self.paused_by_drawdown:
+            self.paused_by_drawdown = True
+            self.active.clear()  # cancel_all
+
+    def on_trade(self, orderid: int, is_long: bool, is_open: bool, price: float, vol: float) -> None:
+        if is_open:
+            is_maker_open = bool(self.assume_maker_for_resting_orders)
+            open_fee = self._calc_fee(price, vol, is_maker_open)
+            if is_long:
+                tp = self.send(False, False, price * (1.0 + self.grid_pct), vol)
+            else:
+                tp = self.send(True, False, price * (1.0 - self.grid_pct), vol)
+            self.take_profit_orders[tp] = (is_long, price, vol, open_fee)
+
+            self.base_price = price
+            if not self.paused_by_drawdown:
+                self._rebuild_grid()
+            return
+
+        rec = self.take_profit_orders.pop(orderid, None)
+        if rec is None:
+            return  # net exposure reduce order
+        leg_long, entry_price, rec_volume, open_fee = rec
+        close_fee = self._calc_fee(price, rec_volume, bool(self.assume_maker_for_resting_orders))
+
+        if leg_long:
+            gross_quote = max(0.0, price - entry_price) * rec_volume
+        else:
+            gross_quote = max(0.0, entry_price - price) * rec_volume
+
+        net_quote = gross_quote - (open_fee + close_fee)
+        self.realized_pnl_quote += net_quote
+        self.equity_quote = self.initial_equity_quote + self.realized_pnl_quote
+
+        eth_gain = net_quote / max(price, 1e-9)
+        if leg_long:
+            self.rebate_eth_long += max(0.0, eth_gain)
+            self.long_size = min(max(self.long_size + eth_gain, self.min_order_size), self.max_individual_position_size)
+        else:
+            self.rebate_eth_short += max(0.0, eth_gain)
+            self.short_size = min(max(self.short_size + eth_gain, self.min_order_size), self.max_individual_position_size)
+
+        net_pos = self.pos
+        if abs(net_pos) > self.max_net_exposure_limit:
+            reduce_qty = min(abs(net_pos), (self.long_size if net_pos > 0 else self.short_size))
+            if net_pos > 0:
+                self.send(False, False, price * (1 + self.grid_pct * 0.5), reduce_qty)
+            elif net_pos < 0:
+                self.send(True, False, price * (1 - self.grid_pct * 0.5), reduce_qty)
+
+        self._check_drawdown_and_pause()
+
+    def _rebuild_grid(self) -> None:
+        if self.paused_by_drawdown:
+            return
+
+        new_prices = self._compute_grid_prices()
+        new_set = set(new_prices)
+
+        if not self.active_grid_prices:
+            for orderid in list(self.open_long_orders.values()) + list(self.open_short_orders.values()):
+                self.cancel(orderid)
+            self.open_long_orders.clear()
+            self.open_short_orders.clear()
+            for p in new_prices:
+                self._place_grid_pair(p)
+        else:
+            old_set = self.active_grid_prices
+            for p in sorted(old_set - new_set):
+                self._cancel_price_orders(p)
+            for p in sorted(new_set - old_set):
+                self._place_grid_pair(p)
+        self.active_grid_prices = new_set
+
+    def _place_grid_pair(self, price: float) -> None:
+        price = self._round_price(price)
+        long_qty = max(self.min_order_size, min(self.long_size, self.max_individual_position_size))
+        short_qty = max(self.min_order_size, min(self.short_size, self.max_individual_position_size))
+
+        if (not self.maker_only_mode) or (price < self.base_price):
+            if long_qty > 0:
+                self.open_long_orders[price] = self.send(True, True, price, long_qty)
+        if (not self.maker_only_mode) or (price > self.base_price):
+            if short_qty > 0:
+                self.open_short_orders[price] = self.send(False, True, price, short_qty)
+
+    def _cancel_price_orders(self, price: float) -> None:
+        price = self._round_price(price)
+        for orders in (self.open_long_orders, self.open_short_orders):
+            orderid = orders.pop(price, None)
+            if orderid is not None:
+                self.cancel(orderid)
+
+    def state(self) -> Dict[str, Any]:
+        state = {name: getattr(self, name) for name in STATE_FIELDS}
+        state["pos"] = self.pos
+        state["paused_by_drawdown"] = self.paused_by_drawdown
+        state["active_orders"] = len(self.active)
+        return state
+
+
+class GridSimulator:
+    """DHRG backtest over `BarArrays`, with the engine parameters of `BacktestingEngine.set_parameters`."""
+
+    def __init__(
+        self,
+        setting: Optional[dict] = None,
+        rate: float = 2.5e-5,
+        slippage: float = 0.2,
+        size: float = 1,
+        pricetick: float = 0.01,
+        capital: int = 1_000_000,
+        risk_free: float = 0,
+        annual_days: int = 240,
+        half_life: int = 120,
+    ) -> None:
+        self.setting = dict(setting or {})
+        self.params = grid_setting(setting)
+        self.rate = rate
+        self.slippage = slippage
+        self.size = size
+        self.pricetick = pricetick
+        self.capital = capital
+        self.risk_free = risk_free
+        self.annual_days = annual_days
+        self.half_life = half_life
+
+    def engine_parameters(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate, "slippage": self.slippage, "size": self.size, "pricetick": self.pricetick,
+            "capital": self.capital, "risk_free": self.risk_free, "annual_days": self.annual_days,
+            "half_life": self.half_life,
+        }
+
+    def run(self, arrays: BarArrays, tz=timezone.utc) -> GridSimResult:
+        """Replay `arrays` (sorted by time); daily results use calendar days in `tz`, like the engine's bars."""
+        started = perf_counter()
+        replay = _GridReplay(self.params, self.pricetick)
+        replay.replay(arrays)
+        trades = self._trade_frame(replay, arrays, tz)
+        daily_df = self._daily_frame(replay, arrays, tz)
+        statistics = self._statistics(daily_df)
+        return GridSimResult(
+            trades=trades,
+            daily_df=daily_df,
+            statistics=statistics,
+            state=replay.state(),
+            bars=len(arrays),
+            events=replay.events,
+            orders=replay.order_count,
+            seconds=perf_counter() - started,
+        )
+
+    @staticmethod
+    def _trade_frame(replay: _GridReplay, arrays: BarArrays, tz) -> DataFrame:
+        bar = np.asarray(replay.t_bar, dtype="int64")
+        long_ = np.asarray(replay.t_long, dtype=bool)
+        open_ = np.asarray(replay.t_open, dtype=bool)
+        return DataFrame({
+            "datetime": arrays_to_datetimes(arrays.ts_ns[bar], tz),
+            "vt_tradeid": [f"{GATEWAY}.{i}" for i in range(1, len(bar) + 1)],
+            "vt_orderid": [f"{GATEWAY}.{i}" for i in replay.t_order],
+            "direction": np.where(long_, Direction.LONG, Direction.SHORT),
+            "offset": np.where(open_, Offset.OPEN, Offset.CLOSE),
+            "price": np.asarray(replay.t_price, dtype="float64"),
+            "volume": np.asarray(replay.t_volume, dtype="float64"),
+        })
+
+    def _daily_frame(self, replay: _GridReplay, arrays: BarArrays, tz) -> DataFrame:
+        n = len(arrays)
+        if not n:
+            return DataFrame()
+        local_ns = pd.DatetimeIndex(arrays.ts_ns, tz=timezone.utc).tz_convert(tz).tz_localize(None).asi8
+        day = local_ns // DAY_NS
+        ends = np.append(np.flatnonzero(day[1:] != day[:-1]), n - 1)
+        dates = [dt.date() for dt in arrays_to_datetimes(arrays.ts_ns[ends], tz)]
+        trade_day = np.searchsorted(ends, np.asarray(replay.t_bar, dtype="int64"))
+
+        results = [DailyResult(d, float(arrays.close[e])) for d, e in zip(dates, ends)]
+        for k, is_long, price, volume in zip(trade_day.tolist(), replay.t_long, replay.t_price, replay.t_volume):
+            results[k].add_trade(Fill(Direction.LONG if is_long else Direction.SHORT, price, volume))
+
+        pre_close: float = 0
+        start_pos: float = 0
+        columns: Dict[str, List[Any]] = {}
+        for result in results:
+            result.calculate_pnl(pre_close, start_pos, self.size, self.rate, self.slippage)
+            pre_close = result.close_price
+            start_pos = result.end_pos
+            for k, v in result.__dict__.items():
+                if k not in TRADE_FIELDS:
+                    columns.setdefault(k, []).append(v)
+        return DataFrame(columns).set_index("date")
+
+    def _statistics(self, daily_df: DataFrame) -> Dict[str, Any]:
+        engine = BacktestingEngine()
+        engine.output = lambda msg: None
+        engine.capital = self.capital
+        engine.risk_free = self.risk_free
+        engine.annual_days = self.annual_days
+        engine.half_life = self.half_life
+        engine.daily_df = daily_df
+        return engine.calculate_statistics(output=False)
+
+
+# ——— parity mode ———
+@dataclass
+class ParityReport:
+    trades: int
+    reference_trades: int
+    first_trade_mismatch: Optional[int] = None
+    daily_max_diff: float = 0.0
+    statistics_diff: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    state_diff: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    seconds: float = 0.0
+    reference_seconds: float = 0.0
+    tolerance: float = 1e-9
+
+    @property
+    def ok(self) -> bool:
+        return (
+            self.trades == self.reference_trades
+            and self.first_trade_mismatch is None
+            and self.daily_max_diff <= self.tolerance
+            and not self.statistics_diff
+            and not self.state_diff
+        )
+
+    def summary(self) -> str:
+        speedup = self.reference_seconds / self.seconds if self.seconds else float("nan")
+        return (
+            f"parity {'OK' if self.ok else 'FAILED'}: trades {self.trades}/{self.reference_trades}, "
+            f"first mismatch {self.first_trade_mismatch}, daily max diff {self.daily_max_diff:.3g}, "
+            f"statistics diff {sorted(self.statistics_diff)}, state diff {sorted(self.state_diff)}; "
+            f"sim {self.seconds:.2f}s vs engine {self.reference_seconds:.2f}s ({speedup:.1f}x)"
+        )
+
+
+def run_reference(
+    simulator: GridSimulator,
+    arrays: BarArrays,
+    tz=timezone.utc,
+    vt_symbol: str = "ETHUSDT.GLOBAL",
+    interval: Interval = Interval.MINUTE,
+) -> BacktestingEngine:
+    """The same backtest through the vnpy engine (columnar history, stock `run_backtesting`)."""
+    symbol, exchange = vt_symbol.rsplit(".", 1)
+    start = datetime.fromtimestamp(int(arrays.ts_ns[0]) / 1e9, tz) if len(arrays) else datetime.now(tz)
+    end = datetime.fromtimestamp(int(arrays.ts_ns[-1]) / 1e9, tz) if len(arrays) else start
+
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol=vt_symbol, interval=interval.value, start=start, end=end,
+        mode=BacktestingMode.BAR, **simulator.engine_parameters(),
+    )
+    engine.add_strategy(DynamicHedgedRebateGridStrategy, simulator.setting)
+    engine.history_data = ColumnarHistory(arrays, symbol, Exchange(exchange), interval, tz=tz)
+    engine.run_backtesting()
+    engine.calculate_result()
+    return engine
+
+
+def _differs(a: Any, b: Any, tolerance: float) -> bool:
+    if isinstance(a, (int, float, np.number)) and isinstance(b, (int, float, np.number)):
+        a, b = float(a), float(b)
+        if math.isnan(a) and math.isnan(b):
+            return False
+        return not math.isclose(a, b, rel_tol=tolerance, abs_tol=tolerance)
+    return a != b
+
+
+def check_parity(
+    arrays: BarArrays,
+    setting: Optional[dict] = None,
+    tz=timezone.utc,
+    tolerance: float = 1e-9,
+    **params,
+) -> ParityReport:
+    """
+    Run `arrays` through `GridSimulator` and the vnpy engine and compare them:
+    the trade logs field by field (ids, direction, offset, price, volume,
+    time), `daily_df`, statistics and the final strategy variables.
+    """
+    simulator = GridSimulator(setting, **params)
+    result = simulator.run(arrays, tz)
+
+    started = perf_counter()
+    engine = run_reference(simulator, arrays, tz)
+    stats = engine.calculate_statistics(output=False)
+    reference_seconds = perf_counter() - started
+
+    ours = list(zip(
+        result.trades["vt_tradeid"], result.trades["vt_orderid"], result.trades["direction"],
+        result.trades["offset"], result.trades["price"], result.trades["volume"], result.trades["datetime"],
+    ))
+    theirs = [
+        (t.vt_tradeid, t.vt_orderid, t.direction, t.offset, t.price, t.volume, t.datetime)
+        for t in engine.trades.values()
+    ]
+    report = ParityReport(
+        trades=len(ours), reference_trades=len(theirs), tolerance=tolerance,
+        seconds=result.seconds, reference_seconds=reference_seconds,
+    )
+    for k, (a, b) in enumerate(zip(ours, theirs)):
+        if a != b:
+            report.first_trade_mismatch = k
+            break
+    if report.first_trade_mismatch is None and len(ours) != len(theirs):
+        report.first_trade_mismatch = min(len(ours), len(theirs))
+
+    ref_df = engine.daily_df.drop(columns=[c for c in TRADE_FIELDS if c in engine.daily_df])
+    if list(ref_df.index) != list(result.daily_df.index) or list(ref_df.columns) != list(result.daily_df.columns):
+        report.daily_max_diff = math.inf
+    elif len(ref_df):
+        diff = (ref_df.astype("float64") - result.daily_df.astype("float64")).abs().to_numpy()
+        report.daily_max_diff = float(np.nanmax(diff)) if diff.size else 0.0
+
+    for key in set(stats) | set(result.statistics):
+        a, b = result.statistics.get(key), stats.get(key)
+        if _differs(a, b, tolerance):
+            report.statistics_diff[key] = (a, b)
+
+    strategy = engine.strategy
+    for key, value in result.state.items():
+        if key in ("active_orders",):
+            ref = len(engine.active_limit_orders)
+        else:
+            ref = getattr(strategy, key)
+        if _differs(value, ref, tolerance):
+            report.state_diff[key] = (value, ref)
+    return report
@@ -0,0 +1,257 @@
+"""
+Price-indexed limit order matching for `BacktestingEngine`.
+
+Stock `cross_limit_order` walks every active limit order on every bar. With a
+grid of hundreds of levels almost none of them can trade on a given bar, so
+the walk dominates the replay. `PriceIndexedOrders` replaces
+`engine.active_limit_orders`: it is still the same dict (every engine and
+strategy access keeps working), and it also keeps buy and sell orders sorted
+by `(price, insertion sequence)`. The patched `cross_limit_order` then visits:
+
+- buys priced at or above the bar low (ask for ticks), sells at or below the
+  high (bid), found by bisection: O(log n + k);
+- orders submitted since the previous bar, which stock vnpy moves from
+  SUBMITTING to NOTTRADED with an `on_order` push on the next cross.
+
+Right after the book has been (mostly) replaced, e.g. by a grid rebuild on a
+fill, the stock walk over all active orders is used for that bar instead.
+
+Those orders are processed in insertion order with the stock loop body, which
+is exactly the subsequence of the stock walk that does anything. Orders,
+trades, trade ids and strategy callbacks are therefore identical, including
+the stock quirk that an order cancelled by a callback earlier in the same
+cross still fills if it crossed.
+
+`apply_matching_patch()` installs it the same way `patch_ctabacktester`
+installs its patches; engines convert their order dict on the first cross.
+Stop orders are left to the stock `cross_stop_order`.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+from vnpy.trader.constant import Direction, Status
+from vnpy.trader.object import OrderData, TradeData
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+
+_INF = float("inf")
+
+original_cross_limit_order = BacktestingEngine.cross_limit_order
+
+
+class PriceIndexedOrders(dict):
+    """
+    `active_limit_orders` that also keeps LONG / SHORT orders sorted by price.
+
+    The index is maintained lazily so that grid rebuilds, which place and
+    cancel hundreds of orders per fill, stay at plain dict speed: inserts
+    only queue the key, removals are the native dict ones and leave a stale
+    book entry behind. `touched()` indexes the queued orders that are still
+    active, skips stale entries and compacts the books once they are mostly
+    stale.
+    """
+
+    def __init__(self, orders: Optional[dict] = None) -> None:
+        super().__init__()
+        self._buys: List[Tuple[float, int, str]] = []
+        self._sells: List[Tuple[float, int, str]] = []
+        self._seq_of: Dict[str, int] = {}
+        self._seq = 0
+        self._new: List[str] = []
+        self._dirty = False
+        for vt_orderid, order in (orders or {}).items():
+            self[vt_orderid] = order
+
+    def __reduce__(self):
+        # rebuilt through __setitem__, so the index never has to be pickled
+        return self.__class__, (dict(self),)
+
+    def __setitem__(self, vt_orderid: str, order: OrderData) -> None:
+        if vt_orderid in self:
+            self._dirty = True  # overwriting keeps the dict position (and the sequence), reindex
+        else:
+            self._seq += 1
+            self._seq_of[vt_orderid] = self._seq
+            self._new.append(vt_orderid)
+        super().__setitem__(vt_orderid, order)
+
+    def setdefault(self, vt_orderid: str, default=None):
+        if vt_orderid not in self:
+            self[vt_orderid] = default
+        return super().__getitem__(vt_orderid)
+
+    def update(self, *args, **kwargs) -> None:
+        for vt_orderid, order in dict(*args, **kwargs).items():
+            self[vt_orderid] = order
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self._buys.clear()
+        self._sells.clear()
+        self._seq_of.clear()
+        self._new.clear()
+        self._dirty = False
+
+    # ——— index maintenance ———
+    def _book(self, order: OrderData) -> Optional[list]:
+        if order.direction == Direction.LONG:
+            return self._buys
+        if order.direction == Direction.SHORT:
+            return self._sells
+        return None  # never crosses, only visited for its SUBMITTING push
+
+    def _live(self, seq: int, vt_orderid: str) -> bool:
+        return vt_orderid in self and self._seq_of[vt_orderid] == seq
+
+    def _reindex(self) -> None:
+        self._seq_of = {k: self._seq_of[k] for k in self}
+        self._buys = []
+        self._sells = []
+        for vt_orderid, order in self.items():
+            book = self._book(order)
+            if book is not None:
+                book.append((order.price, self._seq_of[vt_orderid], vt_orderid))
+        self._buys.sort()
+        self._sells.sort()
+        self._dirty = False
+
+    def _index_new(self, keys: List[str]) -> None:
+        get = super().__getitem__
+        for vt_orderid in keys:
+            if vt_orderid not in self:
+                continue  # cancelled before it ever reached a cross
+            order = get(vt_orderid)
+            book = self._book(order)
+            if book is not None:
+                insort(book, (order.price, self._seq_of[vt_orderid], vt_orderid))
+
+    # ——— matching ———
+    def touched(self, long_cross_price: float, short_cross_price: float) -> List[OrderData]:
+        """
+        Orders the stock cross loop would act on, in its iteration order:
+        buys priced >= `long_cross_price`, sells <= `short_cross_price`
+        (each side only when its price is positive), plus orders inserted
+        since the previous call that are still active. When those new orders
+        are as many as the book, all active orders are returned, as stock does.
+        """
+        new, self._new = self._new, []
+        limit = 2 * len(self) + 64
+        if len(new) >= len(self):
+            # the book was (mostly) replaced since the last bar, e.g. a grid rebuild:
+            # the stock walk visits about as many orders and indexing would be wasted
+            self._dirty = True
+            if len(self._seq_of) > limit:
+                self._seq_of = {k: self._seq_of[k] for k in self}
+            return list(self.values())
+
+        picked: Dict[int, str] = {}
+        for vt_orderid in new:
+            if vt_orderid in self:
+                picked[self._seq_of[vt_orderid]] = vt_orderid
+
+        if self._dirty or len(self._buys) + len(self._sells) > limit or len(self._seq_of) > limit:
+            self._reindex()
+        else:
+            self._index_new(new)
+
+        if long_cross_price > 0:
+            buys = self._buys
+            for _, seq, vt_orderid in buys[bisect_left(buys, (long_cross_price, -1)):]:
+                if self._live(seq, vt_orderid):
+                    picked[seq] = vt_orderid
+        if short_cross_price > 0:
+            sells = self._sells
+            for _, seq, vt_orderid in sells[:bisect_right(sells, (short_cross_price, _INF))]:
+                if self._live(seq, vt_orderid):
+                    picked[seq] = vt_orderid
+
+        get = super().__getitem__
+        return [get(picked[seq]) for seq in sorted(picked)]
+
+
+def cross_limit_order(self: BacktestingEngine) -> None:
+    """
+    Cross limit order with last bar/tick data (price-indexed, same fills as stock).
+    """
+    orders = self.active_limit_orders
+    if not isinstance(orders, PriceIndexedOrders):
+        orders = self.active_limit_orders = PriceIndexedOrders(orders)
+
+    if self.mode == BacktestingMode.BAR:
+        long_cross_price = self.bar.low_price
+        short_cross_price = self.bar.high_price
+        long_best_price = self.bar.open_price
+        short_best_price = self.bar.open_price
+    else:
+        long_cross_price = self.tick.ask_price_1
+        short_cross_price = self.tick.bid_price_1
+        long_best_price = long_cross_price
+        short_best_price = short_cross_price
+
+    # from here on the body is the stock loop, run over the orders it would not skip
+    for order in orders.touched(long_cross_price, short_cross_price):
+        if order.status == Status.SUBMITTING:
+            order.status = Status.NOTTRADED
+            self.strategy.on_order(order)
+
+        long_cross: bool = (
+            order.direction == Direction.LONG
+            and order.price >= long_cross_price
+            and long_cross_price > 0
+        )
+
+        short_cross: bool = (
+            order.direction == Direction.SHORT
+            and order.price <= short_cross_price
+            and short_cross_price > 0
+        )
+
+        if not long_cross and not short_cross:
+            continue
+
+        order.traded = order.volume
+        order.status = Status.ALLTRADED
+        self.strategy.on_order(order)
+
+        if order.vt_orderid in self.active_limit_orders:
+            self.active_limit_orders.pop(order.vt_orderid)
+
+        self.trade_count += 1
+
+        if long_cross:
+            trade_price = min(order.price, long_best_price)
+            pos_change = order.volume
+        else:
+            trade_price = max(order.price, short_best_price)
+            pos_change = -order.volume
+
+        trade: TradeData = TradeData(
+            symbol=order.symbol,
+            exchange=order.exchange,
+            orderid=order.orderid,
+            tradeid=str(self.trade_count),
+            direction=order.direction,
+            offset=order.offset,
+            price=trade_price,
+            volume=order.volume,
+            datetime=self.datetime,
+            gateway_name=self.gateway_name,
+        )
+
+        self.strategy.pos += pos_change
+        self.strategy.on_trade(trade)
+
+        self.trades[trade.vt_tradeid] = trade
+
+
+def apply_matching_patch() -> None:
+    BacktestingEngine.cross_limit_order = cross_limit_order
+
+
+def remove_matching_patch() -> None:
+    BacktestingEngine.cross_limit_order = original_cross_limit_order
@@ -0,0 +1,64 @@
+"""
+Single-pass replay of one bar stream into several engines.
+
+A sweep through a process pool still loads and decodes the bars once per
+variant. `MultiEngineReplay` drives N independent `BacktestingEngine` +
+strategy instances from the same chunks instead: each chunk is read and
+turned into `BarData` once, then replayed into every engine in turn (engines
+never modify the bars they are fed, so the objects are shared). Memory is one
+chunk of bars plus the N engines' own state, which `StreamingDailyResults`
+keeps flat; no shared memory or extra processes are needed.
+
+Engines stay fully independent, so every variant gets exactly the trades and
+results of a run of its own. With `skip_quiet_bars` each engine has its own
+`QuietBarSkipper`, since quiet stretches depend on each variant's orders.
+"""
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from vnpy.trader.object import BarData
+from vnpy_ctastrategy.backtesting import BacktestingEngine
+
+from .skipping import QuietBarSkipper
+
+
+class MultiEngineReplay:
+    """Feeds each chunk of bars to every engine of `engines`."""
+
+    def __init__(self, engines: Sequence[BacktestingEngine], skip_quiet_bars: bool = False) -> None:
+        self.engines = list(engines)
+        self.skippers: Optional[List[QuietBarSkipper]] = (
+            [QuietBarSkipper(engine) for engine in self.engines] if skip_quiet_bars else None
+        )
+        self.bars = 0
+        self.seconds = [0.0] * len(self.engines)
+
+    def feed(self, bars: Sequence[BarData]) -> None:
+        for k, engine in enumerate(self.engines):
+            started = perf_counter()
+            if self.skippers is not None:
+                self.skippers[k].feed(bars)
+            else:
+                for bar in bars:
+                    engine.new_bar(bar)
+            self.seconds[k] += perf_counter() - started
+        self.bars += len(bars)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Stop every strategy and compute its daily results and statistics (one dict per engine)."""
+        results = []
+        for engine in self.engines:
+            engine.strategy.on_stop()
+            engine.calculate_result()
+            results.append(engine.calculate_statistics(output=False))
+        return results
+
+    def summary(self) -> str:
+        replay = sum(self.seconds)
+        line = f"[multi] {len(self.engines)} engines x {self.bars} bars, replay {replay:.1f}s"
+        if self.skippers is not None:
+            skipped = sum(s.skipped for s in self.skippers)
+            line += f", fast-forwarded {skipped / max(self.bars * len(self.engines), 1):.1%} of engine bars"
+        return line
@@ -0,0 +1,194 @@
+"""
+Event-skipping bar replay.
+
+On calm stretches most bars reach no resting order, yet the engine still runs
+`new_bar` for each: a cross over the active orders, `on_bar` and the daily
+close. `QuietBarSkipper` feeds a chunk of bars and fast-forwards over the bars
+that provably do nothing:
+
+- `RangeIndex` keeps the maxima of `high` and minima of `low` over aligned
+  power-of-two blocks (2n floats per chunk), so the first bar from `i` on with
+  `low <= best bid` or `high >= best ask` is found in O(log n);
+- bars before it only update the daily close of their date (the last close
+  of each date is located by bisection), plus `engine.bar` / `datetime`;
+- everything else goes through the stock `engine.new_bar`.
+
+Skipping only happens while it cannot change the result: bar mode, no active
+stop orders, no orders submitted on the previous bar (they still get their
+NOTTRADED push on the next cross) and the strategy's
+`can_skip_quiet_bars()` returns True, i.e. its `on_bar` does nothing on a
+bar without fills. Strategies without that method are replayed bar by bar.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+from operator import attrgetter
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from vnpy.trader.constant import Direction
+from vnpy.trader.object import BarData, OrderData
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+
+_DATETIME = attrgetter("datetime")
+
+
+class RangeIndex:
+    """Block maxima of `high` / minima of `low` for 'next bar reaching a price' queries."""
+
+    def __init__(self, high: np.ndarray, low: np.ndarray) -> None:
+        # bars that can never cross (price <= 0 or NaN, as in cross_limit_order) are neutral
+        hi = np.where(high > 0, high, -math.inf)
+        lo = np.where(low > 0, low, math.inf)
+        self.n = len(hi)
+        self.highs = [hi]
+        self.lows = [lo]
+        while len(hi) > 1:
+            if len(hi) % 2:
+                hi = np.append(hi, -math.inf)
+                lo = np.append(lo, math.inf)
+            hi = np.maximum(hi[0::2], hi[1::2])
+            lo = np.minimum(lo[0::2], lo[1::2])
+            self.highs.append(hi)
+            self.lows.append(lo)
+
+    @classmethod
+    def from_bars(cls, bars: Sequence[BarData]) -> "RangeIndex":
+        n = len(bars)
+        high = np.fromiter((bar.high_price for bar in bars), dtype="float64", count=n)
+        low = np.fromiter((bar.low_price for bar in bars), dtype="float64", count=n)
+        return cls(high, low)
+
+    def first_cross(self, start: int, bid: float, ask: float) -> int:
+        """First row >= `start` with low <= `bid` or high >= `ask`; `n` if there is none."""
+        highs, lows, n = self.highs, self.lows, self.n
+        top = len(highs) - 1
+        pos, k = start, 0
+        # invariant: pos is a multiple of 2**k
+        while pos < n:
+            block = pos >> k
+            if lows[k][block] > bid and highs[k][block] < ask:
+                pos += 1 << k
+                while k < top and not pos & ((2 << k) - 1):
+                    k += 1
+            elif k:
+                k -= 1
+            else:
+                return pos
+        return n
+
+
+class BookTops:
+    """
+    Best buy / sell price of an engine's active limit orders, kept in two heaps.
+
+    Orders are picked up by id as the engine numbers them; entries of orders
+    that are no longer active are dropped when they reach the top, and the
+    heaps are rebuilt once they are mostly stale.
+    """
+
+    def __init__(self, engine: BacktestingEngine) -> None:
+        self.engine = engine
+        self.seen = 0
+        self.bids: List[Tuple[float, str]] = []  # (-price, vt_orderid)
+        self.asks: List[Tuple[float, str]] = []
+
+    def _push(self, order: OrderData) -> None:
+        if order.direction == Direction.LONG:
+            heapq.heappush(self.bids, (-order.price, order.vt_orderid))
+        elif order.direction == Direction.SHORT:
+            heapq.heappush(self.asks, (order.price, order.vt_orderid))
+
+    def _rebuild(self, active: dict) -> None:
+        self.bids = [(-o.price, k) for k, o in active.items() if o.direction == Direction.LONG]
+        self.asks = [(o.price, k) for k, o in active.items() if o.direction == Direction.SHORT]
+        heapq.heapify(self.bids)
+        heapq.heapify(self.asks)
+
+    def prices(self) -> Tuple[float, float]:
+        """(best bid, best ask), -inf / inf when a side is empty."""
+        engine = self.engine
+        active = engine.active_limit_orders
+        count = engine.limit_order_count
+        if count - self.seen > len(active):
+            self._rebuild(active)
+        else:
+            prefix = engine.gateway_name + "."
+            for orderid in range(self.seen + 1, count + 1):
+                order = active.get(prefix + str(orderid))
+                if order is not None:
+                    self._push(order)
+        self.seen = count
+        if len(self.bids) + len(self.asks) > 2 * len(active) + 64:
+            self._rebuild(active)
+
+        bids, asks = self.bids, self.asks
+        while bids and bids[0][1] not in active:
+            heapq.heappop(bids)
+        while asks and asks[0][1] not in active:
+            heapq.heappop(asks)
+        return (-bids[0][0] if bids else -math.inf), (asks[0][0] if asks else math.inf)
+
+
+class QuietBarSkipper:
+    """Feeds bars to `engine`, fast-forwarding the ones that cannot touch an order."""
+
+    def __init__(self, engine: BacktestingEngine) -> None:
+        self.engine = engine
+        self.fed = 0
+        self.skipped = 0
+        self.tops = BookTops(engine)
+        # orders sent outside the replay (on_start, a restored checkpoint) may still be SUBMITTING
+        self._fresh_orders = True
+
+    def idle(self) -> bool:
+        engine = self.engine
+        check = getattr(engine.strategy, "can_skip_quiet_bars", None)
+        return (
+            not self._fresh_orders
+            and engine.mode == BacktestingMode.BAR
+            and not engine.active_stop_orders
+            and check is not None
+            and check()
+        )
+
+    def feed(self, bars: Sequence[BarData]) -> None:
+        engine = self.engine
+        index = None
+        i, n = 0, len(bars)
+        while i < n:
+            if self.idle():
+                if index is None:
+                    index = RangeIndex.from_bars(bars)
+                j = index.first_cross(i, *self.tops.prices())
+                if j > i:
+                    self.fast_forward(bars, i, j)
+                    i = j
+                    continue
+            count = engine.limit_order_count
+            engine.new_bar(bars[i])
+            self._fresh_orders = engine.limit_order_count != count
+            self.fed += 1
+            i += 1
+
+    def fast_forward(self, bars: Sequence[BarData], lo: int, hi: int) -> None:
+        """What `new_bar` does for bars[lo:hi] when none of them crosses: set the daily closes."""
+        engine = self.engine
+        while lo < hi:
+            dt = bars[lo].datetime
+            next_day = datetime.combine(dt.date() + timedelta(days=1), time(), tzinfo=dt.tzinfo)
+            end = bisect_left(bars, next_day, lo, hi, key=_DATETIME)
+            last = bars[end - 1]
+            engine.bar = last
+            engine.datetime = last.datetime
+            engine.update_daily_close(last.close_price)
+            self.skipped += end - lo
+            lo = end
+
+    def summary(self) -> str:
+        total = self.fed + self.skipped
+        share = self.skipped / total if total else 0.0
+        return f"[skip] bars={total} replayed={self.fed} fast-forwarded={self.skipped} ({share:.1%})"
@@ -0,0 +1,195 @@
+"""
+Process-parallel parameter sweeps over one shared bar series.
+
+The series is copied once into a `multiprocessing.shared_memory` block laid
+out as seven contiguous columns (int64 timestamps, float64 OHLCV and
+turnover). Pool workers attach to it by name in their initializer and wrap
+the columns in `BarArrays` views, so no worker holds a copy of the bars and
+bar memory stays the same whatever the worker count. Every variant is then an
+independent backtest:
+
+- `backend="engine"`: `BacktestingEngine` + `DynamicHedgedRebateGridStrategy`
+  replaying a `ColumnarHistory` over the shared columns (price-indexed
+  matching in the workers unless disabled; fills are identical);
+- `backend="sim"`: `GridSimulator` on the same columns (same trades and
+  statistics, see backtest.grid_sim).
+
+Workers only send back one row per variant (its setting, the statistics and
+the run time), collected into a single table.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import timezone
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from pandas import DataFrame
+from vnpy.trader.constant import Interval
+
+from ..data.import_h5_to_vnpy import BarArrays
+
+COLUMNS = ("ts_ns", "open", "high", "low", "close", "volume", "turnover")
+BACKENDS = ("engine", "sim")
+
+
+@dataclass(frozen=True)
+class SharedBarsSpec:
+    """What a worker needs to attach to a `SharedBars` block (picklable)."""
+    name: str
+    rows: int
+    tz: Any = timezone.utc
+
+
+class SharedBars:
+    """A bar series in shared memory, one contiguous block per column."""
+
+    def __init__(self, shm: SharedMemory, rows: int, tz=timezone.utc, owner: bool = False) -> None:
+        self.shm = shm
+        self.rows = rows
+        self.tz = tz
+        self.owner = owner
+        cols = []
+        for k, name in enumerate(COLUMNS):
+            dtype = np.int64 if name == "ts_ns" else np.float64
+            cols.append(np.ndarray((rows,), dtype=dtype, buffer=shm.buf, offset=k * rows * 8))
+        self.arrays = BarArrays(*cols)
+
+    @classmethod
+    def create(cls, arrays: BarArrays, tz=timezone.utc) -> "SharedBars":
+        rows = len(arrays)
+        shm = SharedMemory(create=True, size=max(len(COLUMNS) * rows * 8, 1))
+        self = cls(shm, rows, tz, owner=True)
+        for name in COLUMNS:
+            getattr(self.arrays, name)[:] = getattr(arrays, name)
+        return self
+
+    @classmethod
+    def attach(cls, spec: SharedBarsSpec) -> "SharedBars":
+        return cls(SharedMemory(name=spec.name), spec.rows, spec.tz)
+
+    @property
+    def spec(self) -> SharedBarsSpec:
+        return SharedBarsSpec(self.shm.name, self.rows, self.tz)
+
+    @property
+    def nbytes(self) -> int:
+        return len(COLUMNS) * self.rows * 8
+
+    def close(self) -> None:
+        self.arrays = None  # the views must go before the mapping
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> "SharedBars":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def expand_grid(grid: Union[Dict[str, Iterable], List[dict]], base: Optional[dict] = None) -> List[dict]:
+    """
+    Settings of a sweep: the cartesian product of a {parameter: values} grid,
+    or a list of settings as is; each one on top of `base`.
+    """
+    base = dict(base or {})
+    if isinstance(grid, dict):
+        names = list(grid)
+        combos = [dict(zip(names, values)) for values in itertools.product(*(list(grid[n]) for n in names))]
+    else:
+        combos = [dict(setting) for setting in grid]
+    return [{**base, **combo} for combo in combos]
+
+
+# ——— worker side ———
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(spec: SharedBarsSpec, options: Dict[str, Any]) -> None:
+    _worker["bars"] = SharedBars.attach(spec)
+    _worker["options"] = options
+    if options["backend"] == "engine" and options["indexed_matching"]:
+        from .matching import apply_matching_patch
+
+        apply_matching_patch()
+
+
+def _run_variant(index: int, setting: dict) -> Dict[str, Any]:
+    from .grid_sim import GridSimulator, run_reference
+
+    bars: SharedBars = _worker["bars"]
+    options = _worker["options"]
+    row: Dict[str, Any] = {"variant": index, **setting}
+    started = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        simulator = GridSimulator(setting, **options["engine_params"])
+        if options["backend"] == "sim":
+            statistics = simulator.run(bars.arrays, bars.tz).statistics
+        else:
+            engine = run_reference(simulator, bars.arrays, bars.tz, options["vt_symbol"], options["interval"])
+            statistics = engine.calculate_statistics(output=False)
+        row.update(statistics)
+        row["error"] = None
+    except Exception:
+        row["error"] = traceback.format_exc(limit=3)
+    row["seconds"] = time.perf_counter() - started
+    row["cpu_seconds"] = time.process_time() - cpu
+    row["pid"] = os.getpid()
+    return row
+
+
+# ——— parent side ———
+def run_sweep(
+    arrays: BarArrays,
+    settings: List[dict],
+    tz=timezone.utc,
+    workers: Optional[int] = None,
+    backend: str = "engine",
+    vt_symbol: str = "ETHUSDT.GLOBAL",
+    interval: Interval = Interval.MINUTE,
+    indexed_matching: bool = True,
+    log=print,
+    **engine_params,
+) -> DataFrame:
+    """
+    Backtest every setting in `settings` on `arrays` across `workers` processes
+    (default: all cores); returns one row per setting, in input order.
+    `engine_params` are `GridSimulator` / `set_parameters` values (rate, slippage, size...).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown sweep backend: {backend} (choose from {', '.join(BACKENDS)})")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(settings) or 1))
+    options = {
+        "backend": backend,
+        "vt_symbol": vt_symbol,
+        "interval": interval,
+        "indexed_matching": indexed_matching,
+        "engine_params": engine_params,
+    }
+
+    rows: List[Dict[str, Any]] = []
+    t0 = time.perf_counter()
+    with SharedBars.create(arrays, tz) as shared:
+        log(f"[sweep] {len(settings)} variants x {shared.rows} bars ({shared.nbytes / 2**20:.1f} MB shared), "
+            f"{workers} workers, backend={backend}")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.spec, options)) as pool:
+            futures = [pool.submit(_run_variant, i, setting) for i, setting in enumerate(settings)]
+            for done, fut in enumerate(as_completed(futures), 1):
+                row = fut.result()
+                rows.append(row)
+                status = "failed" if row["error"] else f"net pnl {row.get('total_net_pnl', 0):,.2f}"
+                log(f"[sweep] {done}/{len(settings)} variant {row['variant']}: {status} in {row['seconds']:.1f}s")
+
+    elapsed = time.perf_counter() - t0
+    busy = sum(r["cpu_seconds"] for r in rows)
+    log(f"[sweep] done in {elapsed:.1f}s, {busy:.1f} CPU s of backtests ({busy / max(elapsed, 1e-9):.1f} cores busy)")
+    return DataFrame(rows).sort_values("variant").reset_index(drop=True)
@@ -0,0 +1,407 @@
+"""
+Memory-mapped binary bar cache.
+
+A (symbol, exchange, interval) series is compiled once into a flat file of
+fixed-width records (`BAR_DTYPE`: int64 UTC epoch ns + float64 OHLCV/turnover)
+behind a 4 KiB JSON header. Backtests open it with `np.memmap`, so repeat runs
+share the OS page cache and skip SQLite / HDF5 decoding entirely; slicing a
+time range is a binary search on the memory-mapped timestamps.
+
+The header stores a fingerprint of the source: size and mtime of the H5 file,
+count / time range / newest rowid of the series in the vn.py SQLite database,
+or the bar overview for other databases. When the fingerprint no longer
+matches, the cache is rebuilt automatically on the next open.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas import HDFStore
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ, get_database
+from vnpy.trader.object import BarData
+from vnpy.trader.setting import SETTINGS
+from vnpy.trader.utility import get_file_path
+
+from .import_h5_to_vnpy import BarArrays, build_bars_from_arrays, frame_to_arrays, infer_columns, iter_h5_chunks
+from .sqlite_bulk import default_sqlite_path
+from .watermark import localize_db_times, series_key
+
+CACHE_DIR = "vnpy_grid_cache"
+MAGIC = b"VNGRIDBARS1\n"
+HEADER_SIZE = 4096
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("turnover", "<f8"),
+])
+
+Source = Union[str, Path, None]  # None -> the vn.py database
+
+
+def _stat(path: Path) -> Optional[List[int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _db_overview(symbol: str, exchange: Exchange, interval: Interval) -> Optional[list]:
+    for ov in get_database().get_bar_overview():
+        if ov.symbol == symbol and ov.exchange == exchange and ov.interval == interval:
+            return [ov.count, str(ov.start), str(ov.end)]
+    return None
+
+
+def source_fingerprint(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    source: Source = None,
+    key: Optional[str] = None,
+) -> dict:
+    if source is not None:
+        path = Path(source).resolve()
+        return {"kind": "h5", "path": str(path), "key": key, "stat": _stat(path)}
+    fp: dict = {"kind": "db", "database": SETTINGS["database.name"]}
+    if SETTINGS["database.name"] == "sqlite":
+        fp["series"] = _sqlite_series_state(symbol, exchange, interval)
+    else:
+        fp["overview"] = _db_overview(symbol, exchange, interval)
+    return fp
+
+
+def _sqlite_series_state(symbol: str, exchange: Exchange, interval: Interval) -> Optional[list]:
+    """
+    Count, time range and newest rowid of the series (one covering-index scan).
+
+    File size/mtime is useless for SQLite in WAL mode: every connection touches
+    the -wal file and checkpoints rewrite the main file. Any insert, including
+    INSERT OR REPLACE of an existing bar, allocates a new rowid instead.
+    """
+    path = default_sqlite_path()
+    if not path.exists():
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute(
+            'SELECT COUNT(*), MIN("datetime"), MAX("datetime"), MAX("id") FROM "dbbardata" '
+            'WHERE "symbol"=? AND "exchange"=? AND "interval"=?',
+            (symbol, exchange.value, interval.value),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None  # no bar table yet
+    finally:
+        conn.close()
+    return list(row)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+
+def cache_path(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    source: Source = None,
+    key: Optional[str] = None,
+    root: Optional[Path] = None,
+    fingerprint: Optional[dict] = None,
+) -> Path:
+    """
+    `<series>.<origin>.<version>.bars`: one file per source version, so a stale
+    cache that another process still has mapped (Windows locks it) is never
+    overwritten in place.
+    """
+    origin = _digest("db" if source is None else f"{Path(source).resolve()}|{key or ''}")
+    if fingerprint is None:
+        fingerprint = source_fingerprint(symbol, exchange, interval, source, key)
+    version = _digest(json.dumps(fingerprint, sort_keys=True))
+    return (root or get_file_path(CACHE_DIR)) / f"{series_key(symbol, exchange, interval)}.{origin}.{version}.bars"
+
+
+def _remove_stale(path: Path) -> None:
+    prefix = path.name.rsplit(".", 2)[0]
+    for old in path.parent.glob(f"{prefix}.*.bars"):
+        if old != path:
+            try:
+                old.unlink()
+            except OSError:
+                pass  # still mapped elsewhere; removed by a later open
+
+
+def read_header(path: Path) -> Optional[dict]:
+    try:
+        with path.open("rb") as f:
+            raw = f.read(HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if not raw.startswith(MAGIC):
+        return None
+    return json.loads(raw[len(MAGIC):].rstrip(b"\0 ").decode("utf-8"))
+
+
+def _pack_header(header: dict) -> bytes:
+    raw = MAGIC + json.dumps(header).encode("utf-8")
+    if len(raw) > HEADER_SIZE:
+        raise ValueError("bar cache header too large")
+    return raw.ljust(HEADER_SIZE, b"\0")
+
+
+def _records(arrays: BarArrays) -> np.ndarray:
+    rec = np.empty(len(arrays), dtype=BAR_DTYPE)
+    rec["ts"] = arrays.ts_ns
+    for name in ("open", "high", "low", "close", "volume", "turnover"):
+        rec[name] = getattr(arrays, name)
+    return rec
+
+
+# ——— sources ———
+def _iter_sqlite(symbol: str, exchange: Exchange, interval: Interval, batch: int = 500_000) -> Iterator[BarArrays]:
+    """Read the series straight from the vn.py SQLite file, ordered by time."""
+    conn = sqlite3.connect(f"file:{default_sqlite_path()}?mode=ro", uri=True)
+    try:
+        cur = conn.execute(
+            'SELECT "datetime", "open_price", "high_price", "low_price", "close_price", "volume", "turnover" '
+            'FROM "dbbardata" WHERE "symbol"=? AND "exchange"=? AND "interval"=? ORDER BY "datetime"',
+            (symbol, exchange.value, interval.value),
+        )
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            cols = list(zip(*rows))
+            ts = localize_db_times(pd.to_datetime(pd.Index(cols[0]), format="ISO8601"))
+            yield BarArrays(ts.as_unit("ns").asi8, *(np.asarray(c, dtype="float64") for c in cols[1:]))
+    finally:
+        conn.close()
+
+
+def _iter_database(symbol: str, exchange: Exchange, interval: Interval, days: int = 30) -> Iterator[BarArrays]:
+    """Any BaseDatabase: load in 30-day windows over the overview range."""
+    db = get_database()
+    if hasattr(db, "iter_bar_arrays"):  # ParquetDatabase: month partitions, no BarData
+        yield from db.iter_bar_arrays(symbol, exchange, interval)
+        return
+    ov = next(
+        (o for o in db.get_bar_overview()
+         if o.symbol == symbol and o.exchange == exchange and o.interval == interval),
+        None,
+    )
+    if ov is None or not ov.start:
+        return
+    start, end = ov.start, ov.end
+    step = pd.Timedelta(days=days).to_pytimedelta()
+    while start <= end:
+        stop = min(start + step, end)
+        bars = db.load_bar_data(symbol, exchange, interval, start, stop)
+        if bars:
+            ts = pd.DatetimeIndex([b.datetime for b in bars]).tz_convert("UTC").as_unit("ns").asi8
+            yield BarArrays(
+                ts,
+                np.array([b.open_price for b in bars]),
+                np.array([b.high_price for b in bars]),
+                np.array([b.low_price for b in bars]),
+                np.array([b.close_price for b in bars]),
+                np.array([b.volume for b in bars]),
+                np.array([b.turnover for b in bars]),
+            )
+        start = stop + pd.Timedelta(microseconds=1).to_pytimedelta()
+
+
+def _iter_h5(path: Path, key: Optional[str], chunk_rows: int = 500_000) -> Iterator[BarArrays]:
+    with HDFStore(path, mode="r") as store:
+        use_key = key or store.keys()[0]
+        cmap = None
+        for df in iter_h5_chunks(store, use_key, chunk_rows):
+            cmap = cmap or infer_columns(df)
+            yield frame_to_arrays(df, cmap)
+
+
+# ——— build / open ———
+def build_cache(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    source: Source = None,
+    key: Optional[str] = None,
+    path: Optional[Path] = None,
+) -> Path:
+    """Compile the series into `path` (atomic replace); returns the cache path."""
+    fingerprint = source_fingerprint(symbol, exchange, interval, source, key)
+    path = path or cache_path(symbol, exchange, interval, source, key, fingerprint=fingerprint)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if source is not None:
+        chunks = _iter_h5(Path(source), key)
+    elif SETTINGS["database.name"] == "sqlite":
+        chunks = _iter_sqlite(symbol, exchange, interval)
+    else:
+        chunks = _iter_database(symbol, exchange, interval)
+
+    t0 = time.perf_counter()
+    tmp = path.with_suffix(".tmp")
+    rows = 0
+    sorted_ = True
+    last = None
+    with tmp.open("wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+        for arrays in chunks:
+            if not len(arrays):
+                continue
+            rec = _records(arrays)
+            if (last is not None and rec["ts"][0] < last) or np.any(np.diff(rec["ts"]) < 0):
+                sorted_ = False
+            last = int(rec["ts"][-1])
+            f.write(rec.tobytes())
+            rows += len(rec)
+
+    if rows and not sorted_:
+        data = np.memmap(tmp, dtype=BAR_DTYPE, mode="r+", offset=HEADER_SIZE, shape=(rows,))
+        data.sort(order="ts", kind="stable")
+        data.flush()
+        del data
+
+    header = {
+        "version": 1,
+        "series": series_key(symbol, exchange, interval),
+        "rows": rows,
+        "dtype": BAR_DTYPE.descr,
+        "fingerprint": fingerprint,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with tmp.open("r+b") as f:
+        f.write(_pack_header(header))
+    os.replace(tmp, path)
+    print(f"[bar-cache] built {path.name}: {rows} rows in {time.perf_counter() - t0:.1f}s")
+    return path
+
+
+class BarCache:
+    """Read-only memory-mapped view of a compiled series."""
+
+    def __init__(self, path: Path, header: dict, exchange: Exchange, interval: Interval, tz=DB_TZ) -> None:
+        self.path = path
+        self.header = header
+        self.symbol = header["series"].rsplit(".", 2)[0]
+        self.exchange = exchange
+        self.interval = interval
+        self.tz = tz
+        rows = int(header["rows"])
+        self.data = (
+            np.memmap(path, dtype=BAR_DTYPE, mode="r", offset=HEADER_SIZE, shape=(rows,))
+            if rows else np.empty(0, dtype=BAR_DTYPE)
+        )
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def ts_ns(self) -> np.ndarray:
+        return self.data["ts"]
+
+    def _to_ns(self, dt: Optional[datetime]) -> Optional[int]:
+        if dt is None:
+            return None
+        ts = pd.Timestamp(dt)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize(self.tz)  # naive means database time, as in vn.py
+        return ts.tz_convert("UTC").value
+
+    def locate(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[int, int]:
+        """Row range [lo, hi) with start <= time <= end."""
+        ts = self.ts_ns
+        s, e = self._to_ns(start), self._to_ns(end)
+        lo = int(np.searchsorted(ts, s, side="left")) if s is not None else 0
+        hi = int(np.searchsorted(ts, e, side="right")) if e is not None else len(ts)
+        return lo, max(lo, hi)
+
+    def arrays(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> BarArrays:
+        """Zero-copy column views of a time range."""
+        lo, hi = self.locate(start, end)
+        rec = self.data[lo:hi]
+        return BarArrays(*(rec[name] for name in BAR_DTYPE.names))
+
+    def load_bars(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[BarData]:
+        return build_bars_from_arrays(
+            self.arrays(start, end), self.symbol, self.exchange, self.interval, gateway_name="DB", tz=self.tz
+        )
+
+    def iter_chunks(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        rows: int = 100_000,
+    ) -> Iterator[List[BarData]]:
+        lo, hi = self.locate(start, end)
+        for i in range(lo, hi, rows):
+            rec = self.data[i:min(i + rows, hi)]
+            arrays = BarArrays(*(rec[name] for name in BAR_DTYPE.names))
+            yield build_bars_from_arrays(arrays, self.symbol, self.exchange, self.interval, gateway_name="DB", tz=self.tz)
+
+
+def open_bar_cache(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    source: Source = None,
+    key: Optional[str] = None,
+    rebuild: bool = False,
+    root: Optional[Path] = None,
+) -> BarCache:
+    """
+    Open the cache of a series, (re)building it first when missing or stale.
+
+    `source` is an H5 path, or None for the configured vn.py database.
+    """
+    fresh = source_fingerprint(symbol, exchange, interval, source, key)
+    path = cache_path(symbol, exchange, interval, source, key, root, fingerprint=fresh)
+    header = read_header(path)
+    if rebuild or header is None or header.get("fingerprint") != fresh:
+        build_cache(symbol, exchange, interval, source, key, path)
+        header = read_header(path)
+        _remove_stale(path)
+    tz = DB_TZ if source is None else timezone.utc
+    return BarCache(path, header, exchange, interval, tz=tz)
+
+
+def load_engine_history(
+    engine,
+    source: Source = None,
+    key: Optional[str] = None,
+    columnar: bool = False,
+    flyweight: bool = True,
+) -> BarCache:
+    """
+    Cached replacement for `BacktestingEngine.load_data()` in bar mode.
+
+    columnar: install a `ColumnarHistory` over the memory-mapped columns
+    instead of a list of `BarData` (see data.history for the feed modes).
+    """
+    cache = open_bar_cache(engine.symbol, engine.exchange, engine.interval, source, key)
+    if columnar:
+        from .history import ColumnarHistory
+
+        engine.history_data = ColumnarHistory.from_cache(cache, engine.start, engine.end, flyweight=flyweight)
+    else:
+        engine.history_data.clear()
+        engine.history_data.extend(cache.load_bars(engine.start, engine.end))
+    engine.output(f"loaded {len(engine.history_data)} bars from {cache.path.name}")
+    return cache
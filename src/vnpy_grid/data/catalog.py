@@ -0,0 +1,345 @@
+"""
+Persistent catalog of bar datasets: what is in a file or database series
+without opening it.
+
+One entry per H5 key or database series records the column map, dtypes,
+row count, first/last timestamp, a chunk map (row slice -> time range) and a
+fingerprint of the source. Entries whose fingerprint no longer matches the
+source are ignored, so a rewritten file is simply rescanned.
+
+- importers and the converter take the column map from the catalog instead of
+  re-guessing it per chunk; the importers record a file only when asked
+  (`--catalog`), the converter records the tables it writes;
+- runners get the date range and plan row slices from the chunk map, also for
+  fixed frames whose time column cannot be binary-searched on disk;
+- `python -m vnpy_grid.tools.catalog` scans files and lists coverage.
+
+Stored as JSON next to the vn.py database (`vnpy_grid_catalog.json`); all
+timestamps are UTC epoch nanoseconds. Saving merges this process's changes
+into the file as it is on disk, so concurrent writers keep each other's
+entries.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import HDFStore
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import get_database
+from vnpy.trader.setting import SETTINGS
+from vnpy.trader.utility import get_file_path
+
+from .bar_cache import source_fingerprint
+from .import_h5_to_vnpy import (
+    CLOSE_CANDS,
+    HIGH_CANDS,
+    LOW_CANDS,
+    OPEN_CANDS,
+    TIME_CANDIDATES,
+    TURNOVER_CANDS,
+    VOL_CANDS,
+    ColumnMap,
+    infer_column,
+    iter_h5_chunks,
+    parse_dt_col,
+)
+from .watermark import db_time_to_ns, ns_to_datetime, series_key
+
+CATALOG_NAME = "vnpy_grid_catalog.json"
+INDEX_TIME = "index"  # the time lives in a DatetimeIndex (table files written by convert_h5_to_table)
+_SAMPLE_BYTES = 64 * 1024
+
+
+def file_fingerprint(path: Path | str) -> List:
+    """Size, mtime and a hash of the first and last 64 KiB: cheap, and survives mtime-preserving copies."""
+    path = Path(path)
+    st = path.stat()
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        h.update(f.read(_SAMPLE_BYTES))
+        if st.st_size > _SAMPLE_BYTES:
+            f.seek(max(st.st_size - _SAMPLE_BYTES, _SAMPLE_BYTES))
+            h.update(f.read(_SAMPLE_BYTES))
+    return [st.st_size, st.st_mtime_ns, h.hexdigest()]
+
+
+def detect_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """Column map of a frame; unlike `infer_columns` it never raises and knows about time indexes."""
+    time_col = infer_column(df, TIME_CANDIDATES)
+    if time_col is None and isinstance(df.index, pd.DatetimeIndex):
+        time_col = INDEX_TIME
+    return {
+        "time": time_col,
+        "open": infer_column(df, OPEN_CANDS),
+        "high": infer_column(df, HIGH_CANDS),
+        "low": infer_column(df, LOW_CANDS),
+        "close": infer_column(df, CLOSE_CANDS),
+        "volume": infer_column(df, VOL_CANDS),
+        "turnover": infer_column(df, TURNOVER_CANDS),
+    }
+
+
+def frame_times_ns(df: pd.DataFrame, time_col: Optional[str]) -> np.ndarray:
+    """UTC epoch ns of every row (NaT rows dropped)."""
+    if time_col == INDEX_TIME or time_col is None:
+        idx = pd.DatetimeIndex(pd.to_datetime(df.index, errors="coerce", utc=True))
+    else:
+        idx = pd.DatetimeIndex(parse_dt_col(df[time_col]))
+    idx = idx[~idx.isna()]
+    return idx.as_unit("ns").asi8
+
+
+class ChunkMapBuilder:
+    """Collects `[start_row, stop_row, first_ns, last_ns]` while a source is read front to back."""
+
+    def __init__(self) -> None:
+        self.chunks: List[List[int]] = []
+        self.rows = 0
+        self.sorted = True
+        self._last: Optional[int] = None
+
+    def push(self, rows: int, ts_ns: np.ndarray) -> None:
+        start = self.rows
+        self.rows += rows
+        if not len(ts_ns):
+            return
+        lo, hi = int(ts_ns.min()), int(ts_ns.max())
+        if (self._last is not None and lo < self._last) or (len(ts_ns) > 1 and np.any(np.diff(ts_ns) < 0)):
+            self.sorted = False
+        self._last = hi if self._last is None else max(self._last, hi)
+        self.chunks.append([start, self.rows, lo, hi])
+
+
+@dataclass
+class DatasetEntry:
+    source: str                 # resolved file path, or "db:<database.name>"
+    key: str                    # H5 key, or series key "<symbol>.<exchange>.<interval>"
+    storage: str                # fixed / table / sqlite / parquet / ...
+    fingerprint: list
+    rows: int = 0
+    first_ns: Optional[int] = None
+    last_ns: Optional[int] = None
+    sorted: bool = True
+    columns: Dict[str, Optional[str]] = field(default_factory=dict)
+    dtypes: Dict[str, str] = field(default_factory=dict)
+    chunks: List[List[int]] = field(default_factory=list)
+    updated: str = ""
+
+    @property
+    def id(self) -> str:
+        return f"{self.source}::{self.key}"
+
+    @property
+    def time_column(self) -> Optional[str]:
+        return self.columns.get("time")
+
+    def column_map(self) -> Optional[ColumnMap]:
+        """The `ColumnMap` for `frame_to_arrays`, or None when the time is an index or a price is missing."""
+        c = self.columns
+        if c.get("time") in (None, INDEX_TIME) or not all(c.get(k) for k in ("open", "high", "low", "close")):
+            return None
+        return ColumnMap(
+            time=c["time"], open=c["open"], high=c["high"], low=c["low"], close=c["close"],
+            volume=c.get("volume"), turnover=c.get("turnover"),
+        )
+
+    def apply_builder(self, builder: ChunkMapBuilder) -> None:
+        self.rows = builder.rows
+        self.sorted = builder.sorted
+        self.chunks = builder.chunks
+        if builder.chunks:
+            self.first_ns = min(c[2] for c in builder.chunks)
+            self.last_ns = max(c[3] for c in builder.chunks)
+
+    def row_range(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """
+        Coarse `[start_row, stop_row)` whose chunks overlap `[start_ns, end_ns]`;
+        callers still filter rows exactly. None when the source is not sorted.
+        """
+        if not self.sorted or not self.chunks:
+            return None
+        hits = [
+            c for c in self.chunks
+            if (start_ns is None or c[3] >= start_ns) and (end_ns is None or c[2] <= end_ns)
+        ]
+        if not hits:
+            return 0, 0
+        return hits[0][0], hits[-1][1]
+
+    def coverage(self) -> str:
+        def fmt(ns: Optional[int]) -> str:
+            return ns_to_datetime(ns).strftime("%Y-%m-%d %H:%M") if ns is not None else "-"
+
+        order = "" if self.sorted else " (unsorted)"
+        return f"{self.rows} rows {fmt(self.first_ns)} -> {fmt(self.last_ns)}, {len(self.chunks)} chunks{order}"
+
+
+class DatasetCatalog:
+    """
+    JSON file of `DatasetEntry` objects, rewritten atomically like the import
+    manifest. `save()` rereads the file and applies only the entries put or
+    removed through this instance, so entries another process saved meanwhile
+    are kept.
+    """
+
+    def __init__(self, path: Optional[Path | str] = None) -> None:
+        self.path = Path(path) if path else get_file_path(CATALOG_NAME)
+        self.entries: Dict[str, DatasetEntry] = self._read()
+        self._changes: Dict[str, Optional[DatasetEntry]] = {}  # id -> new entry, None: removed
+
+    def _read(self) -> Dict[str, DatasetEntry]:
+        if not self.path.exists():
+            return {}
+        entries = (DatasetEntry(**data) for data in json.loads(self.path.read_text(encoding="utf-8")).values())
+        return {entry.id: entry for entry in entries}
+
+    def get(self, source: str, key: str, fingerprint: Optional[list] = None) -> Optional[DatasetEntry]:
+        """The entry for `source::key` if it still matches `fingerprint` (when given)."""
+        entry = self.entries.get(f"{source}::{key}")
+        if entry is None or (fingerprint is not None and entry.fingerprint != list(fingerprint)):
+            return None
+        return entry
+
+    def put(self, entry: DatasetEntry) -> None:
+        entry.updated = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.entries[entry.id] = self._changes[entry.id] = entry
+        self.save()
+
+    def remove(self, source: str, key: str) -> None:
+        entry_id = f"{source}::{key}"
+        if self.entries.pop(entry_id, None) is not None:
+            self._changes[entry_id] = None
+            self.save()
+
+    def save(self) -> None:
+        """Merge this instance's changes into the catalog on disk and write it back."""
+        entries = self._read()
+        for entry_id, entry in self._changes.items():
+            if entry is None:
+                entries.pop(entry_id, None)
+            else:
+                entries[entry_id] = entry
+        self.entries = entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f"{self.path.suffix}.{os.getpid()}.tmp")
+        data = {k: asdict(v) for k, v in sorted(self.entries.items())}
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+# ——— H5 files ———
+def h5_source(path: Path | str) -> str:
+    return str(Path(path).resolve())
+
+
+def lookup_h5(path: Path | str, key: str, catalog: Optional[DatasetCatalog] = None) -> Optional[DatasetEntry]:
+    """Catalog entry of an unchanged file, or None; never reads the data."""
+    catalog = catalog or DatasetCatalog()
+    return catalog.get(h5_source(path), key, file_fingerprint(path))
+
+
+def new_h5_entry(path: Path | str, key: str, store: HDFStore, sample: pd.DataFrame) -> DatasetEntry:
+    storer = store.get_storer(key)
+    return DatasetEntry(
+        source=h5_source(path),
+        key=key,
+        storage="table" if getattr(storer, "is_table", False) else "fixed",
+        fingerprint=file_fingerprint(path),
+        columns=detect_columns(sample),
+        dtypes={str(c): str(t) for c, t in sample.dtypes.items()},
+    )
+
+
+def scan_h5(path: Path | str, key: Optional[str] = None, chunk_rows: int = 500_000) -> DatasetEntry:
+    """One pass over the key: row count, time range and chunk map."""
+    with HDFStore(path, mode="r") as store:
+        use_key = key or store.keys()[0]
+        builder = ChunkMapBuilder()
+        entry = None
+        for df in iter_h5_chunks(store, use_key, chunk_rows):
+            if entry is None:
+                entry = new_h5_entry(path, use_key, store, df)
+            builder.push(len(df), frame_times_ns(df, entry.time_column))
+        if entry is None:
+            entry = new_h5_entry(path, use_key, store, store.select(use_key, start=0, stop=0))
+    entry.apply_builder(builder)
+    return entry
+
+
+def describe_h5(
+    path: Path | str,
+    key: Optional[str] = None,
+    catalog: Optional[DatasetCatalog] = None,
+    refresh: bool = False,
+    chunk_rows: int = 500_000,
+) -> DatasetEntry:
+    """Catalog entry of an H5 key, scanning (and recording) it only when missing or stale."""
+    catalog = catalog or DatasetCatalog()
+    if key is None:
+        with HDFStore(path, mode="r") as store:
+            key = store.keys()[0]
+    entry = None if refresh else lookup_h5(path, key, catalog)
+    if entry is None:
+        entry = scan_h5(path, key, chunk_rows)
+        catalog.put(entry)
+    return entry
+
+
+# ——— vn.py database series ———
+def db_source() -> str:
+    return f"db:{SETTINGS['database.name']}"
+
+
+def describe_series(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    catalog: Optional[DatasetCatalog] = None,
+    refresh: bool = False,
+) -> Optional[DatasetEntry]:
+    """
+    Catalog entry of a database series from the bar overview (and, for the
+    Parquet store, the partition footers); None when the series does not exist.
+    """
+    catalog = catalog or DatasetCatalog()
+    key = series_key(symbol, exchange, interval)
+    fp = source_fingerprint(symbol, exchange, interval)
+    fingerprint = [fp.get("series", fp.get("overview"))]
+    entry = None if refresh else catalog.get(db_source(), key, fingerprint)
+    if entry is not None:
+        return entry
+
+    db = get_database()
+    ov = next(
+        (o for o in db.get_bar_overview()
+         if o.symbol == symbol and o.exchange == exchange and o.interval == interval),
+        None,
+    )
+    if ov is None or not ov.count:
+        catalog.remove(db_source(), key)
+        return None
+
+    entry = DatasetEntry(
+        source=db_source(),
+        key=key,
+        storage=SETTINGS["database.name"],
+        fingerprint=fingerprint,
+        rows=int(ov.count),
+        first_ns=db_time_to_ns(ov.start),
+        last_ns=db_time_to_ns(ov.end),
+        columns={"time": "datetime", "open": "open_price", "high": "high_price", "low": "low_price",
+                 "close": "close_price", "volume": "volume", "turnover": "turnover"},
+    )
+    if hasattr(db, "partition_stats"):
+        entry.chunks = db.partition_stats(symbol, exchange, interval)
+    catalog.put(entry)
+    return entry
@@ -0,0 +1,205 @@
+"""
+Budget-driven chunk sizing for streaming backtests.
+
+A fixed `chunk_days` means ~20k objects per chunk for 15 days of 1m bars and
+millions for busy tick data. `AdaptiveWindows` takes a row budget per chunk
+(or a peak memory budget for the whole run) and turns it into time windows:
+
+- the initial size comes from the row density of the series (catalog / bar
+  overview count over its time range, tick overview for ticks);
+- every loaded chunk reports its row count, so quiet and busy periods
+  resize the next window;
+- with a memory budget, the process RSS is sampled before each window;
+  chunks shrink at once when it is over budget and grow gradually while
+  there is headroom.
+
+Peak memory of a prefetched stream is roughly
+`baseline + (depth + 2) * chunk_rows * bytes_per_row`, which is what the
+memory budget is divided by.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from vnpy.trader.constant import Exchange, Interval
+
+from .prefetch import Window, time_windows, window_end
+
+DAY_S = 86400.0
+
+# measured with tracemalloc: one BarData ~450 B, one TickData with 5 depth levels ~1.9 KB
+BYTES_PER_ROW = {Interval.TICK: 2_000}
+DEFAULT_BYTES_PER_ROW = 450
+
+# rows per day when a series has no overview yet (ticks: one per second)
+DEFAULT_ROWS_PER_DAY = {
+    Interval.MINUTE: 1440.0,
+    Interval.HOUR: 24.0,
+    Interval.DAILY: 1.0,
+    Interval.WEEKLY: 1 / 7,
+    Interval.TICK: 86400.0,
+}
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None when it cannot be measured."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return int(psutil.Process().memory_info().rss)
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _span_days(start: Optional[datetime], end: Optional[datetime]) -> float:
+    if not start or not end:
+        return 0.0
+    return max((end - start).total_seconds() / DAY_S, 0.0)
+
+
+def series_rows_per_day(symbol: str, exchange: Exchange, interval: Interval) -> float:
+    """Average density of a stored series, from overviews only (no bar data is read)."""
+    if interval is Interval.TICK:
+        from vnpy.trader.database import get_database
+
+        for ov in get_database().get_tick_overview():
+            if ov.symbol == symbol and ov.exchange == exchange:
+                days = _span_days(ov.start, ov.end)
+                if ov.count and days:
+                    return ov.count / days
+        return DEFAULT_ROWS_PER_DAY[Interval.TICK]
+
+    from .catalog import describe_series
+
+    entry = describe_series(symbol, exchange, interval)
+    if entry is not None and entry.rows and entry.first_ns is not None and entry.last_ns > entry.first_ns:
+        return entry.rows / ((entry.last_ns - entry.first_ns) / 1e9 / DAY_S)
+    return DEFAULT_ROWS_PER_DAY.get(interval, 1440.0)
+
+
+def rows_per_day(series: Sequence[Tuple[str, Exchange, Interval]]) -> float:
+    """Combined density of the series replayed together (multi-symbol runs load all of them per window)."""
+    return sum(series_rows_per_day(*s) for s in series) or 1.0
+
+
+@dataclass
+class ChunkBudget:
+    rows: Optional[int] = None           # rows per chunk
+    memory_mb: Optional[float] = None    # peak RSS target for the whole run
+    min_days: float = 1 / 24             # never below one hour...
+    max_days: float = 90.0               # ...or above a quarter
+    bytes_per_row: int = DEFAULT_BYTES_PER_ROW
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rows or self.memory_mb)
+
+
+@dataclass
+class WindowRecord:
+    start: datetime
+    end: datetime
+    rows: int
+    rss_mb: Optional[float] = None
+
+
+@dataclass
+class AdaptiveWindows:
+    """Iterable of windows sized to a `ChunkBudget`; `record()` feeds back the rows each window held."""
+
+    start: datetime
+    end: datetime
+    budget: ChunkBudget
+    rows_per_day: float
+    depth: int = 2
+    step: timedelta = timedelta(minutes=1)
+    history: List[WindowRecord] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.baseline = current_rss()
+        self.target_rows = float(self.budget.rows or 0) or self._rows_for_memory()
+
+    def _rows_for_memory(self) -> float:
+        if not self.budget.memory_mb:
+            return self.rows_per_day * 15  # the old fixed 15 days
+        free = self.budget.memory_mb * 2**20 - (self.baseline or 0)
+        # the queued, loading and replayed chunks are all alive at the peak
+        return max(free, 0) / ((self.depth + 2) * self.budget.bytes_per_row)
+
+    @property
+    def chunk_days(self) -> float:
+        days = self.target_rows / max(self.rows_per_day, 1e-9)
+        return min(max(days, self.budget.min_days), self.budget.max_days)
+
+    def record(self, start: datetime, end: datetime, rows: int) -> None:
+        """Observed density of a loaded window: busy periods shrink the next ones at once, quiet ones grow slowly."""
+        days = _span_days(start, end)
+        if days > 0:
+            observed = rows / days
+            if observed > self.rows_per_day:
+                self.rows_per_day = observed
+            else:
+                self.rows_per_day = 0.5 * self.rows_per_day + 0.5 * max(observed, 1e-9)
+        self.history.append(WindowRecord(start, end, rows))
+
+    def _check_memory(self) -> None:
+        if not self.budget.memory_mb:
+            return
+        rss = current_rss()
+        if rss is None:
+            return
+        if self.history:
+            self.history[-1].rss_mb = rss / 2**20
+        # over budget: shrink in proportion at once; headroom: grow by at most 25% per window
+        ratio = self.budget.memory_mb * 2**20 / rss
+        if ratio < 1:
+            self.target_rows *= 0.8 * ratio
+        elif ratio > 1.1:
+            self.target_rows *= min(ratio, 1.25)
+        floor = self.rows_per_day * self.budget.min_days
+        self.target_rows = max(self.target_rows, floor)
+
+    def __iter__(self) -> Iterator[Window]:
+        cur = self.start
+        while cur <= self.end:
+            self._check_memory()
+            chunk_end = window_end(cur, self.end, self.chunk_days, self.step)
+            yield cur, chunk_end
+            cur = chunk_end + self.step
+
+    def summary(self) -> str:
+        if not self.history:
+            return "[chunks] none"
+        rows = [r.rows for r in self.history]
+        days = [_span_days(r.start, r.end) for r in self.history]
+        rss = [r.rss_mb for r in self.history if r.rss_mb is not None]
+        peak = f", peak rss {max(rss):.0f} MB" if rss else ""
+        return (
+            f"[chunks] {len(rows)} windows of {min(days):.2f}-{max(days):.2f} days, "
+            f"rows/chunk max {max(rows)} avg {sum(rows) / len(rows):.0f}{peak}"
+        )
+
+
+def stream_windows(
+    start: datetime,
+    end: datetime,
+    series: Sequence[Tuple[str, Exchange, Interval]],
+    chunk_days: float = 15,
+    budget: Optional[ChunkBudget] = None,
+    depth: int = 2,
+    step: timedelta = timedelta(minutes=1),
+):
+    """Fixed `chunk_days` windows, or `AdaptiveWindows` when a budget is given."""
+    if budget is None or not budget.enabled:
+        return time_windows(start, end, chunk_days, step)
+    if any(s[2] is Interval.TICK for s in series) and budget.bytes_per_row == DEFAULT_BYTES_PER_ROW:
+        budget = replace(budget, bytes_per_row=BYTES_PER_ROW[Interval.TICK])
+    return AdaptiveWindows(start, end, budget, rows_per_day(series), depth=depth, step=step)
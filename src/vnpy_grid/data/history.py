@@ -0,0 +1,164 @@
+"""
+Columnar replacement for `BacktestingEngine.history_data`.
+
+`ColumnarHistory` keeps a bar series as contiguous NumPy columns (zero-copy
+views of the memory-mapped bar cache when loaded through it) and only turns
+rows into `BarData` while they are replayed. It behaves like the list the
+engine expects (`len`, slicing, iteration, `clear`), so the stock
+`run_backtesting` loop works unchanged.
+
+Rows are decoded a block at a time (`tolist()` and one vectorized datetime
+conversion per block), so nothing is converted field by field on the replay
+hot path. Two feed modes:
+
+- flyweight (default): one mutable `BarData` per history, updated in place
+  for every row. Strategies must not keep references to bars across calls
+  (copy the fields they need, as `ArrayManager` does);
+- lazy (`flyweight=False`): a fresh `BarData` per row, dropped once replayed.
+  Safe for any strategy; memory stays columnar, only the block is live.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+from .import_h5_to_vnpy import BarArrays, arrays_to_datetimes, build_bars_from_arrays
+
+BLOCK_ROWS = 16_384
+
+
+class ColumnarHistory:
+    """Bar history as columns; feeds `BarData` on iteration."""
+
+    def __init__(
+        self,
+        arrays: BarArrays,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        tz=timezone.utc,
+        gateway_name: str = "DB",
+        flyweight: bool = True,
+        block_rows: int = BLOCK_ROWS,
+    ) -> None:
+        self.arrays = arrays
+        self.symbol = symbol
+        self.exchange = exchange
+        self.interval = interval
+        self.tz = tz
+        self.gateway_name = gateway_name
+        self.flyweight = flyweight
+        self.block_rows = block_rows
+        self._bar: Optional[BarData] = None
+
+    @classmethod
+    def from_cache(
+        cls,
+        cache,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        flyweight: bool = True,
+    ) -> "ColumnarHistory":
+        """Zero-copy history over a `BarCache` time range."""
+        return cls(
+            cache.arrays(start, end), cache.symbol, cache.exchange, cache.interval,
+            tz=cache.tz, gateway_name="DB", flyweight=flyweight,
+        )
+
+    # ——— list protocol used by BacktestingEngine ———
+    def __len__(self) -> int:
+        return len(self.arrays)
+
+    def __bool__(self) -> bool:
+        return len(self.arrays) > 0
+
+    def __iter__(self) -> Iterator[BarData]:
+        return self.iter_rows(0, len(self))
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[BarData, "_HistorySlice"]:
+        n = len(self)
+        if isinstance(item, slice):
+            lo, hi, step = item.indices(n)
+            if step != 1:
+                raise ValueError("ColumnarHistory only supports contiguous slices")
+            return _HistorySlice(self, lo, max(lo, hi))
+        if item < 0:
+            item += n
+        if not 0 <= item < n:
+            raise IndexError(item)
+        # random access always returns an independent bar
+        return self._build(item, item + 1)[0]
+
+    def clear(self) -> None:
+        empty = np.empty(0)
+        self.arrays = BarArrays(np.empty(0, dtype="int64"), empty, empty, empty, empty, empty, empty)
+
+    # ——— decoding ———
+    def _build(self, lo: int, hi: int) -> List[BarData]:
+        a = self.arrays
+        block = BarArrays(
+            a.ts_ns[lo:hi], a.open[lo:hi], a.high[lo:hi], a.low[lo:hi],
+            a.close[lo:hi], a.volume[lo:hi], a.turnover[lo:hi],
+        )
+        return build_bars_from_arrays(block, self.symbol, self.exchange, self.interval, self.gateway_name, self.tz)
+
+    def _template(self) -> BarData:
+        if self._bar is None:
+            self._bar = BarData(
+                gateway_name=self.gateway_name,
+                symbol=self.symbol,
+                exchange=self.exchange,
+                datetime=datetime(1970, 1, 1, tzinfo=self.tz),
+                interval=self.interval,
+            )
+        return self._bar
+
+    def iter_rows(self, lo: int, hi: int) -> Iterator[BarData]:
+        a = self.arrays
+        for start in range(lo, hi, self.block_rows):
+            stop = min(start + self.block_rows, hi)
+            if not self.flyweight:
+                yield from self._build(start, stop)
+                continue
+            bar = self._template()
+            for dt, o, h, l, c, v, to in zip(
+                arrays_to_datetimes(a.ts_ns[start:stop], self.tz),
+                a.open[start:stop].tolist(),
+                a.high[start:stop].tolist(),
+                a.low[start:stop].tolist(),
+                a.close[start:stop].tolist(),
+                a.volume[start:stop].tolist(),
+                a.turnover[start:stop].tolist(),
+            ):
+                bar.datetime = dt
+                bar.open_price = o
+                bar.high_price = h
+                bar.low_price = l
+                bar.close_price = c
+                bar.volume = v
+                bar.turnover = to
+                yield bar
+
+    def nbytes(self) -> int:
+        a = self.arrays
+        return sum(col.nbytes for col in (a.ts_ns, a.open, a.high, a.low, a.close, a.volume, a.turnover))
+
+
+class _HistorySlice:
+    """What `history_data[i: j]` returns: an iterable window, decoded on demand."""
+
+    def __init__(self, history: ColumnarHistory, lo: int, hi: int) -> None:
+        self.history = history
+        self.lo = lo
+        self.hi = hi
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    def __iter__(self) -> Iterator[BarData]:
+        return self.history.iter_rows(self.lo, self.hi)
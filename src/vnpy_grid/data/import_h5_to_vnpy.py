@@ -11,10 +11,12 @@ Then remove --dry-run to perform the actual import.
 from __future__ import annotations
 
 import argparse
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import HDFStore
 
@@ -22,6 +24,9 @@ from vnpy.trader.database import get_database
 from vnpy.trader.object import BarData
 from vnpy.trader.constant import Exchange, Interval
 
+from vnpy_grid.data.sqlite_bulk import SqliteBulkWriter
+from vnpy_grid.data.watermark import ImportManifest, ns_to_datetime, resolve_watermark_ns, series_key
+
 
 @dataclass
 class ColumnMap:
@@ -67,18 +72,20 @@ def infer_columns(df: pd.DataFrame) -> ColumnMap:
     return ColumnMap(time=t, open=o, high=h, low=l, close=c, volume=v, turnover=to)
 
 
+def infer_epoch_unit(s: pd.Series) -> str:
+    # heuristic by magnitude
+    maxv = pd.to_numeric(s.dropna().astype("int64"), errors="coerce").max()
+    if maxv and maxv > 1e14:
+        return "ns"
+    if maxv and maxv > 1e11:
+        return "ms"
+    return "s"
+
+
 def parse_dt_col(s: pd.Series) -> pd.DatetimeIndex:
     # Handle numeric epoch (ns/ms/s) or parseable strings
     if pd.api.types.is_numeric_dtype(s):
-        # heuristic by magnitude
-        maxv = pd.to_numeric(s.dropna().astype("int64"), errors="coerce").max()
-        unit = "s"
-        if maxv and maxv > 1e14:
-            unit = "ns"
-        elif maxv and maxv > 1e11:
-            unit = "ms"
-        else:
-            unit = "s"
+        unit = infer_epoch_unit(s)
         dt = pd.to_datetime(s, unit=unit, utc=True)
     else:
         dt = pd.to_datetime(s, utc=True, errors="coerce")
@@ -109,46 +116,261 @@ def resolve_interval(text: str) -> Interval:
     raise ValueError(f"涓嶆敮鎸佺殑鍛ㄦ湡: {text}")
 
 
+def build_time_where(store: HDFStore, key: str, after_ns: int) -> Optional[str]:
+    """
+    HDF `where` clause selecting rows strictly after `after_ns` (UTC epoch ns),
+    or None when the key cannot be queried (fixed format, time not indexed).
+    """
+    return build_time_range_where(store, key, start_ns=after_ns, strict_start=True)
+
+
+def build_time_range_where(
+    store: HDFStore,
+    key: str,
+    start_ns: Optional[int] = None,
+    end_ns: Optional[int] = None,
+    strict_start: bool = False,
+) -> Optional[str]:
+    """
+    HDF `where` clause for `start_ns <= time <= end_ns` (UTC epoch ns, either side optional),
+    or None when the key cannot be queried (fixed format, time not indexed).
+    """
+    if start_ns is None and end_ns is None:
+        return None
+    storer = store.get_storer(key)
+    if not getattr(storer, "is_table", False):
+        return None
+    sample = store.select(key, start=0, stop=1)
+    div: Optional[int] = None  # epoch divisor for numeric time columns
+    if isinstance(sample.index, pd.DatetimeIndex):
+        col = "index"
+    else:
+        col = infer_column(sample, TIME_CANDIDATES)
+        if not col or col not in (storer.data_columns or []):
+            return None
+        if pd.api.types.is_numeric_dtype(sample[col]):
+            div = {"ns": 1, "ms": 1_000_000, "s": 1_000_000_000}[infer_epoch_unit(sample[col])]
+
+    def fmt(ns: int) -> str:
+        if div:
+            return str(ns // div)
+        return f"'{pd.Timestamp(ns, tz='UTC').tz_localize(None).isoformat()}'"
+
+    terms = []
+    if start_ns is not None:
+        terms.append(f"{col} {'>' if strict_start else '>='} {fmt(start_ns)}")
+    if end_ns is not None:
+        terms.append(f"{col} <= {fmt(end_ns)}")
+    return " & ".join(terms)
+
+
+def _fixed_time_accessor(
+    store: HDFStore,
+    key: str,
+) -> Optional[Tuple[Callable[[int], int], Callable[[int, int], np.ndarray], int]]:
+    """
+    Random access to the time of row i of a fixed-format frame as UTC epoch ns,
+    read straight from the PyTables array node (one element per call), plus a
+    reader of rows [lo, hi) of the time column alone in the stored unit.
+    None when the time lives in an object/string block, which is pickled whole.
+    """
+    storer = store.get_storer(key)
+    if getattr(storer, "is_table", False):
+        return None
+    group = storer.group
+    sample = store.select(key, start=0, stop=1)
+
+    if isinstance(sample.index, pd.DatetimeIndex):
+        node, col_pos = group.axis1, None
+        kind = str(node._v_attrs.kind)
+    else:
+        col = infer_column(sample, TIME_CANDIDATES)
+        if not col:
+            return None
+        node = col_pos = None
+        for name in group._v_children:
+            if name.endswith("_items"):
+                items = [v.decode() if isinstance(v, bytes) else str(v) for v in group._v_children[name][:]]
+                if col in items:
+                    node = group._v_children[name.replace("_items", "_values")]
+                    col_pos = items.index(col)
+                    break
+        if node is None or node.__class__.__name__ != "Array":
+            return None
+        kind = str(getattr(node._v_attrs, "value_type", ""))
+
+    if kind.startswith("datetime64"):
+        unit = kind[11:-1] if "[" in kind else "ns"
+    elif pd.api.types.is_numeric_dtype(sample[col]):
+        unit = infer_epoch_unit(sample[col])
+    else:
+        return None
+    mult = {"ns": 1, "us": 1_000, "ms": 1_000_000, "s": 1_000_000_000}[unit]
+
+    def get(i: int) -> int:
+        return int(node[i] if col_pos is None else node[i, col_pos]) * mult
+
+    def read(lo: int, hi: int) -> np.ndarray:
+        return np.asarray(node[lo:hi] if col_pos is None else node[lo:hi, col_pos])
+
+    return get, read, int(node.shape[0])
+
+
+def _is_ascending(read: Callable[[int, int], np.ndarray], n: int, block_rows: int = 1_000_000) -> bool:
+    """One pass over the time column in blocks; equal neighbours count as ascending."""
+    last = None
+    for lo in range(0, n, block_rows):
+        values = read(lo, min(n, lo + block_rows))
+        if not len(values):
+            continue
+        if (last is not None and values[0] < last) or np.any(values[1:] < values[:-1]):
+            return False
+        last = values[-1]
+    return True
+
+
+def locate_fixed_rows(
+    store: HDFStore,
+    key: str,
+    start_ns: Optional[int] = None,
+    end_ns: Optional[int] = None,
+    known_sorted: Optional[bool] = None,
+) -> Optional[Tuple[int, int]]:
+    """
+    `[start_row, stop_row)` of a fixed-format frame sorted by time covering
+    `start_ns <= time <= end_ns`, found by binary search on disk (~2*log2(n) reads).
+    `known_sorted` is the catalog's word on the row order; when it is None the
+    time column alone is read once to check it is ascending.
+    None when the time column cannot be searched or is not ascending; callers
+    then read everything.
+    """
+    if known_sorted is False:
+        return None
+    accessor = _fixed_time_accessor(store, key)
+    if accessor is None:
+        return None
+    get, read, n = accessor
+    if n == 0:
+        return 0, 0
+    if known_sorted is None and not _is_ascending(read, n):
+        return None
+
+    def first_at_or_after(ns: int, inclusive: bool) -> int:
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            v = get(mid)
+            if v < ns or (not inclusive and v == ns):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    lo = first_at_or_after(start_ns, True) if start_ns is not None else 0
+    hi = first_at_or_after(end_ns, False) if end_ns is not None else n
+    return lo, max(lo, hi)
+
+
+def iter_h5_chunks(
+    store: HDFStore,
+    key: str,
+    chunk_rows: int,
+    where: Optional[str] = None,
+    start_row: int = 0,
+    stop_row: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """Consecutive chunks of one key; row slices work for fixed and table stores alike."""
+    if where is not None:
+        yield from store.select(key, where=where, chunksize=chunk_rows)
+        return
+    start = start_row
+    while stop_row is None or start < stop_row:
+        stop = start + chunk_rows if stop_row is None else min(start + chunk_rows, stop_row)
+        df = store.select(key, start=start, stop=stop)
+        if df is None or not len(df):
+            return
+        yield df
+        start = stop
+
+
 def chunk_iter(df: pd.DataFrame, size: int) -> Iterable[pd.DataFrame]:
     n = len(df)
     for i in range(0, n, size):
         yield df.iloc[i:i+size]
 
 
-def build_bars(
-    df: pd.DataFrame,
-    cmap: ColumnMap,
+@dataclass
+class BarArrays:
+    """Columnar view of one chunk: UTC epoch nanoseconds plus float64 OHLCV."""
+    ts_ns: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    turnover: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts_ns)
+
+    def select(self, mask: np.ndarray) -> "BarArrays":
+        return BarArrays(
+            self.ts_ns[mask], self.open[mask], self.high[mask], self.low[mask],
+            self.close[mask], self.volume[mask], self.turnover[mask],
+        )
+
+
+def _float_column(df: pd.DataFrame, col: Optional[str]) -> np.ndarray:
+    if not col:
+        return np.zeros(len(df), dtype="float64")
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    # to_numpy may hand back a read-only view of the frame's block
+    return values if values.flags.writeable else values.copy()
+
+
+def frame_to_arrays(df: pd.DataFrame, cmap: ColumnMap) -> BarArrays:
+    """Convert a chunk to NumPy columns once; rows with unparseable time are dropped."""
+    dt_idx = pd.DatetimeIndex(parse_dt_col(df[cmap.time]))
+    ts_ns = dt_idx.as_unit("ns").asi8
+    cols = [
+        _float_column(df, name)
+        for name in (cmap.open, cmap.high, cmap.low, cmap.close, cmap.volume, cmap.turnover)
+    ]
+
+    valid = ~dt_idx.isna()
+    if not valid.all():
+        ts_ns = ts_ns[valid]
+        cols = [c[valid] for c in cols]
+
+    # keep the historical behaviour of the row loop: missing values become 0.0
+    for c in cols:
+        c[np.isnan(c)] = 0.0
+
+    return BarArrays(ts_ns, *cols)
+
+
+def arrays_to_datetimes(ts_ns: np.ndarray, tz=timezone.utc) -> np.ndarray:
+    """UTC epoch nanoseconds -> object array of tz-aware datetimes (timezone.utc by default)."""
+    idx = pd.DatetimeIndex(ts_ns, tz=timezone.utc)
+    if tz is not timezone.utc:
+        idx = idx.tz_convert(tz)
+    return idx.to_pydatetime()
+
+
+def build_bars_from_arrays(
+    arrays: BarArrays,
     symbol: str,
     exchange: Exchange,
     interval: Interval,
     gateway_name: str = "BACKTEST",
+    tz=timezone.utc,
 ) -> List[BarData]:
-    dt_idx = parse_dt_col(df[cmap.time])
-    opens = pd.to_numeric(df[cmap.open], errors="coerce")
-    highs = pd.to_numeric(df[cmap.high], errors="coerce")
-    lows = pd.to_numeric(df[cmap.low], errors="coerce")
-    closes = pd.to_numeric(df[cmap.close], errors="coerce")
-    vols = pd.to_numeric(df[cmap.volume], errors="coerce") if cmap.volume else None
-    tos = pd.to_numeric(df[cmap.turnover], errors="coerce") if cmap.turnover else None
-
-    bars: List[BarData] = []
-    for i in range(len(df)):
-        dt = dt_idx.iloc[i]
-        if pd.isna(dt):
-            continue
-        # ensure timezone-aware UTC datetime
-        dt_py = dt.to_pydatetime().replace(tzinfo=timezone.utc)
-        o = float(opens.iloc[i]) if pd.notna(opens.iloc[i]) else 0.0
-        h = float(highs.iloc[i]) if pd.notna(highs.iloc[i]) else 0.0
-        l = float(lows.iloc[i]) if pd.notna(lows.iloc[i]) else 0.0
-        c = float(closes.iloc[i]) if pd.notna(closes.iloc[i]) else 0.0
-        v = float(vols.iloc[i]) if (vols is not None and pd.notna(vols.iloc[i])) else 0.0
-        to = float(tos.iloc[i]) if (tos is not None and pd.notna(tos.iloc[i])) else 0.0
-        bar = BarData(
+    return [
+        BarData(
             gateway_name=gateway_name,
             symbol=symbol,
             exchange=exchange,
-            datetime=dt_py,
+            datetime=dt,
             interval=interval,
             volume=v,
             turnover=to,
@@ -158,8 +380,28 @@ def build_bars(
             low_price=l,
             close_price=c,
         )
-        bars.append(bar)
-    return bars
+        for dt, o, h, l, c, v, to in zip(
+            arrays_to_datetimes(arrays.ts_ns, tz),
+            arrays.open.tolist(),
+            arrays.high.tolist(),
+            arrays.low.tolist(),
+            arrays.close.tolist(),
+            arrays.volume.tolist(),
+            arrays.turnover.tolist(),
+        )
+    ]
+
+
+def build_bars(
+    df: pd.DataFrame,
+    cmap: ColumnMap,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    gateway_name: str = "BACKTEST",
+) -> List[BarData]:
+    arrays = frame_to_arrays(df, cmap)
+    return build_bars_from_arrays(arrays, symbol, exchange, interval, gateway_name)
 
 
 def import_h5(
@@ -170,15 +412,48 @@ def import_h5(
     key: Optional[str],
     chunk_rows: int = 200_000,
     dry_run: bool = False,
+    bulk: bool = False,
+    incremental: bool = False,
+    derive: Sequence[str] = (),
+    validate: bool = False,
+    update_catalog: bool = False,
 ) -> None:
-    db = get_database()
+    # bulk: write through SqliteBulkWriter (vn.py SQLite schema only) instead of save_bar_data
+    writer = SqliteBulkWriter() if bulk and not dry_run else None
+    db = None if writer else get_database()
     exchange = resolve_exchange(exchange_name)
     interval = resolve_interval(interval_text)
 
+    # incremental: only rows after the series watermark, checkpointed per committed chunk
+    manifest = ImportManifest() if incremental else None
+    mark_key = series_key(symbol, exchange, interval)
+    after_ns: Optional[int] = None
+    if manifest is not None:
+        after_ns = resolve_watermark_ns(symbol, exchange, interval, manifest, db or get_database())
+        if after_ns is not None:
+            print(f"[incremental] {mark_key} watermark={ns_to_datetime(after_ns).isoformat()}")
+
+    # derive: aggregate the 1m stream into higher intervals in the same pass
+    resamplers = []
+    read_after_ns = after_ns
+    if derive:
+        from .resample import derived_resamplers, rebuild_after_ns
+
+        resamplers = derived_resamplers(derive, interval)
+        read_after_ns = rebuild_after_ns(resamplers, after_ns)
+
+    # validate: gap / duplicate / OHLC index of the rows written, see data.quality
+    scanner = index = None
+    if validate and not dry_run:
+        from .quality import QualityIndex, QualityScanner
+
+        scanner = QualityScanner(interval, last_ts_ns=after_ns)
+        index = QualityIndex.for_series(symbol, exchange, interval)
+
     if exchange is Exchange.LOCAL and exchange_name.upper() != "LOCAL":
         print(f"[璀﹀憡] Exchange.{exchange_name.upper()} 涓嶅瓨鍦紝涓存椂浣跨敤 Exchange.LOCAL 瀵煎叆锛堜笉褰卞搷鍥炴祴鍔熻兘锛夈€?")
 
-    with HDFStore(path, mode="r") as store:
+    with HDFStore(path, mode="r") as store, (writer or nullcontext()):
         keys = store.keys()
         if not keys:
             raise RuntimeError("H5 鏂囦欢涓湭鍙戠幇浠讳綍鏁版嵁闆?keys")
@@ -186,15 +461,38 @@ def import_h5(
         if use_key not in keys:
             raise RuntimeError(f"鎸囧畾鐨?key={use_key} 涓嶅瓨鍦紝H5 keys={keys}")
 
+        # catalog: known column map and chunk map of an unchanged file, see data.catalog
+        # (imported here because data.catalog imports this module)
+        from .catalog import ChunkMapBuilder, DatasetCatalog, lookup_h5, new_h5_entry
+
+        catalog = DatasetCatalog()
+        entry = lookup_h5(path, use_key, catalog)
+        known_cmap = entry.column_map() if entry else None
+        if entry:
+            print(f"[catalog] {use_key}: {entry.coverage()}")
+
         # Try chunked table first
+        where = build_time_where(store, use_key, read_after_ns) if read_after_ns is not None else None
+        if where:
+            print(f"[incremental] where: {where}")
+
         iterator = None
-        try:
-            iterator = store.select(use_key, chunksize=chunk_rows)
-        except Exception:
-            iterator = None
+        builder = None
+        rows = entry.row_range(read_after_ns + 1) if entry and read_after_ns is not None and not where else None
+        if rows is not None:
+            # fixed store: start at the first catalogued chunk that reaches past the watermark
+            print(f"[catalog] rows {rows[0]}..{rows[1]}")
+            iterator = iter_h5_chunks(store, use_key, chunk_rows, start_row=rows[0], stop_row=rows[1])
+        else:
+            try:
+                iterator = iter(store.select(use_key, where=where, chunksize=chunk_rows))
+            except Exception:
+                iterator = None
+            if update_catalog and where is None and entry is None:
+                builder = ChunkMapBuilder()  # a full read: record the file in the catalog
 
         def process_df(df: pd.DataFrame, preview: bool = False) -> None:
-            cmap = infer_columns(df)
+            cmap = known_cmap or infer_columns(df)
             if preview or dry_run:
                 print("[棰勮] 鍒楁槧灏?", cmap)
                 print(df.head(5).to_string())
@@ -202,16 +500,62 @@ def import_h5(
             # build and save in chunks to control memory
             total = 0
             for part in chunk_iter(df, 200_000):
-                bars = build_bars(part, cmap, symbol=symbol, exchange=exchange, interval=interval)
-                if bars:
-                    db.save_bar_data(bars)
-                    total += len(bars)
+                arrays = frame_to_arrays(part, cmap)
+                if builder is not None:
+                    builder.push(len(part), arrays.ts_ns)
+                if read_after_ns is not None:
+                    # also covers fixed stores, where the where-clause cannot be pushed down
+                    arrays = arrays.select(arrays.ts_ns > read_after_ns)
+                for r in resamplers:
+                    derived_rows[r.name] += write(r.push(arrays), r.interval)
+                if after_ns is not None and read_after_ns != after_ns:
+                    arrays = arrays.select(arrays.ts_ns > after_ns)
+                if not len(arrays):
+                    continue
+                if scanner is not None:
+                    scanner.push(arrays)
+                total += write(arrays, interval)
+                if manifest is not None:
+                    if writer is not None:
+                        writer.commit()
+                    manifest.checkpoint(mark_key, int(arrays.ts_ns.max()), len(arrays), source=str(path))
+                if writer is not None:
+                    print(f"[bulk] {total} rows written...")
+                else:
                     print(f"宸插啓鍏?{total} 鏉?..")
-            print(f"鍐欏叆瀹屾垚锛屾€昏 {total} 鏉°€?")
+            print(f"鍐欏叆瀹屾垚锛屾€昏 {total} 鏉°€?")
+
+        def write(arrays: BarArrays, itv: Interval) -> int:
+            if not len(arrays):
+                return 0
+            if writer is not None:
+                return writer.write_arrays(arrays, symbol, exchange, itv)
+            if hasattr(db, "write_arrays"):  # columnar backends (ParquetDatabase) skip BarData
+                return db.write_arrays(arrays, symbol, exchange, itv)
+            db.save_bar_data(build_bars_from_arrays(arrays, symbol, exchange, itv))
+            return len(arrays)
+
+        derived_rows = {r.name: 0 for r in resamplers}
+
+        def flush_derived() -> None:
+            # the newest bucket is usually partial; the next incremental run rebuilds it
+            for r in resamplers:
+                derived_rows[r.name] += write(r.flush(), r.interval)
+                late = f", {r.late_rows} out-of-order rows dropped" if r.late_rows else ""
+                print(f"[derive] {r.name}: {derived_rows[r.name]} bars{late}")
+            if index is not None:
+                index.record(scanner)
+                print(f"[validate] {index.key}: {index.counts() or 'no issues'} -> {index.path}")
 
         if iterator is not None:
             # Consume first chunk for preview
-            first = next(iterator)
+            first = next(iterator, None)
+            if first is None:
+                if read_after_ns is not None:
+                    print("[incremental] no rows after watermark, nothing to import")
+                else:
+                    print(f"{use_key}: no rows, nothing to import")
+                return
             process_df(first, preview=True)
             if dry_run:
                 return
@@ -226,6 +570,11 @@ def import_h5(
             if dry_run:
                 return
             process_df(df, preview=False)
+        flush_derived()
+        if builder is not None and builder.rows:
+            new_entry = new_h5_entry(path, use_key, store, store.select(use_key, start=0, stop=1))
+            new_entry.apply_builder(builder)
+            catalog.put(new_entry)
 
 
 def main() -> None:
@@ -237,7 +586,31 @@ def main() -> None:
     ap.add_argument("--key", required=False, help="H5 鍐呴儴鏁版嵁闆?key锛屼笉鎸囧畾鍒欎娇鐢ㄧ涓€涓?")
     ap.add_argument("--chunk", type=int, default=200_000, help="姣忔壒琛屾暟锛堣〃鏍煎紡 H5 鏈夋晥锛?")
     ap.add_argument("--dry-run", action="store_true", help="浠呴瑙堝垪鏄犲皠鍜屾牱渚嬶紝涓嶅啓鏁版嵁搴?")
+    ap.add_argument("--bulk", action="store_true", help="bulk-load into the vn.py SQLite file (executemany, deferred index)")
+    ap.add_argument("--incremental", action="store_true", help="import only rows after the stored watermark; resumable")
+    ap.add_argument("--derive", default="", help="comma list of intervals aggregated from 1m in the same pass, e.g. 1h,1d,1w")
+    ap.add_argument("--validate", action="store_true", help="record gaps, duplicates and bad OHLC rows in the series quality index")
+    ap.add_argument("--pipeline", action="store_true", help="overlap HDF reads, conversion and DB writes on three threads")
+    ap.add_argument("--catalog", action="store_true", help="record the file in the dataset catalog after a full read (not with --pipeline: use tools.catalog scan)")
     args = ap.parse_args()
+    derive = [t for t in args.derive.split(",") if t.strip()]
+
+    if args.pipeline and not args.dry_run:
+        from vnpy_grid.data.pipeline import pipelined_import
+
+        pipelined_import(
+            path=args.path,
+            symbol=args.symbol,
+            exchange_name=args.exchange,
+            interval_text=args.interval,
+            key=args.key,
+            chunk_rows=args.chunk,
+            bulk=args.bulk,
+            incremental=args.incremental,
+            derive=derive,
+            validate=args.validate,
+        )
+        return
 
     import_h5(
         path=args.path,
@@ -247,6 +620,11 @@ def main() -> None:
         key=args.key,
         chunk_rows=args.chunk,
         dry_run=args.dry_run,
+        bulk=args.bulk,
+        incremental=args.incremental,
+        derive=derive,
+        validate=args.validate,
+        update_catalog=args.catalog,
     )
 
 
@@ -0,0 +1,398 @@
+"""
+Month-partitioned Parquet bar store implementing vn.py's `BaseDatabase`.
+
+Layout under the store root::
+
+    bar/<exchange>/<symbol>/<interval>/<YYYY-MM>.parquet   (UTC months)
+    overview.json
+
+Each partition is sorted by time and written with row-group min/max
+statistics. `load_bar_data` only opens the months overlapping the request
+(partition pruning), reads only the bar columns (projection) and lets Arrow
+skip row groups outside the range.
+
+Writes are buffered per partition: a month is merged into its file once the
+writes move on to other months, when the buffer passes `FLUSH_ROWS`, before
+any read, and on `flush()` / exit. Saving a month in 5,000-bar batches thus
+rewrites its file once, not once per batch. The overview is updated from the
+row count delta and min/max of each flushed partition.
+
+Select it in vt_setting.json with `"database.name": "parquet"` (the
+`vnpy_parquet` shim re-exports `ParquetDatabase` as `Database`).
+`database.database` names the root directory under the vn.py trader dir;
+the SQLite default `database.db` maps to `parquet_bars`.
+Only bar data is supported: `save_tick_data` and `load_tick_data` raise
+`NotImplementedError`, so a tick backtest on this backend fails instead of
+replaying nothing.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ, BarOverview, BaseDatabase, TickOverview
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.setting import SETTINGS
+from vnpy.trader.utility import get_file_path
+
+from .import_h5_to_vnpy import BarArrays, arrays_to_datetimes
+from .watermark import db_time_to_ns, localize_db_times
+
+DEFAULT_ROOT = "parquet_bars"
+ROW_GROUP_ROWS = 64 * 1024
+FLUSH_ROWS = 1_000_000  # buffered rows over all partitions
+
+PRICE_COLUMNS = ["open_price", "high_price", "low_price", "close_price", "volume", "turnover", "open_interest"]
+SCHEMA = pa.schema(
+    [pa.field("datetime", pa.timestamp("ns", tz="UTC"))]
+    + [pa.field(name, pa.float64()) for name in PRICE_COLUMNS]
+)
+
+
+def default_root() -> Path:
+    name = SETTINGS.get("database.database") or ""
+    if not name or name.endswith(".db"):
+        name = DEFAULT_ROOT
+    path = Path(name)
+    return path if path.is_absolute() else get_file_path(name)
+
+
+def _month_keys(start_ns: int, end_ns: int) -> List[str]:
+    months = pd.period_range(
+        pd.Timestamp(start_ns, tz="UTC").tz_localize(None).to_period("M"),
+        pd.Timestamp(end_ns, tz="UTC").tz_localize(None).to_period("M"),
+        freq="M",
+    )
+    return [str(m) for m in months]
+
+
+def bars_to_arrays(bars: List[BarData]) -> Tuple[BarArrays, np.ndarray]:
+    ts = pd.DatetimeIndex([b.datetime for b in bars])
+    ts = (localize_db_times(ts) if ts.tz is None else ts.tz_convert("UTC")).as_unit("ns").asi8
+    arrays = BarArrays(
+        ts,
+        np.fromiter((b.open_price for b in bars), "float64", len(bars)),
+        np.fromiter((b.high_price for b in bars), "float64", len(bars)),
+        np.fromiter((b.low_price for b in bars), "float64", len(bars)),
+        np.fromiter((b.close_price for b in bars), "float64", len(bars)),
+        np.fromiter((b.volume for b in bars), "float64", len(bars)),
+        np.fromiter((b.turnover for b in bars), "float64", len(bars)),
+    )
+    return arrays, np.fromiter((b.open_interest for b in bars), "float64", len(bars))
+
+
+def _arrays_to_table(arrays: BarArrays, open_interest: Optional[np.ndarray] = None) -> pa.Table:
+    oi = open_interest if open_interest is not None else np.zeros(len(arrays))
+    return pa.Table.from_arrays(
+        [
+            pa.array(arrays.ts_ns, type=pa.timestamp("ns", tz="UTC")),
+            pa.array(arrays.open), pa.array(arrays.high), pa.array(arrays.low), pa.array(arrays.close),
+            pa.array(arrays.volume), pa.array(arrays.turnover), pa.array(oi),
+        ],
+        schema=SCHEMA,
+    )
+
+
+class ParquetDatabase(BaseDatabase):
+    """Bars only; one writer process at a time (same assumption as the SQLite bulk writer)."""
+
+    def __init__(self, root: Optional[Path | str] = None) -> None:
+        self.root = Path(root) if root else default_root()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.overview_path = self.root / "overview.json"
+        self._overviews: Dict[str, dict] = {}
+        if self.overview_path.exists():
+            self._overviews = json.loads(self.overview_path.read_text(encoding="utf-8"))
+        # partition path -> (series, buffered tables)
+        self._pending: Dict[Path, Tuple[Tuple[str, Exchange, Interval], List[pa.Table]]] = {}
+        self._pending_rows = 0
+        atexit.register(self.flush)
+
+    # ——— paths ———
+    def series_dir(self, symbol: str, exchange: Exchange, interval: Interval) -> Path:
+        return self.root / "bar" / exchange.value / symbol / interval.value
+
+    def partitions(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+    ) -> List[Path]:
+        self.flush()
+        folder = self.series_dir(symbol, exchange, interval)
+        if not folder.exists():
+            return []
+        if start_ns is None or end_ns is None:
+            return sorted(folder.glob("*.parquet"))
+        files = (folder / f"{m}.parquet" for m in _month_keys(start_ns, end_ns))
+        return [f for f in files if f.exists()]
+
+    # ——— writes ———
+    def write_arrays(
+        self,
+        arrays: BarArrays,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        open_interest: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Columnar upsert into the month partitions, last write wins per
+        timestamp. Buffered: partitions this batch does not touch are merged
+        now, the ones it touches when the writes move on (or on `flush()`).
+        """
+        n = len(arrays)
+        if not n:
+            return 0
+        series = (symbol, exchange, interval)
+        table = _arrays_to_table(arrays, open_interest)
+        months = pd.DatetimeIndex(arrays.ts_ns, tz="UTC").tz_localize(None).to_period("M").astype(str)
+        folder = self.series_dir(symbol, exchange, interval)
+        touched = set()
+        for month in pd.unique(months):
+            path = folder / f"{month}.parquet"
+            touched.add(path)
+            self._pending.setdefault(path, (series, []))[1].append(table.filter(pa.array(months == month)))
+        self._pending_rows += n
+        if self._pending_rows >= FLUSH_ROWS:
+            self.flush()
+        else:
+            self.flush([p for p, (s, _) in self._pending.items() if s == series and p not in touched])
+        return n
+
+    def flush(self, paths: Optional[List[Path]] = None) -> None:
+        """Merge buffered writes into their partition files (all of them by default) and update the overview."""
+        paths = list(self._pending) if paths is None else paths
+        if not paths:
+            return
+        for path in paths:
+            (symbol, exchange, interval), tables = self._pending.pop(path)
+            self._pending_rows -= sum(t.num_rows for t in tables)
+            part = pa.concat_tables(tables)
+            old_rows = 0
+            if path.exists():
+                old = pq.read_table(path, schema=SCHEMA)
+                old_rows = old.num_rows
+                part = pa.concat_tables([old, part])
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+            written = self._write_partition(path, part)
+            ts = written.column("datetime").cast(pa.int64()).to_numpy()
+            self._update_overview(symbol, exchange, interval, written.num_rows - old_rows, int(ts[0]), int(ts[-1]))
+        self._save_overviews()
+
+    @staticmethod
+    def _write_partition(path: Path, table: pa.Table) -> pa.Table:
+        # stable sort, then keep the last row of every timestamp
+        table = table.take(pc.sort_indices(table, sort_keys=[("datetime", "ascending")]))
+        ts = table.column("datetime").cast(pa.int64()).to_numpy()
+        if len(ts) > 1:
+            keep = np.ones(len(ts), dtype=bool)
+            keep[:-1] = ts[1:] != ts[:-1]
+            if not keep.all():
+                table = table.filter(pa.array(keep))
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(
+            table, tmp,
+            row_group_size=ROW_GROUP_ROWS,
+            compression="zstd",
+            write_statistics=True,
+        )
+        os.replace(tmp, path)
+        return table
+
+    def save_bar_data(self, bars: List[BarData], stream: bool = False) -> bool:
+        if not bars:
+            return True
+        first = bars[0]
+        arrays, oi = bars_to_arrays(bars)
+        self.write_arrays(arrays, first.symbol, first.exchange, first.interval, oi)
+        return True
+
+    def save_tick_data(self, ticks: List[TickData], stream: bool = False) -> bool:
+        raise NotImplementedError("the Parquet store keeps bar data only, use another database for ticks")
+
+    # ——— reads ———
+    def load_bar_table(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        columns: Optional[List[str]] = None,
+    ) -> pa.Table:
+        start_ns, end_ns = db_time_to_ns(start), db_time_to_ns(end)
+        files = self.partitions(symbol, exchange, interval, start_ns, end_ns)
+        if not files:
+            return SCHEMA.empty_table()
+        lo = pa.scalar(start_ns, type=pa.timestamp("ns", tz="UTC"))
+        hi = pa.scalar(end_ns, type=pa.timestamp("ns", tz="UTC"))
+        wanted = ["datetime"] + [c for c in (columns or PRICE_COLUMNS) if c != "datetime"]
+        tables = [
+            pq.read_table(
+                f,
+                columns=wanted,
+                filters=[("datetime", ">=", lo), ("datetime", "<=", hi)],
+                schema=SCHEMA,
+            )
+            for f in files
+        ]
+        return pa.concat_tables(tables)
+
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> BarArrays:
+        t = self.load_bar_table(
+            symbol, exchange, interval, start, end,
+            columns=["open_price", "high_price", "low_price", "close_price", "volume", "turnover"],
+        )
+        col = lambda name: t.column(name).to_numpy()  # noqa: E731
+        return BarArrays(
+            t.column("datetime").cast(pa.int64()).to_numpy(),
+            col("open_price"), col("high_price"), col("low_price"), col("close_price"),
+            col("volume"), col("turnover"),
+        )
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> List[BarData]:
+        t = self.load_bar_table(symbol, exchange, interval, start, end)
+        if not t.num_rows:
+            return []
+        dts = arrays_to_datetimes(t.column("datetime").cast(pa.int64()).to_numpy(), DB_TZ)
+        cols = [t.column(name).to_pylist() for name in PRICE_COLUMNS]
+        return [
+            BarData(
+                gateway_name="DB",
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                interval=interval,
+                open_price=o,
+                high_price=h,
+                low_price=l,
+                close_price=c,
+                volume=v,
+                turnover=to,
+                open_interest=oi,
+            )
+            for dt, o, h, l, c, v, to, oi in zip(dts, *cols)
+        ]
+
+    def iter_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+    ) -> Iterator[BarArrays]:
+        """Whole series, one month at a time (used by the bar cache)."""
+        for f in self.partitions(symbol, exchange, interval):
+            t = pq.read_table(f, schema=SCHEMA)
+            yield BarArrays(
+                t.column("datetime").cast(pa.int64()).to_numpy(),
+                *(t.column(name).to_numpy() for name in PRICE_COLUMNS[:6]),
+            )
+
+    def load_tick_data(self, symbol: str, exchange: Exchange, start: datetime, end: datetime) -> List[TickData]:
+        raise NotImplementedError("the Parquet store keeps bar data only, use another database for ticks")
+
+    # ——— deletes / overview ———
+    def delete_bar_data(self, symbol: str, exchange: Exchange, interval: Interval) -> int:
+        self.flush()
+        key = self._key(symbol, exchange, interval)
+        count = int(self._overviews.get(key, {}).get("count", 0))
+        folder = self.series_dir(symbol, exchange, interval)
+        if folder.exists():
+            shutil.rmtree(folder)
+        self._overviews.pop(key, None)
+        self._save_overviews()
+        return count
+
+    def delete_tick_data(self, symbol: str, exchange: Exchange) -> int:
+        return 0
+
+    @staticmethod
+    def _key(symbol: str, exchange: Exchange, interval: Interval) -> str:
+        return f"{symbol}.{exchange.value}.{interval.value}"
+
+    def partition_stats(self, symbol: str, exchange: Exchange, interval: Interval) -> List[List[int]]:
+        """`[start_row, stop_row, first_ns, last_ns]` per partition, read from the footers only."""
+        out: List[List[int]] = []
+        row = 0
+        for f in self.partitions(symbol, exchange, interval):
+            meta = pq.read_metadata(f)
+            lo = hi = None
+            for i in range(meta.num_row_groups):
+                stats = meta.row_group(i).column(0).statistics
+                if stats is None or not stats.has_min_max:
+                    continue
+                a, b = pd.Timestamp(stats.min).value, pd.Timestamp(stats.max).value
+                lo = a if lo is None else min(lo, a)
+                hi = b if hi is None else max(hi, b)
+            if lo is not None:
+                out.append([row, row + meta.num_rows, lo, hi])
+            row += meta.num_rows
+        return out
+
+    def _update_overview(
+        self, symbol: str, exchange: Exchange, interval: Interval, added: int, first_ns: int, last_ns: int
+    ) -> None:
+        """Fold one flushed partition into count/start/end; upserts only ever widen the range."""
+        key = self._key(symbol, exchange, interval)
+        entry = self._overviews.get(key)
+        if entry is None:
+            self._overviews[key] = {
+                "symbol": symbol, "exchange": exchange.value, "interval": interval.value,
+                "count": added, "start_ns": first_ns, "end_ns": last_ns,
+            }
+            return
+        entry["count"] = int(entry["count"]) + added
+        entry["start_ns"] = min(int(entry["start_ns"]), first_ns)
+        entry["end_ns"] = max(int(entry["end_ns"]), last_ns)
+
+    def _save_overviews(self) -> None:
+        tmp = self.overview_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._overviews, indent=2), encoding="utf-8")
+        os.replace(tmp, self.overview_path)
+
+    def get_bar_overview(self) -> List[BarOverview]:
+        self.flush()
+        out = []
+        for entry in self._overviews.values():
+            out.append(BarOverview(
+                symbol=entry["symbol"],
+                exchange=Exchange(entry["exchange"]),
+                interval=Interval(entry["interval"]),
+                count=int(entry["count"]),
+                start=pd.Timestamp(entry["start_ns"], tz="UTC").tz_convert(DB_TZ).to_pydatetime(),
+                end=pd.Timestamp(entry["end_ns"], tz="UTC").tz_convert(DB_TZ).to_pydatetime(),
+            ))
+        return out
+
+    def get_tick_overview(self) -> List[TickOverview]:
+        return []
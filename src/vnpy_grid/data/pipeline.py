@@ -0,0 +1,347 @@
+"""
+Three-stage import pipeline: HDF chunk reading -> columnar conversion -> DB writer.
+
+Each stage runs on its own thread and hands work to the next one through a
+bounded queue, so a slow stage blocks its producer (backpressure) instead of
+letting chunks pile up in memory. At most `2 * queue_size + 3` chunks are alive
+at any time. There is exactly one writer thread, which is what SQLite wants.
+
+Per-stage statistics separate busy time from time spent waiting on the input
+queue (starved) or on the output queue (blocked by backpressure); the stage
+with the largest busy time is the one limiting the import.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+from pandas import HDFStore
+
+from vnpy.trader.database import get_database
+from vnpy.trader.object import BarData
+
+from .catalog import lookup_h5
+from .import_h5_to_vnpy import (
+    BarArrays,
+    ColumnMap,
+    build_bars_from_arrays,
+    build_time_where,
+    frame_to_arrays,
+    infer_columns,
+    iter_h5_chunks,
+    resolve_exchange,
+    resolve_interval,
+)
+from .quality import QualityIndex, QualityScanner
+from .resample import derived_resamplers, rebuild_after_ns
+from .sqlite_bulk import SqliteBulkWriter
+from .watermark import ImportManifest, resolve_watermark_ns, series_key
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    rows: int = 0
+    busy_s: float = 0.0
+    wait_in_s: float = 0.0
+    wait_out_s: float = 0.0
+    depth_samples: List[int] = field(default_factory=list)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.busy_s if self.busy_s > 0 else 0.0
+
+    def line(self) -> str:
+        depth = ""
+        if self.depth_samples:
+            avg = sum(self.depth_samples) / len(self.depth_samples)
+            depth = f" out_q avg={avg:.1f} max={max(self.depth_samples)}"
+        return (
+            f"{self.name:<8} chunks={self.items:<5} rows={self.rows:<10} "
+            f"busy={self.busy_s:7.2f}s ({self.rows_per_s:>12,.0f} rows/s) "
+            f"starved={self.wait_in_s:6.2f}s blocked={self.wait_out_s:6.2f}s{depth}"
+        )
+
+
+@dataclass
+class PipelineReport:
+    stages: List[StageStats]
+    elapsed_s: float
+    rows_written: int
+
+    @property
+    def bottleneck(self) -> str:
+        return max(self.stages, key=lambda s: s.busy_s).name
+
+    def summary(self) -> str:
+        lines = [s.line() for s in self.stages]
+        rate = self.rows_written / self.elapsed_s if self.elapsed_s > 0 else 0.0
+        lines.append(
+            f"total    rows={self.rows_written} elapsed={self.elapsed_s:.2f}s "
+            f"({rate:,.0f} rows/s) bottleneck={self.bottleneck}"
+        )
+        return "\n".join(lines)
+
+
+def _rows(item: Any) -> int:
+    return len(item) if hasattr(item, "__len__") else 0
+
+
+@dataclass
+class ConvertedChunk:
+    """Non-bulk convert output: the chunk's arrays plus the BarData built from its rows past the watermark."""
+    arrays: BarArrays
+    bars: List[BarData]
+
+    def __len__(self) -> int:
+        return len(self.arrays)  # rows of the chunk, for the convert stage statistics
+
+
+class ImportPipeline:
+    """
+    Run `source -> convert -> write` on three threads joined by bounded queues.
+
+    `write` returns the number of rows it persisted. Any exception in a stage
+    stops the other two and is re-raised from `run()`.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any],
+        convert: Callable[[Any], Any],
+        write: Callable[[Any], int],
+        queue_size: int = 4,
+        report_every: float = 5.0,
+    ) -> None:
+        self.source = source
+        self.convert = convert
+        self.write = write
+        self.report_every = report_every
+
+        self.q_read: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.q_conv: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.read_stats = StageStats("read")
+        self.conv_stats = StageStats("convert")
+        self.write_stats = StageStats("write")
+
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    # ——— queue helpers that stay responsive to a failure elsewhere ———
+    def _put(self, q: queue.Queue, item: Any, stats: StageStats) -> bool:
+        t0 = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                stats.wait_out_s += time.perf_counter() - t0
+                stats.depth_samples.append(q.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue, stats: StageStats) -> Any:
+        t0 = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+                stats.wait_in_s += time.perf_counter() - t0
+                return item
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, exc: BaseException) -> None:
+        if self._error is None:
+            self._error = exc
+        self._stop.set()
+
+    # ——— stages ———
+    def _read_stage(self) -> None:
+        stats = self.read_stats
+        try:
+            it: Iterator[Any] = iter(self.source)
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                item = next(it, _DONE)
+                stats.busy_s += time.perf_counter() - t0
+                if item is _DONE:
+                    break
+                stats.items += 1
+                stats.rows += _rows(item)
+                if not self._put(self.q_read, item, stats):
+                    return
+            self._put(self.q_read, _DONE, stats)
+        except BaseException as exc:  # noqa: BLE001 - surfaced from run()
+            self._fail(exc)
+
+    def _convert_stage(self) -> None:
+        stats = self.conv_stats
+        try:
+            while True:
+                item = self._get(self.q_read, stats)
+                if item is _DONE:
+                    break
+                t0 = time.perf_counter()
+                out = self.convert(item)
+                stats.busy_s += time.perf_counter() - t0
+                stats.items += 1
+                stats.rows += _rows(out)
+                del item
+                if not self._put(self.q_conv, out, stats):
+                    return
+            self._put(self.q_conv, _DONE, stats)
+        except BaseException as exc:  # noqa: BLE001
+            self._fail(exc)
+
+    def _write_stage(self) -> None:
+        stats = self.write_stats
+        last_report = time.perf_counter()
+        try:
+            while True:
+                item = self._get(self.q_conv, stats)
+                if item is _DONE:
+                    break
+                t0 = time.perf_counter()
+                stats.rows += self.write(item)
+                stats.busy_s += time.perf_counter() - t0
+                stats.items += 1
+                if self.report_every and time.perf_counter() - last_report >= self.report_every:
+                    last_report = time.perf_counter()
+                    print(self.progress_line())
+        except BaseException as exc:  # noqa: BLE001
+            self._fail(exc)
+
+    def progress_line(self) -> str:
+        return (
+            f"[pipeline] read={self.read_stats.rows} convert={self.conv_stats.rows} "
+            f"written={self.write_stats.rows} "
+            f"q_read={self.q_read.qsize()}/{self.q_read.maxsize} "
+            f"q_conv={self.q_conv.qsize()}/{self.q_conv.maxsize}"
+        )
+
+    def run(self) -> PipelineReport:
+        t0 = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._read_stage, name="import-read", daemon=True),
+            threading.Thread(target=self._convert_stage, name="import-convert", daemon=True),
+            threading.Thread(target=self._write_stage, name="import-write", daemon=True),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if self._error is not None:
+            raise self._error
+        return PipelineReport(
+            stages=[self.read_stats, self.conv_stats, self.write_stats],
+            elapsed_s=time.perf_counter() - t0,
+            rows_written=self.write_stats.rows,
+        )
+
+
+def pipelined_import(
+    path: str,
+    symbol: str,
+    exchange_name: str,
+    interval_text: str,
+    key: Optional[str] = None,
+    chunk_rows: int = 200_000,
+    bulk: bool = False,
+    incremental: bool = False,
+    queue_size: int = 4,
+    derive: Sequence[str] = (),
+    validate: bool = False,
+) -> PipelineReport:
+    """
+    Pipelined counterpart of `import_h5`; same sinks, watermark handling and checkpoints.
+
+    Derived intervals are resampled on the writer thread, which sees chunks in order.
+    """
+    exchange = resolve_exchange(exchange_name)
+    interval = resolve_interval(interval_text)
+    writer = SqliteBulkWriter() if bulk else None
+    db = None if writer else get_database()
+
+    manifest = ImportManifest() if incremental else None
+    mark_key = series_key(symbol, exchange, interval)
+    after_ns: Optional[int] = None
+    if manifest is not None:
+        after_ns = resolve_watermark_ns(symbol, exchange, interval, manifest, db or get_database())
+    resamplers = derived_resamplers(derive, interval)
+    read_after_ns = rebuild_after_ns(resamplers, after_ns)
+    scanner = QualityScanner(interval, last_ts_ns=after_ns) if validate else None
+
+    cmap: Optional[ColumnMap] = None
+
+    def convert(df: pd.DataFrame) -> Any:
+        nonlocal cmap
+        if cmap is None:
+            cmap = infer_columns(df)
+        arrays = frame_to_arrays(df, cmap)
+        if read_after_ns is not None:
+            arrays = arrays.select(arrays.ts_ns > read_after_ns)
+        if writer is not None:
+            return arrays
+        # building BarData objects is conversion work; keep it off the writer thread
+        fresh = arrays.select(arrays.ts_ns > after_ns) if after_ns is not None else arrays
+        return ConvertedChunk(arrays, build_bars_from_arrays(fresh, symbol, exchange, interval))
+
+    def write_derived(arrays: BarArrays, itv: Any) -> None:
+        if not len(arrays):
+            return
+        if writer is not None:
+            writer.write_arrays(arrays, symbol, exchange, itv)
+        else:
+            db.save_bar_data(build_bars_from_arrays(arrays, symbol, exchange, itv))
+
+    def write(item: Any) -> int:
+        arrays: BarArrays = item if writer is not None else item.arrays
+        for r in resamplers:
+            write_derived(r.push(arrays), r.interval)
+        if after_ns is not None:
+            arrays = arrays.select(arrays.ts_ns > after_ns)
+        if not len(arrays):
+            return 0
+        if scanner is not None:
+            scanner.push(arrays)
+        if writer is not None:
+            n = writer.write_arrays(arrays, symbol, exchange, interval)
+            if manifest is not None:
+                writer.commit()
+        else:
+            db.save_bar_data(item.bars)
+            n = len(arrays)
+        if manifest is not None:
+            manifest.checkpoint(mark_key, int(arrays.ts_ns.max()), n, source=str(path))
+        return n
+
+    with HDFStore(path, mode="r") as store, (writer or nullcontext()):
+        use_key = key or store.keys()[0]
+        entry = lookup_h5(path, use_key)
+        cmap = entry.column_map() if entry else None  # skip column guessing for catalogued files
+        where = build_time_where(store, use_key, read_after_ns) if read_after_ns is not None else None
+        pipeline = ImportPipeline(
+            iter_h5_chunks(store, use_key, chunk_rows, where=where),
+            convert,
+            write,
+            queue_size=queue_size,
+        )
+        report = pipeline.run()
+        for r in resamplers:
+            write_derived(r.flush(), r.interval)
+    if scanner is not None:
+        index = QualityIndex.for_series(symbol, exchange, interval)
+        index.record(scanner)
+        print(f"[validate] {index.key}: {index.counts() or 'no issues'}")
+
+    print(report.summary())
+    return report
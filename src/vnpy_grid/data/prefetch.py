@@ -0,0 +1,173 @@
+"""
+Background prefetch for streaming backtests.
+
+`PrefetchLoader` calls `load(start, end)` for the next time windows on a
+worker thread while the caller replays the current chunk, handing chunks over
+through a bounded queue of `depth` entries. At most `depth + 2` chunks are
+alive at once (queued, being loaded, being replayed). `depth=0` loads
+synchronously on the caller's thread, which is the old behaviour.
+
+`PrefetchStats.wait_s` is the time the replay thread spent blocked waiting
+for data: with enough look-ahead it approaches zero, otherwise it is the
+I/O stall that remains.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+Window = Tuple[datetime, datetime]
+
+_DONE = object()
+
+
+def floor_to_step(dt: datetime, step: timedelta) -> datetime:
+    """`dt` rounded down to a multiple of `step` since the epoch (bar timestamps sit on that grid)."""
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc if dt.tzinfo else None)
+    return dt - (dt - epoch) % step
+
+
+def window_end(cur: datetime, end: datetime, days: float, step: timedelta) -> datetime:
+    """
+    End of the window starting at `cur`: `days` later, floored to the `step`
+    grid so that the next window (`step` after it) starts on the very next
+    bar; a fractional `chunk_days` would otherwise skip the bar in between.
+    """
+    return min(end, max(cur, floor_to_step(cur + timedelta(days=days), step)))
+
+
+def time_windows(
+    start: datetime,
+    end: datetime,
+    chunk_days: float,
+    step: timedelta = timedelta(minutes=1),
+) -> Iterator[Window]:
+    """`[cur, cur + chunk_days]` windows up to `end`; the next one starts `step` after the previous end."""
+    cur = start
+    while cur <= end:
+        chunk_end = window_end(cur, end, chunk_days, step)
+        yield cur, chunk_end
+        cur = chunk_end + step
+
+
+@dataclass
+class Chunk:
+    start: datetime
+    end: datetime
+    bars: Sequence[Any]
+    load_s: float
+
+
+@dataclass
+class PrefetchStats:
+    depth: int
+    chunks: int = 0
+    rows: int = 0
+    load_s: float = 0.0   # worker time spent in load()
+    wait_s: float = 0.0   # replay thread blocked on the queue
+    elapsed_s: float = 0.0
+
+    def summary(self) -> str:
+        share = self.wait_s / self.elapsed_s * 100 if self.elapsed_s > 0 else 0.0
+        return (
+            f"[prefetch] depth={self.depth} chunks={self.chunks} rows={self.rows} "
+            f"load={self.load_s:.2f}s replay waited {self.wait_s:.2f}s ({share:.1f}% of {self.elapsed_s:.2f}s)"
+        )
+
+
+class _Failure:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class PrefetchLoader:
+    """Iterate `Chunk`s of `windows`, loaded up to `depth` windows ahead of the consumer."""
+
+    def __init__(
+        self,
+        windows: Iterable[Window],
+        load: Callable[[datetime, datetime], Sequence[Any]],
+        depth: int = 2,
+    ) -> None:
+        self.windows = windows
+        self.load = load
+        self.depth = max(0, int(depth))
+        self.stats = PrefetchStats(self.depth)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(self.depth, 1))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self, start: datetime, end: datetime) -> Chunk:
+        t0 = time.perf_counter()
+        bars = self.load(start, end)
+        record = getattr(self.windows, "record", None)
+        if record is not None:
+            record(start, end, len(bars))  # adaptive windows size the next chunk from this one
+        return Chunk(start, end, bars, time.perf_counter() - t0)
+
+    def _put(self, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker(self) -> None:
+        try:
+            for start, end in self.windows:
+                if self._stop.is_set():
+                    return
+                if not self._put(self._load(start, end)):
+                    return
+            self._put(_DONE)
+        except BaseException as exc:  # noqa: BLE001 - re-raised on the replay thread
+            self._put(_Failure(exc))
+
+    def __iter__(self) -> Iterator[Chunk]:
+        t_start = time.perf_counter()
+        try:
+            if self.depth == 0:
+                for start, end in self.windows:
+                    chunk = self._load(start, end)
+                    self.stats.wait_s += chunk.load_s  # nothing overlaps the load
+                    yield self._count(chunk)
+                return
+
+            self._thread = threading.Thread(target=self._worker, name="bar-prefetch", daemon=True)
+            self._thread.start()
+            while True:
+                t0 = time.perf_counter()
+                item = self._queue.get()
+                self.stats.wait_s += time.perf_counter() - t0
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield self._count(item)
+        finally:
+            self.stats.elapsed_s = time.perf_counter() - t_start
+            self.close()
+
+    def _count(self, chunk: Chunk) -> Chunk:
+        self.stats.chunks += 1
+        self.stats.rows += len(chunk.bars)
+        self.stats.load_s += chunk.load_s
+        return chunk
+
+    def close(self) -> None:
+        """Stop the worker (e.g. the replay loop bailed out early) and drop queued chunks."""
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
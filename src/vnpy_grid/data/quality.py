@@ -0,0 +1,295 @@
+"""
+Gap / duplicate / OHLC-sanity index built while importing bars.
+
+`QualityScanner` checks each converted chunk with NumPy (no row loop) and
+collects compact spans:
+
+- gap:        bars missing between two rows (`rows` = missing bar count);
+- duplicate:  repeated timestamps (the database keeps the last one);
+- unordered:  a timestamp older than the previous row;
+- bad_price:  non-positive / non-finite prices, incl. NaN filled with 0.0 on import;
+- high_low:   high < low;
+- ohlc_range: open or close outside [low, high].
+
+`QualityIndex` stores the spans of one (symbol, exchange, interval) series as a
+small JSON file next to the vn.py database, so streaming backtests can look up
+the bad spans of a date range without touching the bar data. `apply_policy`
+turns those spans into warnings, skipped bars or forward-filled bars.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from vnpy.trader.utility import get_file_path
+
+from .import_h5_to_vnpy import BarArrays
+from .watermark import ns_to_datetime, series_key
+
+QUALITY_DIR = "vnpy_grid_quality"
+
+INTERVAL_NS: Dict[Interval, int] = {
+    Interval.MINUTE: 60 * 1_000_000_000,
+    Interval.HOUR: 3600 * 1_000_000_000,
+    Interval.DAILY: 86400 * 1_000_000_000,
+    Interval.WEEKLY: 7 * 86400 * 1_000_000_000,
+}
+
+GAP = "gap"
+DUPLICATE = "duplicate"
+UNORDERED = "unordered"
+BAD_PRICE = "bad_price"
+HIGH_LOW = "high_low"
+OHLC_RANGE = "ohlc_range"
+BAD_ROW_KINDS = (BAD_PRICE, HIGH_LOW, OHLC_RANGE)
+
+POLICIES = ("ignore", "warn", "skip", "ffill")
+
+
+@dataclass
+class Span:
+    kind: str
+    start_ns: int
+    end_ns: int
+    rows: int
+
+    def describe(self) -> str:
+        start = ns_to_datetime(self.start_ns).strftime("%Y-%m-%d %H:%M")
+        end = ns_to_datetime(self.end_ns).strftime("%Y-%m-%d %H:%M")
+        return f"{self.kind} {start} -> {end} ({self.rows} rows)"
+
+
+def _runs(kind: str, ts_ns: np.ndarray, step_ns: int) -> List[Span]:
+    """Group flagged timestamps into spans of consecutive bars."""
+    if not len(ts_ns):
+        return []
+    breaks = np.flatnonzero(np.diff(ts_ns) > step_ns) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(ts_ns)]))
+    return [
+        Span(kind, int(ts_ns[s]), int(ts_ns[e - 1]), int(e - s))
+        for s, e in zip(starts.tolist(), ends.tolist())
+    ]
+
+
+class QualityScanner:
+    """Stateful validator; the last timestamp is carried so checks span chunk boundaries."""
+
+    def __init__(self, interval: Interval, last_ts_ns: Optional[int] = None) -> None:
+        if interval not in INTERVAL_NS:
+            raise ValueError(f"no bar spacing known for {interval.value}")
+        self.step_ns = INTERVAL_NS[interval]
+        self.last_ts_ns = last_ts_ns
+        self.first_ns: Optional[int] = None
+        self.rows = 0
+        self.spans: List[Span] = []
+
+    def push(self, arrays: BarArrays) -> List[Span]:
+        n = len(arrays)
+        if not n:
+            return []
+        ts = arrays.ts_ns
+        if self.first_ns is None:
+            self.first_ns = int(ts[0]) if self.last_ts_ns is None else self.last_ts_ns + 1
+        self.rows += n
+
+        # compare with the newest timestamp seen so far, so one unordered row
+        # does not also show up as a gap right after it
+        seed = self.last_ts_ns if self.last_ts_ns is not None else int(ts[0]) - self.step_ns
+        newest = np.maximum.accumulate(np.concatenate(([seed], ts[:-1])))
+        diff = ts - newest
+        spans: List[Span] = []
+
+        gap_at = np.flatnonzero(diff > self.step_ns)
+        for i in gap_at.tolist():
+            before = int(newest[i])
+            missing = int(diff[i] // self.step_ns) - 1
+            if missing > 0:
+                spans.append(Span(GAP, before + self.step_ns, int(ts[i]) - self.step_ns, missing))
+        spans += _runs(DUPLICATE, ts[diff == 0], self.step_ns)
+        spans += _runs(UNORDERED, ts[diff < 0], self.step_ns)
+
+        o, h, l, c = arrays.open, arrays.high, arrays.low, arrays.close
+        prices = np.stack([o, h, l, c])
+        bad_price = ~np.isfinite(prices).all(axis=0) | (prices <= 0).any(axis=0)
+        high_low = ~bad_price & (h < l)
+        ohlc_range = ~bad_price & ~high_low & ((o > h) | (o < l) | (c > h) | (c < l))
+        spans += _runs(BAD_PRICE, ts[bad_price], self.step_ns)
+        spans += _runs(HIGH_LOW, ts[high_low], self.step_ns)
+        spans += _runs(OHLC_RANGE, ts[ohlc_range], self.step_ns)
+
+        self.last_ts_ns = int(max(newest[-1], ts[-1]))
+        self.spans += spans
+        return spans
+
+
+class QualityIndex:
+    """Persisted spans of one series; JSON, rewritten atomically like the import manifest."""
+
+    def __init__(self, key: str, step_ns: int, path: Optional[Path | str] = None) -> None:
+        self.key = key
+        self.step_ns = step_ns
+        self.path = Path(path) if path else get_file_path(QUALITY_DIR) / f"{key}.json"
+        self.spans: List[Span] = []
+        self.rows_checked = 0
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.spans = [Span(*s) for s in data.get("spans", [])]
+            self.rows_checked = int(data.get("rows_checked", 0))
+
+    @classmethod
+    def for_series(
+        cls, symbol: str, exchange: Exchange, interval: Interval, root: Optional[Path] = None
+    ) -> "QualityIndex":
+        key = series_key(symbol, exchange, interval)
+        path = (root / f"{key}.json") if root else None
+        return cls(key, INTERVAL_NS.get(interval, 0), path)
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def update(self, first_ns: int, last_ns: int, spans: Iterable[Span], rows: int) -> None:
+        """Replace what was known about [first_ns, last_ns] with a fresh scan of that range."""
+        kept = [s for s in self.spans if s.end_ns < first_ns or s.start_ns > last_ns]
+        merged = sorted(kept + list(spans), key=lambda s: (s.kind, s.start_ns))
+        out: List[Span] = []
+        for s in merged:
+            last = out[-1] if out else None
+            if last and last.kind == s.kind and s.kind != GAP and s.start_ns - last.end_ns <= self.step_ns:
+                last.end_ns = max(last.end_ns, s.end_ns)
+                last.rows += s.rows
+            else:
+                out.append(Span(s.kind, s.start_ns, s.end_ns, s.rows))
+        self.spans = sorted(out, key=lambda s: s.start_ns)
+        self.rows_checked += rows
+
+    def save(self) -> None:
+        data = {
+            "series": self.key,
+            "step_ns": self.step_ns,
+            "rows_checked": self.rows_checked,
+            "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "spans": [[s.kind, s.start_ns, s.end_ns, s.rows] for s in self.spans],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def record(self, scanner: QualityScanner) -> None:
+        if scanner.first_ns is None or scanner.last_ts_ns is None:
+            return
+        self.update(scanner.first_ns, scanner.last_ts_ns, scanner.spans, scanner.rows)
+        self.save()
+
+    def query(self, start_ns: int, end_ns: int, kinds: Optional[Sequence[str]] = None) -> List[Span]:
+        return [
+            s for s in self.spans
+            if s.end_ns >= start_ns and s.start_ns <= end_ns and (kinds is None or s.kind in kinds)
+        ]
+
+    def counts(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for s in self.spans:
+            out[s.kind] = out.get(s.kind, 0) + s.rows
+        return out
+
+
+def _bar_ns(bars: List[BarData]) -> np.ndarray:
+    return pd.DatetimeIndex([b.datetime for b in bars]).tz_convert("UTC").as_unit("ns").asi8
+
+
+def _flat_bar(template: BarData, dt: datetime, price: float) -> BarData:
+    return BarData(
+        gateway_name=template.gateway_name,
+        symbol=template.symbol,
+        exchange=template.exchange,
+        datetime=dt,
+        interval=template.interval,
+        volume=0.0,
+        turnover=0.0,
+        open_interest=template.open_interest,
+        open_price=price,
+        high_price=price,
+        low_price=price,
+        close_price=price,
+    )
+
+
+def apply_policy(
+    bars: List[BarData],
+    index: Optional[QualityIndex],
+    policy: str = "warn",
+    log=print,
+) -> List[BarData]:
+    """
+    Apply a bad-span policy to one loaded chunk (bars sorted by time).
+
+    - ignore: return the bars unchanged;
+    - warn:   log the spans that overlap the chunk;
+    - skip:   drop bars inside bad_price / high_low / ohlc_range spans;
+    - ffill:  replace those bars, and fill gaps, with flat zero-volume bars at
+              the previous close.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"unknown bad-span policy: {policy} (choose from {', '.join(POLICIES)})")
+    if policy == "ignore" or index is None or not bars:
+        return bars
+
+    ts = _bar_ns(bars)
+    spans = index.query(int(ts[0]), int(ts[-1]))
+    if not spans:
+        return bars
+    if policy == "warn":
+        for s in spans:
+            log(f"[quality] {index.key} {s.describe()}")
+        return bars
+
+    bad = np.zeros(len(bars), dtype=bool)
+    for s in spans:
+        if s.kind in BAD_ROW_KINDS:
+            lo = np.searchsorted(ts, s.start_ns, side="left")
+            hi = np.searchsorted(ts, s.end_ns, side="right")
+            bad[lo:hi] = True
+
+    if policy == "skip":
+        if bad.any():
+            log(f"[quality] {index.key}: skipped {int(bad.sum())} bad bars")
+        return [b for b, drop in zip(bars, bad.tolist()) if not drop]
+
+    # ffill
+    step = index.step_ns
+    gaps = [s for s in spans if s.kind == GAP]
+    out: List[BarData] = []
+    filled = 0
+    gi = 0
+    prev: Optional[BarData] = None
+    for i, bar in enumerate(bars):
+        while gi < len(gaps) and gaps[gi].end_ns < ts[i]:
+            g = gaps[gi]
+            gi += 1
+            if prev is None:
+                continue
+            for t in range(max(g.start_ns, int(ts[i - 1]) + step), min(g.end_ns, int(ts[i]) - step) + 1, step):
+                out.append(_flat_bar(prev, ns_to_datetime(t).astimezone(bar.datetime.tzinfo), prev.close_price))
+                filled += 1
+        if bad[i]:
+            if prev is None:
+                continue
+            bar = _flat_bar(prev, bar.datetime, prev.close_price)
+            filled += 1
+        out.append(bar)
+        prev = bar
+    if filled:
+        log(f"[quality] {index.key}: forward-filled {filled} bars")
+    return out
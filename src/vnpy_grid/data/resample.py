@@ -0,0 +1,167 @@
+"""
+Vectorized OHLCV aggregation of minute bars into coarser buckets.
+
+`BarResampler` consumes time-sorted `BarArrays` chunk by chunk and returns only
+completed buckets; the rows of the last, still-open bucket are carried into the
+next chunk, so results do not depend on where chunk boundaries fall. `flush()`
+emits the final (possibly partial) bucket at the end of the data.
+
+Buckets are aligned in UTC and labelled with their start time, matching the
+open-time convention of the source minute bars. Weeks start on Monday.
+Only 1h / d / w have a vn.py `Interval`; other sizes (5m, 15m, ...) can be
+resampled in memory but cannot be stored through the vn.py database.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Interval
+
+from .import_h5_to_vnpy import BarArrays
+
+MINUTE_NS = 60 * 1_000_000_000
+DAY_NS = 1440 * MINUTE_NS
+MONDAY_ORIGIN_NS = 4 * DAY_NS  # 1970-01-05 was a Monday
+
+# text -> (bucket size, origin, vn.py interval if storable)
+BUCKETS: Dict[str, Tuple[int, int, Optional[Interval]]] = {
+    "5m": (5 * MINUTE_NS, 0, None),
+    "15m": (15 * MINUTE_NS, 0, None),
+    "30m": (30 * MINUTE_NS, 0, None),
+    "1h": (60 * MINUTE_NS, 0, Interval.HOUR),
+    "4h": (240 * MINUTE_NS, 0, None),
+    "1d": (DAY_NS, 0, Interval.DAILY),
+    "1w": (7 * DAY_NS, MONDAY_ORIGIN_NS, Interval.WEEKLY),
+}
+ALIASES = {"hour": "1h", "h": "1h", "d": "1d", "day": "1d", "daily": "1d", "w": "1w", "week": "1w"}
+
+
+def parse_bucket(text: str) -> Tuple[str, int, int, Optional[Interval]]:
+    name = text.strip().lower()
+    name = ALIASES.get(name, name)
+    if name not in BUCKETS:
+        raise ValueError(f"unsupported derived interval: {text} (choose from {', '.join(BUCKETS)})")
+    size, origin, interval = BUCKETS[name]
+    return name, size, origin, interval
+
+
+def empty_arrays() -> BarArrays:
+    empty = np.empty(0)
+    return BarArrays(np.empty(0, dtype="int64"), empty, empty, empty, empty, empty, empty)
+
+
+def _concat(a: BarArrays, b: BarArrays) -> BarArrays:
+    return BarArrays(
+        np.concatenate([a.ts_ns, b.ts_ns]),
+        np.concatenate([a.open, b.open]),
+        np.concatenate([a.high, b.high]),
+        np.concatenate([a.low, b.low]),
+        np.concatenate([a.close, b.close]),
+        np.concatenate([a.volume, b.volume]),
+        np.concatenate([a.turnover, b.turnover]),
+    )
+
+
+def aggregate(arrays: BarArrays, bucket_ns: int, origin_ns: int = 0) -> BarArrays:
+    """Aggregate sorted rows into buckets with reduceat (no Python loop over rows)."""
+    if not len(arrays):
+        return arrays
+    buckets = (arrays.ts_ns - origin_ns) // bucket_ns * bucket_ns + origin_ns
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+    return BarArrays(
+        ts_ns=buckets[starts],
+        open=arrays.open[starts],
+        high=np.maximum.reduceat(arrays.high, starts),
+        low=np.minimum.reduceat(arrays.low, starts),
+        close=arrays.close[ends],
+        volume=np.add.reduceat(arrays.volume, starts),
+        turnover=np.add.reduceat(arrays.turnover, starts),
+    )
+
+
+class BarResampler:
+    """
+    Streaming aggregator for one target bucket size.
+
+    Rows older than the last emitted bucket cannot be merged any more; they are
+    dropped and counted in `late_rows` instead of producing a second, partial
+    bar for a bucket that was already written.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.name, self.bucket_ns, self.origin_ns, self.interval = parse_bucket(text)
+        self.carry: Optional[BarArrays] = None
+        self.emitted_until: Optional[int] = None  # bucket number of the last emitted bucket
+        self.late_rows = 0
+
+    def _bucket(self, ts_ns: np.ndarray) -> np.ndarray:
+        return (ts_ns - self.origin_ns) // self.bucket_ns
+
+    def bucket_start(self, ts_ns: int) -> int:
+        return int(self._bucket(np.int64(ts_ns))) * self.bucket_ns + self.origin_ns
+
+    def push(self, arrays: BarArrays) -> BarArrays:
+        """Add a chunk; return the buckets it completed (possibly none)."""
+        if self.carry is not None:
+            arrays = _concat(self.carry, arrays)
+            self.carry = None
+        if not len(arrays):
+            return arrays
+        if np.any(np.diff(arrays.ts_ns) < 0):
+            arrays = arrays.select(np.argsort(arrays.ts_ns, kind="stable"))
+
+        b = self._bucket(arrays.ts_ns)
+        if self.emitted_until is not None and b[0] <= self.emitted_until:
+            keep = b > self.emitted_until
+            self.late_rows += int((~keep).sum())
+            arrays, b = arrays.select(keep), b[keep]
+            if not len(arrays):
+                return arrays
+
+        done = b < b[-1]
+        self.carry = arrays.select(~done)
+        if not done.any():
+            return empty_arrays()
+        self.emitted_until = int(b[done][-1])
+        return aggregate(arrays.select(done), self.bucket_ns, self.origin_ns)
+
+    def flush(self) -> BarArrays:
+        """Emit the last, possibly partial, bucket."""
+        carry, self.carry = self.carry, None
+        if carry is None or not len(carry):
+            return empty_arrays()
+        self.emitted_until = int(self._bucket(carry.ts_ns[-1]))
+        return aggregate(carry, self.bucket_ns, self.origin_ns)
+
+
+def derived_resamplers(texts: Iterable[str], source: Interval) -> List[BarResampler]:
+    """Validate `--derive` targets for the vn.py database and build one resampler each."""
+    resamplers: List[BarResampler] = []
+    for text in texts:
+        if not text.strip():
+            continue
+        if source is not Interval.MINUTE:
+            raise ValueError(f"derived intervals need 1m source bars, got {source.value}")
+        r = BarResampler(text)
+        if r.interval is None:
+            raise ValueError(f"{r.name} has no vn.py Interval and cannot be stored; use 1h, 1d or 1w")
+        if any(o.interval is r.interval for o in resamplers):
+            continue
+        resamplers.append(r)
+    return resamplers
+
+
+def rebuild_after_ns(resamplers: List[BarResampler], after_ns: Optional[int]) -> Optional[int]:
+    """
+    Read position for an incremental import with derived intervals.
+
+    The minute watermark may sit inside a derived bucket whose bar was written
+    partially last time; reading from the start of the widest such bucket lets
+    that bar be rebuilt in full.
+    """
+    if after_ns is None or not resamplers:
+        return after_ns
+    return min(r.bucket_start(after_ns + 1) for r in resamplers) - 1
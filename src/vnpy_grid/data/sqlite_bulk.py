@@ -0,0 +1,308 @@
+"""
+Bulk loader for the vn.py SQLite bar schema.
+
+`BaseDatabase.save_bar_data` upserts 50 rows per statement through peewee and
+refreshes `dbbaroverview` on every call. For multi-year minute imports this
+writer goes straight to `sqlite3`:
+
+- rows are streamed into `executemany` inside large transactions;
+- import-time pragmas (WAL, synchronous=OFF, big page cache) are set per connection;
+- the unique bar index can be dropped for the load and rebuilt once at the end
+  (duplicates are resolved "last write wins", same as `on_conflict_replace`);
+- `dbbaroverview` is recomputed once per (symbol, exchange, interval) in `close()`.
+
+The table layout is identical to `vnpy_sqlite`, so the regular
+`get_database()` reader sees the imported bars unchanged. Without an explicit
+path the writer refuses to run unless `database.name` is `sqlite`: with any
+other backend configured, the bars would land in a file it never reads.
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ, convert_tz
+from vnpy.trader.object import BarData
+from vnpy.trader.setting import SETTINGS
+from vnpy.trader.utility import get_file_path
+
+if TYPE_CHECKING:
+    from .import_h5_to_vnpy import BarArrays
+
+BAR_INDEX = "dbbardata_symbol_exchange_interval_datetime"
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS "dbbardata" ("id" INTEGER NOT NULL PRIMARY KEY, '
+    '"symbol" VARCHAR(255) NOT NULL, "exchange" VARCHAR(255) NOT NULL, '
+    '"datetime" DATETIME NOT NULL, "interval" VARCHAR(255) NOT NULL, '
+    '"volume" REAL NOT NULL, "turnover" REAL NOT NULL, "open_interest" REAL NOT NULL, '
+    '"open_price" REAL NOT NULL, "high_price" REAL NOT NULL, "low_price" REAL NOT NULL, '
+    '"close_price" REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS "dbbaroverview" ("id" INTEGER NOT NULL PRIMARY KEY, '
+    '"symbol" VARCHAR(255) NOT NULL, "exchange" VARCHAR(255) NOT NULL, '
+    '"interval" VARCHAR(255) NOT NULL, "count" INTEGER NOT NULL, '
+    '"start" DATETIME NOT NULL, "end" DATETIME NOT NULL)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "dbbaroverview_symbol_exchange_interval" '
+    'ON "dbbaroverview" ("symbol", "exchange", "interval")',
+]
+
+CREATE_BAR_INDEX = (
+    f'CREATE UNIQUE INDEX IF NOT EXISTS "{BAR_INDEX}" '
+    'ON "dbbardata" ("symbol", "exchange", "interval", "datetime")'
+)
+
+INSERT_BAR = (
+    'INSERT OR REPLACE INTO "dbbardata" ("symbol", "exchange", "datetime", "interval", '
+    '"volume", "turnover", "open_interest", "open_price", "high_price", "low_price", '
+    '"close_price") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+IMPORT_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA cache_size=-262144",  # 256 MiB
+    "PRAGMA temp_store=MEMORY",
+]
+
+SeriesKey = Tuple[str, str, str]
+
+
+def default_sqlite_path() -> Path:
+    """Same file `vnpy_sqlite` opens: <TEMP_DIR>/<database.database>."""
+    return get_file_path(SETTINGS["database.database"] or "database.db")
+
+
+def require_sqlite_database() -> None:
+    """Raise unless the configured vn.py database is the SQLite file the bulk writer targets."""
+    name = SETTINGS.get("database.name") or "sqlite"
+    if name != "sqlite":
+        raise RuntimeError(
+            f"bulk loading writes the vn.py SQLite file, but database.name is {name!r}; "
+            "import without --bulk to go through the configured database"
+        )
+
+
+def format_db_datetimes(ts_ns: np.ndarray) -> List[str]:
+    """UTC epoch nanoseconds -> naive DB_TZ strings exactly as peewee stores them."""
+    idx = pd.DatetimeIndex(ts_ns, tz="UTC").tz_convert(DB_TZ).tz_localize(None)
+    if (idx.microsecond != 0).any():
+        return [str(t.to_pydatetime()) for t in idx]
+    return idx.strftime("%Y-%m-%d %H:%M:%S").tolist()
+
+
+class SqliteBulkWriter:
+    """
+    Append bars to a vn.py SQLite database with one writer connection.
+
+    Use as a context manager; `close()` rebuilds the deferred index and
+    refreshes the overview rows of every series that was written. Leaving the
+    block on an exception rolls back the open batch instead of committing it
+    (batches committed before stay) and still restores the index. An import
+    killed before `close()` leaves the index dropped and possibly duplicate
+    rows behind; the next `open()` finds the index missing and repairs the
+    whole table first.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path | str] = None,
+        commit_rows: int = 500_000,
+        defer_index: bool = True,
+    ) -> None:
+        if path is None:
+            require_sqlite_database()
+        self.path = Path(path) if path else default_sqlite_path()
+        self.commit_rows = commit_rows
+        self.defer_index = defer_index
+
+        self.conn: Optional[sqlite3.Connection] = None
+        self.touched: Set[SeriesKey] = set()
+        self.rows_written = 0
+        self._pending = 0
+        self._atomic = False
+
+    # ——— lifecycle ———
+    def open(self) -> "SqliteBulkWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # the pipeline opens the writer on the main thread and writes from its writer thread
+        conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        for pragma in IMPORT_PRAGMAS:
+            conn.execute(pragma)
+        for ddl in SCHEMA:
+            conn.execute(ddl)
+        self.conn = conn
+        self._repair_bar_index()
+        if self.defer_index:
+            conn.execute(f'DROP INDEX IF EXISTS "{BAR_INDEX}"')
+        else:
+            conn.execute(CREATE_BAR_INDEX)
+        conn.execute("BEGIN")
+        return self
+
+    def close(self, commit: bool = True) -> None:
+        """Commit the open batch (or roll it back), then restore the index and the overviews."""
+        if self.conn is None:
+            return
+        conn = self.conn
+        try:
+            if commit:
+                conn.execute("COMMIT")
+            else:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"[bulk] rolled back {self._pending} uncommitted rows")
+                self._pending = 0
+            if self.defer_index:
+                t0 = time.perf_counter()
+                self._drop_duplicates()
+                conn.execute(CREATE_BAR_INDEX)
+                print(f"[bulk] rebuilt {BAR_INDEX} in {time.perf_counter() - t0:.1f}s")
+            self._refresh_overviews()
+            conn.execute("PRAGMA synchronous=NORMAL")
+        finally:
+            conn.close()
+            self.conn = None
+
+    def __enter__(self) -> "SqliteBulkWriter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(commit=exc_type is None)
+
+    # ——— writes ———
+    def write_rows(self, key: SeriesKey, rows: Iterable[tuple], count: int) -> int:
+        if self.conn is None:
+            raise RuntimeError("SqliteBulkWriter is not open")
+        self.conn.executemany(INSERT_BAR, rows)
+        self.touched.add(key)
+        self.rows_written += count
+        self._pending += count
+        if self._pending >= self.commit_rows and not self._atomic:
+            self.commit()
+        return count
+
+    @contextmanager
+    def atomic(self) -> Iterator["SqliteBulkWriter"]:
+        """Commit everything written inside the block as one transaction, or none of it on an exception."""
+        self.commit()  # earlier writes are not part of the unit
+        self._atomic = True
+        try:
+            yield self
+        except BaseException:
+            self._atomic = False
+            self.rollback()
+            raise
+        self._atomic = False
+        self.commit()
+
+    def commit(self) -> None:
+        """Make everything written so far durable (e.g. before recording an import checkpoint)."""
+        if self.conn is None or not self._pending:
+            return
+        self.conn.execute("COMMIT")
+        self.conn.execute("BEGIN")
+        self._pending = 0
+
+    def rollback(self) -> None:
+        """Discard everything written since the last commit."""
+        if self.conn is None:
+            return
+        if self.conn.in_transaction:  # a failed statement may already have rolled it back
+            self.conn.execute("ROLLBACK")
+        self.conn.execute("BEGIN")
+        self._pending = 0
+
+    def write_arrays(
+        self,
+        arrays: BarArrays,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+    ) -> int:
+        n = len(arrays)
+        if not n:
+            return 0
+        ex, iv = exchange.value, interval.value
+        rows = zip(
+            [symbol] * n,
+            [ex] * n,
+            format_db_datetimes(arrays.ts_ns),
+            [iv] * n,
+            arrays.volume.tolist(),
+            arrays.turnover.tolist(),
+            [0.0] * n,
+            arrays.open.tolist(),
+            arrays.high.tolist(),
+            arrays.low.tolist(),
+            arrays.close.tolist(),
+        )
+        return self.write_rows((symbol, ex, iv), rows, n)
+
+    def write_bars(self, bars: List[BarData]) -> int:
+        if not bars:
+            return 0
+        first = bars[0]
+        key = (first.symbol, first.exchange.value, first.interval.value)
+        rows: Iterator[tuple] = (
+            (
+                b.symbol, b.exchange.value, str(convert_tz(b.datetime)), b.interval.value,
+                b.volume, b.turnover, b.open_interest,
+                b.open_price, b.high_price, b.low_price, b.close_price,
+            )
+            for b in bars
+        )
+        return self.write_rows(key, rows, len(bars))
+
+    # ——— finalisation ———
+    def _repair_bar_index(self) -> None:
+        """Dedup every series and recreate the unique index if an earlier bulk import never closed."""
+        conn = self.conn
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=?", (BAR_INDEX,)).fetchone():
+            return
+        series = conn.execute('SELECT DISTINCT "symbol", "exchange", "interval" FROM "dbbardata"').fetchall()
+        if not series:
+            return
+        t0 = time.perf_counter()
+        conn.execute("BEGIN")
+        conn.execute(
+            'DELETE FROM "dbbardata" WHERE "id" NOT IN (SELECT MAX("id") FROM "dbbardata" '
+            'GROUP BY "symbol", "exchange", "interval", "datetime")'
+        )
+        conn.execute(CREATE_BAR_INDEX)
+        self._refresh_overviews(series)
+        conn.execute("COMMIT")
+        print(f"[bulk] {BAR_INDEX} was missing (unfinished bulk import): "
+              f"deduplicated {len(series)} series and rebuilt it in {time.perf_counter() - t0:.1f}s")
+
+    def _drop_duplicates(self) -> None:
+        """Keep the last inserted row per bar key, mirroring INSERT OR REPLACE."""
+        for symbol, ex, iv in sorted(self.touched):
+            self.conn.execute(
+                'DELETE FROM "dbbardata" WHERE "symbol"=? AND "exchange"=? AND "interval"=? '
+                'AND "id" NOT IN (SELECT MAX("id") FROM "dbbardata" '
+                'WHERE "symbol"=? AND "exchange"=? AND "interval"=? GROUP BY "datetime")',
+                (symbol, ex, iv, symbol, ex, iv),
+            )
+
+    def _refresh_overviews(self, series: Optional[Iterable[SeriesKey]] = None) -> None:
+        for symbol, ex, iv in sorted(self.touched if series is None else series):
+            count, start, end = self.conn.execute(
+                'SELECT COUNT(*), MIN("datetime"), MAX("datetime") FROM "dbbardata" '
+                'WHERE "symbol"=? AND "exchange"=? AND "interval"=?',
+                (symbol, ex, iv),
+            ).fetchone()
+            if not count:
+                continue
+            self.conn.execute(
+                'INSERT INTO "dbbaroverview" ("symbol", "exchange", "interval", "count", "start", "end") '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT ("symbol", "exchange", "interval") '
+                'DO UPDATE SET "count"=excluded."count", "start"=excluded."start", "end"=excluded."end"',
+                (symbol, ex, iv, count, start, end),
+            )
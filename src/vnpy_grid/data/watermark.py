@@ -0,0 +1,155 @@
+"""
+Per-series import watermarks for resumable, incremental H5 imports.
+
+The watermark of a (symbol, exchange, interval) series is the newest bar
+timestamp known to be committed. It comes from two sources:
+
+- `dbbaroverview.end` as reported by `get_database().get_bar_overview()`;
+- a sidecar JSON manifest in the vn.py trader dir, updated after every
+  committed chunk and keyed by the identity of the configured database
+  (`database.name` / host / `database.database`). The bulk writer only
+  refreshes the overview when it closes, so after a killed import the
+  manifest is the one that is up to date.
+
+The database is authoritative: a manifest watermark ahead of the overview
+is only used when the bar at that timestamp is actually in the database
+(the killed-import case); otherwise the manifest is stale (the database was
+switched or recreated) and the overview watermark is used, with a warning.
+
+All timestamps are handled as UTC epoch nanoseconds.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ, BaseDatabase, convert_tz
+from vnpy.trader.setting import SETTINGS
+from vnpy.trader.utility import get_file_path
+
+MANIFEST_NAME = "vnpy_grid_import_manifest.json"
+
+
+def series_key(symbol: str, exchange: Exchange, interval: Interval) -> str:
+    return f"{symbol}.{exchange.value}.{interval.value}"
+
+
+def database_identity() -> str:
+    """Which database the settings point at, e.g. `sqlite:/home/u/.vntrader/database.db`."""
+    name = SETTINGS.get("database.name") or "sqlite"
+    database = SETTINGS.get("database.database") or ""
+    if name == "sqlite":
+        database = str(get_file_path(database or "database.db").resolve())
+    host = SETTINGS.get("database.host") or ""
+    port = SETTINGS.get("database.port") or ""
+    location = f"{host}:{port}/{database}" if host else database
+    return f"{name}:{location}"
+
+
+def ns_to_datetime(ts_ns: int) -> datetime:
+    return pd.Timestamp(ts_ns, tz="UTC").to_pydatetime()
+
+
+def localize_db_times(naive: pd.DatetimeIndex, tz=None) -> pd.DatetimeIndex:
+    """
+    Naive database times (DB_TZ wall clock) -> UTC, read the way vn.py does
+    (`datetime.timestamp()`, fold=0): a wall time repeated by a DST fall-back
+    is the first, DST one; one skipped by spring-forward is moved past the gap.
+    """
+    flags = np.ones(len(naive), dtype=bool)
+    return naive.tz_localize(tz or DB_TZ, ambiguous=flags, nonexistent="shift_forward").tz_convert("UTC")
+
+
+def db_time_to_ns(dt: datetime) -> int:
+    """One database datetime -> UTC epoch ns; naive means DB_TZ, as in vn.py."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=DB_TZ)
+    return pd.Timestamp(dt).tz_convert("UTC").value
+
+
+class ImportManifest:
+    """
+    JSON sidecar: database identity -> series key -> {"last_ts_ns", "last_ts",
+    "rows", "source", "updated"}. `entries` are those of `database` (default:
+    the configured one); the other databases' sections are kept as they are.
+    """
+
+    def __init__(self, path: Optional[Path | str] = None, database: Optional[str] = None) -> None:
+        self.path = Path(path) if path else get_file_path(MANIFEST_NAME)
+        self.database = database or database_identity()
+        self.databases: Dict[str, Dict[str, dict]] = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if any("last_ts_ns" in v for v in data.values()):
+                # manifests written before they were keyed by database: the database is unknown
+                data = {"unknown": data}
+            self.databases = data
+        self.entries: Dict[str, dict] = self.databases.setdefault(self.database, {})
+
+    def watermark_ns(self, key: str) -> Optional[int]:
+        entry = self.entries.get(key)
+        return int(entry["last_ts_ns"]) if entry else None
+
+    def checkpoint(self, key: str, last_ts_ns: int, rows_added: int, source: str = "") -> None:
+        """Record a committed chunk; written atomically so a kill never leaves half a file."""
+        entry = self.entries.setdefault(key, {"rows": 0})
+        if entry.get("last_ts_ns") is None or last_ts_ns > int(entry["last_ts_ns"]):
+            entry["last_ts_ns"] = int(last_ts_ns)
+            entry["last_ts"] = ns_to_datetime(last_ts_ns).isoformat()
+        entry["rows"] = int(entry.get("rows", 0)) + int(rows_added)
+        entry["source"] = source
+        entry["updated"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.databases, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def overview_watermark_ns(
+    db: BaseDatabase,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+) -> Optional[int]:
+    """`overview.end` is naive DB_TZ; convert it to UTC epoch ns."""
+    for ov in db.get_bar_overview():
+        if ov.symbol == symbol and ov.exchange == exchange and ov.interval == interval and ov.end:
+            return db_time_to_ns(ov.end)
+    return None
+
+
+def has_bar_at(db: BaseDatabase, symbol: str, exchange: Exchange, interval: Interval, ts_ns: int) -> bool:
+    at = convert_tz(ns_to_datetime(ts_ns))  # naive DB_TZ, as the databases take it
+    return bool(db.load_bar_data(symbol, exchange, interval, at, at))
+
+
+def resolve_watermark_ns(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    manifest: ImportManifest,
+    db: Optional[BaseDatabase] = None,
+    log=print,
+) -> Optional[int]:
+    marked = manifest.watermark_ns(series_key(symbol, exchange, interval))
+    if db is None:
+        return marked
+    overview = overview_watermark_ns(db, symbol, exchange, interval)
+    if marked is None or (overview is not None and marked <= overview):
+        return overview
+    if has_bar_at(db, symbol, exchange, interval, marked):
+        return marked  # committed, but the overview was not refreshed (killed bulk import)
+    log(
+        f"[incremental] manifest watermark {ns_to_datetime(marked).isoformat()} of "
+        f"{series_key(symbol, exchange, interval)} is not in {manifest.database}; "
+        f"using the database's ({'none' if overview is None else ns_to_datetime(overview).isoformat()})"
+    )
+    return overview
@@ -184,6 +184,10 @@ class DynamicHedgedRebateGridStrategy(CtaTemplate):
 
         self.put_event()
 
+    def can_skip_quiet_bars(self) -> bool:
+        """网格铺好后 on_bar 不再有动作，回测可跳过不触及任何挂单的K线（见 vnpy_grid.backtest.skipping）。"""
+        return self.inited_price_ready
+
     def on_order(self, _order: OrderData):
         return
 
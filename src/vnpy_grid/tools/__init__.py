@@ -10,4 +10,6 @@ __all__ = [
     "run_backtest_dhrg_streaming",
     "import_h5_to_vnpy_sqlite",
     "convert_h5_to_table",
+    "bench_build_bars",
+    "import_h5_batch",
 ]
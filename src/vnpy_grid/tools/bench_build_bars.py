@@ -0,0 +1,131 @@
+"""
+Benchmark the columnar `build_bars` against the previous per-row loop.
+
+Usage:
+  python -X utf8 -m vnpy_grid.tools.bench_build_bars --h5 ETHUSDT_1m.h5 --rows 500000
+  python -X utf8 -m vnpy_grid.tools.bench_build_bars --rows 500000   # generated random walk
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+from vnpy_grid.data.import_h5_to_vnpy import (
+    ColumnMap,
+    build_bars,
+    infer_columns,
+    parse_dt_col,
+)
+
+
+def build_bars_rowwise(
+    df: pd.DataFrame,
+    cmap: ColumnMap,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    gateway_name: str = "BACKTEST",
+) -> List[BarData]:
+    """Reference implementation: the original `build_bars` loop, kept for comparison only."""
+    dt_idx = parse_dt_col(df[cmap.time])
+    opens = pd.to_numeric(df[cmap.open], errors="coerce")
+    highs = pd.to_numeric(df[cmap.high], errors="coerce")
+    lows = pd.to_numeric(df[cmap.low], errors="coerce")
+    closes = pd.to_numeric(df[cmap.close], errors="coerce")
+    vols = pd.to_numeric(df[cmap.volume], errors="coerce") if cmap.volume else None
+    tos = pd.to_numeric(df[cmap.turnover], errors="coerce") if cmap.turnover else None
+
+    bars: List[BarData] = []
+    for i in range(len(df)):
+        dt = dt_idx.iloc[i]
+        if pd.isna(dt):
+            continue
+        dt_py = dt.to_pydatetime().replace(tzinfo=timezone.utc)
+        o = float(opens.iloc[i]) if pd.notna(opens.iloc[i]) else 0.0
+        h = float(highs.iloc[i]) if pd.notna(highs.iloc[i]) else 0.0
+        l = float(lows.iloc[i]) if pd.notna(lows.iloc[i]) else 0.0
+        c = float(closes.iloc[i]) if pd.notna(closes.iloc[i]) else 0.0
+        v = float(vols.iloc[i]) if (vols is not None and pd.notna(vols.iloc[i])) else 0.0
+        to = float(tos.iloc[i]) if (tos is not None and pd.notna(tos.iloc[i])) else 0.0
+        bars.append(BarData(
+            gateway_name=gateway_name,
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt_py,
+            interval=interval,
+            volume=v,
+            turnover=to,
+            open_interest=0.0,
+            open_price=o,
+            high_price=h,
+            low_price=l,
+            close_price=c,
+        ))
+    return bars
+
+
+def random_walk_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 1600.0 * np.exp(np.cumsum(rng.normal(0.0, 0.002, rows)))
+    open_ = np.concatenate(([1600.0], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.0005, rows)) * close
+    start_ms = 1_577_836_800_000  # 2020-01-01 UTC
+    return pd.DataFrame({
+        "open_time": start_ms + np.arange(rows, dtype="int64") * 60_000,
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(1.0, 100.0, rows),
+    })
+
+
+def load_frame(h5: Path, key: Optional[str], rows: int) -> pd.DataFrame:
+    with pd.HDFStore(h5, mode="r") as store:
+        use_key = key or store.keys()[0]
+        df = store.select(use_key, start=0, stop=rows)
+    if isinstance(df.index, pd.DatetimeIndex):
+        df = df.reset_index()
+    return df
+
+
+def timed(fn: Callable[[], List[BarData]]) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    bars = fn()
+    return time.perf_counter() - t0, len(bars)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare columnar build_bars with the per-row loop.")
+    ap.add_argument("--h5", type=Path, default=None, help="real H5 file; omit to use a generated random walk")
+    ap.add_argument("--key", type=str, default=None)
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--skip-loop", action="store_true", help="only time the columnar path")
+    args = ap.parse_args()
+
+    df = load_frame(args.h5, args.key, args.rows) if args.h5 else random_walk_frame(args.rows)
+    cmap = infer_columns(df)
+    kw = dict(symbol="ETHUSDT", exchange=Exchange.GLOBAL, interval=Interval.MINUTE)
+    print(f"rows={len(df)} columns={cmap}")
+
+    t_vec, n_vec = timed(lambda: build_bars(df, cmap, **kw))
+    print(f"columnar : {n_vec} bars in {t_vec:.3f}s -> {n_vec / max(t_vec, 1e-9):,.0f} rows/s")
+
+    if args.skip_loop:
+        return
+    t_loop, n_loop = timed(lambda: build_bars_rowwise(df, cmap, **kw))
+    print(f"row loop : {n_loop} bars in {t_loop:.3f}s -> {n_loop / max(t_loop, 1e-9):,.0f} rows/s")
+    print(f"speedup  : {t_loop / max(t_vec, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Scan datasets into the vnpy_grid catalog and show what is covered.
+
+Usage (PowerShell):
+  python -X utf8 -m vnpy_grid.tools.catalog scan "D:\\data\\*_1m_*.h5"
+  python -X utf8 -m vnpy_grid.tools.catalog series ETHUSDT --exchange GLOBAL --interval 1m
+  python -X utf8 -m vnpy_grid.tools.catalog list
+
+`scan` reads a file only when it is new or changed since it was catalogued;
+`list` never touches the data.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import time
+
+from vnpy_grid.data.catalog import DatasetCatalog, describe_h5, describe_series
+from vnpy_grid.data.import_h5_to_vnpy import resolve_exchange, resolve_interval
+
+
+def print_entries(catalog: DatasetCatalog) -> None:
+    if not catalog.entries:
+        print(f"catalog is empty: {catalog.path}")
+        return
+    for entry in catalog.entries.values():
+        cols = ", ".join(f"{k}={v}" for k, v in entry.columns.items() if v)
+        print(f"{entry.id} [{entry.storage}]")
+        print(f"    {entry.coverage()}")
+        print(f"    columns: {cols}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Dataset catalog: schema, row counts and time ranges.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    scan = sub.add_parser("scan", help="catalog H5 files (skipped when unchanged)")
+    scan.add_argument("patterns", nargs="+", help="file paths or glob patterns")
+    scan.add_argument("--key", default=None, help="H5 key, default: the first key")
+    scan.add_argument("--refresh", action="store_true", help="rescan even if the fingerprint matches")
+    series = sub.add_parser("series", help="catalog a vn.py database series")
+    series.add_argument("symbol")
+    series.add_argument("--exchange", default="GLOBAL")
+    series.add_argument("--interval", default="1m")
+    sub.add_parser("list", help="show all catalogued datasets")
+    args = ap.parse_args()
+
+    catalog = DatasetCatalog()
+    if args.command == "scan":
+        for pattern in args.patterns:
+            for path in sorted(glob.glob(pattern)) or [pattern]:
+                t0 = time.perf_counter()
+                entry = describe_h5(path, args.key, catalog, refresh=args.refresh)
+                print(f"{entry.id}: {entry.coverage()} ({time.perf_counter() - t0:.2f}s)")
+    elif args.command == "series":
+        entry = describe_series(
+            args.symbol, resolve_exchange(args.exchange), resolve_interval(args.interval), catalog
+        )
+        print(entry.coverage() if entry else "series not found in the database")
+    else:
+        print_entries(catalog)
+
+
+if __name__ == "__main__":
+    main()
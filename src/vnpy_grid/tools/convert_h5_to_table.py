@@ -2,17 +2,257 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from datetime import datetime
+from typing import List, Optional, Tuple
+
 import pandas as pd
+import tables
+
+from vnpy_grid.data.catalog import ChunkMapBuilder, DatasetCatalog, lookup_h5, new_h5_entry
+from vnpy_grid.data.import_h5_to_vnpy import iter_h5_chunks, parse_dt_col
 
-"""
+r"""
 灏嗙幇鏈?H5锛堝彲鑳戒负 fixed 瀛樺偍锛夎浆鎹负 table 鏍煎紡锛屽苟寤虹珛 datetime 鏃堕棿绱㈠紩浠ヤ究楂樻晥 where 鏌ヨ涓庡垎鍧楄鍙栥€?浣跨敤鏂瑰紡锛圥owerShell锛夛細
   python -X utf8 tools\convert_h5_to_table.py --src "C:\path\ETHUSDT_1m_2019-11-01_to_2025-06-15.h5" --dst ETHUSDT_1m_table.h5 --key /klines --datetime-col datetime
 
 娉ㄦ剰锛?- 杞崲閲囩敤鍒嗗潡璇诲彇锛坰tart/stop锛夛紝鍗曞潡榛樿 2e6 琛岋紱鑻ュ唴瀛樼揣寮犲彲璋冨皬銆?- 鑻ユ簮鏂囦欢宸茬粡鏄?table 鏍煎紡锛屽皢鐩存帴澶嶅埗涓烘柊鏂囦欢锛堜繚鐣?table锛夈€?"""
 
 
+TIME_NAMES = ("datetime", "time", "timestamp", "date")
+BENCH_COMPLIBS = ["blosc:zstd", "blosc:lz4", "blosc:lz4hc", "blosc:blosclz", "zlib", "bzip2", "none"]
+
+
+def detect_time_column(df: pd.DataFrame, hint: Optional[str] = None) -> Optional[str]:
+    if hint:
+        return hint if hint in df.columns else None
+    cols_lower = {c.lower(): c for c in df.columns}
+    for n in TIME_NAMES:
+        if n in cols_lower:
+            return cols_lower[n]
+    return None
+
+
+def to_time_indexed(df: pd.DataFrame, dt_col: str) -> pd.DataFrame:
+    """Same layout as before: naive (UTC) datetime index named after the source column."""
+    idx = pd.DatetimeIndex(parse_dt_col(df[dt_col])).tz_convert(None)
+    out = df.drop(columns=[dt_col])
+    out.index = idx.rename(dt_col)
+    return out.sort_index()
+
+
+def source_rows(store: pd.HDFStore, key: str) -> int:
+    storer = store.get_storer(key)
+    nrows = getattr(storer, "nrows", None)
+    return int(nrows if nrows is not None else storer.shape[0])
+
+
+@dataclass
+class ConvertReport:
+    rows: int = 0
+    src_rows: int = 0
+    dst_rows: int = 0
+    src_min: Optional[pd.Timestamp] = None
+    src_max: Optional[pd.Timestamp] = None
+    dst_min: Optional[pd.Timestamp] = None
+    dst_max: Optional[pd.Timestamp] = None
+    src_bytes: int = 0
+    dst_bytes: int = 0
+    write_s: float = 0.0
+    index_s: float = 0.0
+    unsorted_chunks: int = 0
+    problems: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def summary(self) -> str:
+        total = self.write_s + self.index_s
+        rate = self.rows / total if total else 0.0
+        mb = self.src_bytes / 2**20 / total if total else 0.0
+        ratio = self.src_bytes / self.dst_bytes if self.dst_bytes else 0.0
+        lines = [
+            f"rows={self.rows} in {total:.1f}s (write {self.write_s:.1f}s + index {self.index_s:.1f}s): "
+            f"{rate:,.0f} rows/s, {mb:.1f} MB/s of source",
+            f"size {self.src_bytes / 2**20:.1f} MB -> {self.dst_bytes / 2**20:.1f} MB (x{ratio:.2f})",
+            f"verify: rows {self.src_rows} -> {self.dst_rows}, "
+            f"min {self.src_min} -> {self.dst_min}, max {self.src_max} -> {self.dst_max}: "
+            + ("OK" if self.ok else "FAILED " + "; ".join(self.problems)),
+        ]
+        if self.unsorted_chunks:
+            lines.append(f"warning: {self.unsorted_chunks} chunks start before the previous chunk ended")
+        return "\n".join(lines)
+
+
+def convert_to_table(
+    src: Path,
+    dst: Path,
+    key: str,
+    dt_col: Optional[str] = None,
+    chunksize: int = 2_000_000,
+    complib: str = "blosc:zstd",
+    complevel: int = 5,
+    verify: bool = True,
+    catalog: Optional[DatasetCatalog] = None,
+) -> ConvertReport:
+    """
+    One streaming pass over `src[key]` (fixed or table) into a table-format `dst`.
+
+    The source stays open for the whole run and chunks are read by row slice.
+    The time column is detected once, rows are appended without indexing and
+    a single full (CSI) index on the time index is built at the end. The time
+    column comes from the catalog when the source is catalogued; the output is
+    catalogued (chunk map included) once it verifies.
+    """
+    report = ConvertReport(src_bytes=src.stat().st_size)
+    complevel = 0 if complib == "none" else complevel
+    t0 = time.perf_counter()
+    last_max = None
+    catalog = catalog or DatasetCatalog()
+    if dt_col is None:
+        entry = lookup_h5(src, key, catalog)
+        dt_col = entry.time_column if entry and entry.time_column in entry.dtypes else None
+    builder = ChunkMapBuilder()
+    with pd.HDFStore(src, mode="r") as s, pd.HDFStore(
+        dst, mode="w", complevel=complevel, complib=None if complib == "none" else complib
+    ) as d:
+        report.src_rows = source_rows(s, key)
+        for df in iter_h5_chunks(s, key, chunksize):
+            if dt_col is None or dt_col not in df.columns:
+                dt_col = detect_time_column(df, dt_col)
+                if not dt_col:
+                    raise ValueError(f"no time column among {list(df.columns)}")
+            df = to_time_indexed(df, dt_col)
+            lo, hi = df.index.min(), df.index.max()
+            if last_max is not None and lo < last_max:
+                report.unsorted_chunks += 1
+            last_max = hi if last_max is None else max(last_max, hi)
+
+            d.append(key, df, format="table", data_columns=True, index=False)
+            builder.push(len(df), df.index.as_unit("ns").asi8)
+            report.rows += len(df)
+            print(f"[convert] {report.rows}/{report.src_rows} rows")
+        report.write_s = time.perf_counter() - t0
+
+        t1 = time.perf_counter()
+        if report.rows:
+            d.create_table_index(key, columns=["index"], optlevel=9, kind="full")
+        report.index_s = time.perf_counter() - t1
+
+    report.dst_bytes = dst.stat().st_size
+    if verify:
+        verify_table(dst, key, report, src, dt_col, chunksize)
+    if report.ok and report.rows:
+        with pd.HDFStore(dst, mode="r") as d:
+            entry = new_h5_entry(dst, key, d, d.select(key, start=0, stop=1))
+        entry.apply_builder(builder)
+        catalog.put(entry)
+    return report
+
+
+def source_time_bounds(
+    src: Path, key: str, dt_col: str, chunksize: int = 2_000_000
+) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """
+    Min/max time of `src[key]` in a read of its own, not taken from the
+    converted chunks: the time column alone on tables, chunk by chunk otherwise.
+    """
+    lo = hi = None
+    with pd.HDFStore(src, mode="r") as s:
+        try:
+            parts = [s.select_column(key, dt_col)]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            parts = (df[dt_col] for df in iter_h5_chunks(s, key, chunksize))
+        for part in parts:
+            idx = pd.DatetimeIndex(parse_dt_col(part)).tz_convert(None)
+            if len(idx):
+                lo = idx.min() if lo is None else min(lo, idx.min())
+                hi = idx.max() if hi is None else max(hi, idx.max())
+    return lo, hi
+
+
+def verify_table(
+    dst: Path,
+    key: str,
+    report: ConvertReport,
+    src: Optional[Path] = None,
+    dt_col: Optional[str] = None,
+    chunksize: int = 2_000_000,
+) -> None:
+    """
+    Compare row count and min/max time of `dst` (index column only) with the
+    source; the source bounds are read from `src` independently of the conversion.
+    """
+    if src is not None and dt_col is not None and report.src_rows:
+        report.src_min, report.src_max = source_time_bounds(src, key, dt_col, chunksize)
+    with pd.HDFStore(dst, mode="r") as d:
+        report.dst_rows = source_rows(d, key) if key in d.keys() else 0
+        if report.dst_rows:
+            idx = pd.DatetimeIndex(d.select_column(key, "index"))
+            report.dst_min, report.dst_max = idx.min(), idx.max()
+    if report.dst_rows != report.src_rows:
+        report.problems.append(f"row count {report.dst_rows} != {report.src_rows}")
+    if (report.dst_min, report.dst_max) != (report.src_min, report.src_max):
+        report.problems.append("min/max timestamp mismatch")
+
+
+def benchmark_compressors(
+    src: Path,
+    key: str,
+    dt_col: Optional[str] = None,
+    sample_rows: int = 500_000,
+    complibs: Optional[List[str]] = None,
+    complevel: int = 5,
+) -> pd.DataFrame:
+    """
+    Write the first `sample_rows` rows with each compressor and time the two
+    reads backtests do: a full sequential scan and a 1/30 time-range `where`.
+    """
+    with pd.HDFStore(src, mode="r") as s:
+        df = s.select(key, start=0, stop=sample_rows)
+    dt_col = detect_time_column(df, dt_col)
+    if not dt_col:
+        raise ValueError(f"no time column among {list(df.columns)}")
+    df = to_time_indexed(df, dt_col)
+    raw_bytes = int(df.memory_usage(index=True, deep=True).sum())
+    lo, hi = df.index[len(df) // 2], df.index[min(len(df) // 2 + len(df) // 30, len(df) - 1)]
+    where = f"index >= '{lo.isoformat()}' & index <= '{hi.isoformat()}'"
+
+    rows = []
+    available = [c for c in (complibs or BENCH_COMPLIBS) if c == "none" or tables.which_lib_version(c)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for complib in available:
+            path = Path(tmp) / f"{complib.replace(':', '_')}.h5"
+            t0 = time.perf_counter()
+            with pd.HDFStore(
+                path, mode="w", complevel=0 if complib == "none" else complevel,
+                complib=None if complib == "none" else complib,
+            ) as d:
+                d.append(key, df, format="table", data_columns=True, index=False)
+                d.create_table_index(key, columns=["index"], optlevel=9, kind="full")
+            write_s = time.perf_counter() - t0
+            with pd.HDFStore(path, mode="r") as d:
+                t0 = time.perf_counter()
+                d.select(key)
+                scan_s = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                d.select(key, where=where)
+                range_s = time.perf_counter() - t0
+            size = path.stat().st_size
+            rows.append({
+                "complib": complib,
+                "ratio": raw_bytes / size,
+                "MB": size / 2**20,
+                "write_MB/s": raw_bytes / 2**20 / write_s,
+                "scan_MB/s": raw_bytes / 2**20 / scan_s,
+                "range_ms": range_s * 1000,
+            })
+    return pd.DataFrame(rows).set_index("complib").sort_values("scan_MB/s", ascending=False)
+
+
 def main():
     import argparse
     ap = argparse.ArgumentParser()
@@ -21,6 +261,11 @@ def main():
     ap.add_argument("--key", required=False, type=str, default="/klines")
     ap.add_argument("--datetime-col", required=False, type=str, default=None, help="鏃堕棿鍒楀悕锛屾湭鎻愪緵鍒欒嚜鍔ㄦ帰娴?")
     ap.add_argument("--chunksize", required=False, type=int, default=2_000_000)
+    ap.add_argument("--complib", default="blosc:zstd", help=f"one of {', '.join(BENCH_COMPLIBS)}")
+    ap.add_argument("--complevel", type=int, default=5)
+    ap.add_argument("--no-verify", action="store_true", help="skip the row count / min-max check of the output")
+    ap.add_argument("--benchmark", action="store_true", help="compare compressors on a sample and exit")
+    ap.add_argument("--sample-rows", type=int, default=500_000, help="rows used by --benchmark")
     args = ap.parse_args()
 
     src = Path(args.src)
@@ -32,69 +277,30 @@ def main():
     with pd.HDFStore(src, mode="r") as s:
         keys = s.keys()
         if args.key not in keys:
-            print(f"鈿狅笍 鎸囧畾 key {args.key} 涓嶅湪鏂囦欢涓紝鍙敤 keys: {list(keys)}")
+            print(f"鈿狅笍 鎸囧畾 key {args.key} 涓嶅湪鏂囦欢涓紝鍙敤 keys: {list(keys)}")
             sys.exit(1)
         storer = s.get_storer(args.key)
         is_table = getattr(storer, "is_table", False)
-        print(f"[婧愭枃浠禲 key={args.key} is_table={is_table} rows={getattr(storer, 'nrows', 'unknown')}")
-
-        if is_table:
-            # 鐩存帴澶嶅埗鏁翠釜 store 鐨勮 key 鍒版柊鏂囦欢
-            print("[淇℃伅] 婧愬凡涓?table锛屾墽琛岄噸鍐欙紙鍘嬬缉锛夊鍒?")
-            # 閫愬潡璇诲彇浠ラ伩鍏嶅唴瀛樺嘲鍊?
-            start = 0
-            total_rows = getattr(storer, "nrows", None)
-            with pd.HDFStore(dst, mode="w", complevel=5, complib="blosc:zstd") as d:
-                while True:
-                    stop = start + args.chunksize
-                    df = pd.read_hdf(str(src), key=args.key, start=start, stop=stop)
-                    if df is None or len(df) == 0:
-                        break
-                    # 纭繚瀛樺湪 datetime 鍒?
-                    dt_col = args.datetime_col
-                    if not dt_col:
-                        cols_lower = {c.lower(): c for c in df.columns}
-                        for n in ("datetime", "time", "timestamp", "date"):
-                            if n in cols_lower:
-                                dt_col = cols_lower[n]
-                                break
-                    if not dt_col:
-                        print("鉁?鏃犳硶璇嗗埆鏃堕棿鍒?")
-                        sys.exit(1)
-                    df[dt_col] = pd.to_datetime(df[dt_col], errors="coerce")
-                    df = df.set_index(dt_col)
-                    df = df.sort_index()
-                    d.append(args.key, df, format="table", data_columns=True, index=True)
-                    start = stop
-            print(f"鉁?宸插啓鍑?table 鏂囦欢: {dst}")
-        else:
-            # fixed -> table
-            print("[淇℃伅] 婧愪负 fixed锛屽皢鎸夎鍒囩墖杞崲涓?table")
-            start = 0
-            with pd.HDFStore(dst, mode="w", complevel=5, complib="blosc:zstd") as d:
-                while True:
-                    stop = start + args.chunksize
-                    df = pd.read_hdf(str(src), key=args.key, start=start, stop=stop)
-                    if df is None or len(df) == 0:
-                        break
-                    # 璇嗗埆鏃堕棿鍒?
-                    dt_col = args.datetime_col
-                    if not dt_col:
-                        cols_lower = {c.lower(): c for c in df.columns}
-                        for n in ("datetime", "time", "timestamp", "date"):
-                            if n in cols_lower:
-                                dt_col = cols_lower[n]
-                                break
-                    if not dt_col:
-                        print("鉁?鏃犳硶璇嗗埆鏃堕棿鍒?")
-                        sys.exit(1)
-                    df[dt_col] = pd.to_datetime(df[dt_col], errors="coerce")
-                    df = df.set_index(dt_col)
-                    df = df.sort_index()
-                    d.append(args.key, df, format="table", data_columns=True, index=True)
-                    print(f"[鍐欏叆] rows {start}-{stop} -> appended")
-                    start = stop
-            print(f"鉁?宸插畬鎴?fixed->table 杞崲: {dst}")
+        print(f"[婧愭枃浠禲 key={args.key} is_table={is_table} rows={source_rows(s, args.key)}")
+
+    if args.benchmark:
+        table = benchmark_compressors(src, args.key, args.datetime_col, args.sample_rows, complevel=args.complevel)
+        with pd.option_context("display.float_format", "{:,.2f}".format):
+            print(table.to_string())
+        return
+
+    report = convert_to_table(
+        src, dst, args.key,
+        dt_col=args.datetime_col,
+        chunksize=args.chunksize,
+        complib=args.complib,
+        complevel=args.complevel,
+        verify=not args.no_verify,
+    )
+    print(report.summary())
+    if not report.ok:
+        sys.exit(2)
+    print(f"鉁?宸插啓鍑?table 鏂囦欢: {dst}")
 
 
 if __name__ == "__main__":
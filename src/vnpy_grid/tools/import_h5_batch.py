@@ -0,0 +1,299 @@
+"""
+Parallel import of many H5 files (one per symbol/year) into vn.py SQLite.
+
+Parsing and columnar conversion run in a process pool. A worker spools every
+converted chunk to a temporary `.npz` file and only returns their paths; the
+parent owns exactly one `SqliteBulkWriter` per database file and writes the
+spooled chunks of each file in submission order, one chunk in memory at a
+time. SQLite therefore only ever sees one writer, HDF decoding uses all
+cores, and peak memory is bounded by the chunk size rather than the file size.
+A file is written in one transaction; one that fails to convert or to write
+is reported, leaves no rows behind, and the batch goes on.
+With `--catalog`, files read in full are recorded in the dataset catalog.
+
+Usage (PowerShell):
+  python -X utf8 -m vnpy_grid.tools.import_h5_batch --glob "D:\\data\\*_1m_*.h5" --exchange GLOBAL
+  python -X utf8 -m vnpy_grid.tools.import_h5_batch --manifest jobs.json --workers 8
+
+File names like `ETHUSDT_1m_2019-11-01_to_2025-06-15.h5` provide symbol and
+interval when `--symbol`/`--interval` are omitted. A manifest is a JSON list
+(or CSV with a header) of {path, symbol, exchange, interval, key?, db?}.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+from pandas import HDFStore
+
+from vnpy_grid.data.catalog import ChunkMapBuilder, DatasetCatalog, DatasetEntry, lookup_h5, new_h5_entry
+from vnpy_grid.data.import_h5_to_vnpy import (
+    BarArrays,
+    frame_to_arrays,
+    infer_columns,
+    iter_h5_chunks,
+    resolve_exchange,
+    resolve_interval,
+)
+from vnpy_grid.data.quality import QualityIndex, QualityScanner
+from vnpy_grid.data.sqlite_bulk import SqliteBulkWriter, default_sqlite_path, require_sqlite_database
+from vnpy_grid.data.watermark import ns_to_datetime
+
+
+@dataclass
+class ImportJob:
+    path: str
+    symbol: str
+    exchange: str
+    interval: str
+    key: Optional[str] = None
+    db: Optional[str] = None
+
+
+@dataclass
+class FileResult:
+    job: ImportJob
+    parts: List[str]  # spooled chunk files, in read order
+    rows: int
+    first_ns: Optional[int]
+    last_ns: Optional[int]
+    convert_s: float
+    scanner: Optional[QualityScanner] = None
+    entry: Optional[DatasetEntry] = None  # fresh catalog entry when recording a file not catalogued yet
+
+
+@dataclass
+class FileSummary:
+    job: ImportJob
+    rows: int
+    first_ns: Optional[int]
+    last_ns: Optional[int]
+    convert_s: float
+    write_s: float
+    error: str = ""
+
+
+def spool_arrays(arrays: BarArrays, path: str) -> None:
+    np.savez(path, **{f.name: getattr(arrays, f.name) for f in fields(BarArrays)})
+
+
+def load_spooled(path: str) -> BarArrays:
+    with np.load(path) as data:
+        return BarArrays(**{f.name: data[f.name] for f in fields(BarArrays)})
+
+
+def load_file(
+    job: ImportJob,
+    spool_dir: str,
+    chunk_rows: int = 500_000,
+    validate: bool = False,
+    update_catalog: bool = False,
+) -> FileResult:
+    """Worker: read, convert and optionally validate one file, spooling each chunk (runs in a child process)."""
+    t0 = time.perf_counter()
+    parts: List[str] = []
+    rows = 0
+    first_ns: Optional[int] = None
+    last_ns: Optional[int] = None
+    scanner = QualityScanner(resolve_interval(job.interval)) if validate else None
+    prefix = tempfile.mkdtemp(prefix=Path(job.path).stem[:40] + "_", dir=spool_dir)
+    with HDFStore(job.path, mode="r") as store:
+        use_key = job.key or store.keys()[0]
+        entry = lookup_h5(job.path, use_key)
+        cmap = entry.column_map() if entry else None
+        builder = ChunkMapBuilder() if update_catalog and entry is None else None
+        for df in iter_h5_chunks(store, use_key, chunk_rows):
+            cmap = cmap or infer_columns(df)
+            arrays = frame_to_arrays(df, cmap)
+            if builder is not None:
+                builder.push(len(df), arrays.ts_ns)
+            if not len(arrays):
+                continue
+            if scanner is not None:
+                scanner.push(arrays)
+            lo, hi = int(arrays.ts_ns.min()), int(arrays.ts_ns.max())
+            first_ns = lo if first_ns is None else min(first_ns, lo)
+            last_ns = hi if last_ns is None else max(last_ns, hi)
+            rows += len(arrays)
+            parts.append(os.path.join(prefix, f"{len(parts):06d}.npz"))
+            spool_arrays(arrays, parts[-1])
+        if builder is not None and builder.rows:
+            entry = new_h5_entry(job.path, use_key, store, store.select(use_key, start=0, stop=1))
+            entry.apply_builder(builder)
+        else:
+            entry = None
+    return FileResult(job, parts, rows, first_ns, last_ns, time.perf_counter() - t0, scanner, entry)
+
+
+def jobs_from_glob(pattern: str, symbol: Optional[str], exchange: str, interval: Optional[str]) -> List[ImportJob]:
+    jobs: List[ImportJob] = []
+    for path in sorted(glob.glob(pattern)):
+        tokens = Path(path).stem.split("_")
+        sym = symbol or tokens[0]
+        itv = interval or (tokens[1] if len(tokens) > 1 else "")
+        if not itv:
+            raise ValueError(f"cannot infer interval from file name, pass --interval: {path}")
+        jobs.append(ImportJob(path=path, symbol=sym, exchange=exchange, interval=itv))
+    return jobs
+
+
+def jobs_from_manifest(path: Path) -> List[ImportJob]:
+    if path.suffix.lower() == ".csv":
+        with path.open(encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        rows = json.loads(path.read_text(encoding="utf-8"))
+    return [
+        ImportJob(**{k: (v or None) if k in ("key", "db") else v for k, v in row.items()})
+        for row in rows
+    ]
+
+
+def write_result(
+    writers: Dict[str, SqliteBulkWriter],
+    result: FileResult,
+    catalog: Optional[DatasetCatalog] = None,
+) -> FileSummary:
+    """Write the spooled chunks of one file, one at a time, in one transaction: a failed file leaves no rows."""
+    job = result.job
+    exchange, interval = resolve_exchange(job.exchange), resolve_interval(job.interval)
+    if not job.db:
+        require_sqlite_database()  # the configured database must be the file we write
+    db_path = str(Path(job.db) if job.db else default_sqlite_path())
+    writer = writers.get(db_path)
+    if writer is None:
+        writer = writers[db_path] = SqliteBulkWriter(db_path).open()
+
+    t0 = time.perf_counter()
+    n = 0
+    with writer.atomic():
+        for part in result.parts:
+            n += writer.write_arrays(load_spooled(part), job.symbol, exchange, interval)
+            os.remove(part)
+    if result.scanner is not None:
+        QualityIndex.for_series(job.symbol, exchange, interval).record(result.scanner)
+    if result.entry is not None and catalog is not None:
+        catalog.put(result.entry)
+    return FileSummary(
+        job=job,
+        rows=n,
+        first_ns=result.first_ns,
+        last_ns=result.last_ns,
+        convert_s=result.convert_s,
+        write_s=time.perf_counter() - t0,
+    )
+
+
+def print_summary(summaries: List[FileSummary], elapsed: float) -> None:
+    def fmt(ns: Optional[int]) -> str:
+        return ns_to_datetime(ns).strftime("%Y-%m-%d %H:%M") if ns is not None else "-"
+
+    header = f"{'file':<44} {'series':<22} {'rows':>10} {'first':>16} {'last':>16} {'conv s':>7} {'write s':>7}"
+    print(header)
+    print("-" * len(header))
+    for s in summaries:
+        series = f"{s.job.symbol}.{s.job.exchange}.{s.job.interval}"
+        name = Path(s.job.path).name[-44:]
+        if s.error:
+            print(f"{name:<44} {series:<22} FAILED: {s.error}")
+            continue
+        print(
+            f"{name:<44} {series:<22} {s.rows:>10} {fmt(s.first_ns):>16} {fmt(s.last_ns):>16} "
+            f"{s.convert_s:>7.1f} {s.write_s:>7.1f}"
+        )
+    total = sum(s.rows for s in summaries)
+    print("-" * len(header))
+    print(f"{len(summaries)} files, {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def run_batch(
+    jobs: List[ImportJob],
+    workers: Optional[int] = None,
+    chunk_rows: int = 500_000,
+    validate: bool = False,
+    update_catalog: bool = False,
+) -> List[FileSummary]:
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    summaries: List[FileSummary] = []
+    writers: Dict[str, SqliteBulkWriter] = {}
+    catalog = DatasetCatalog() if update_catalog else None
+
+    # keep at most 2 files per worker in flight so spooled chunks cannot pile up on disk
+    window = max(2 * workers, 1)
+    pending: Deque[tuple[ImportJob, Future]] = deque()
+    queue = list(jobs)
+    spool_dir = tempfile.mkdtemp(prefix="vnpy_grid_batch_")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while queue or pending:
+                while queue and len(pending) < window:
+                    job = queue.pop(0)
+                    fut = pool.submit(load_file, job, spool_dir, chunk_rows, validate, update_catalog)
+                    pending.append((job, fut))
+                job, fut = pending.popleft()
+                try:
+                    result = fut.result()
+                except Exception as exc:
+                    summaries.append(FileSummary(job, 0, None, None, 0.0, 0.0, error=repr(exc)))
+                    continue
+                try:
+                    summary = write_result(writers, result, catalog)
+                except Exception as exc:
+                    summary = FileSummary(job, 0, None, None, result.convert_s, 0.0, error=f"write: {exc!r}")
+                    print(f"[batch] {Path(job.path).name}: write failed: {exc!r}")
+                else:
+                    print(f"[batch] {Path(job.path).name}: {summary.rows} rows")
+                finally:
+                    for part in result.parts:
+                        if os.path.exists(part):
+                            os.remove(part)
+                summaries.append(summary)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+    print_summary(summaries, time.perf_counter() - t0)
+    return summaries
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Import many H5 files in parallel (one SQLite writer per DB).")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--glob", help="file pattern, e.g. data/*_1m_*.h5")
+    src.add_argument("--manifest", type=Path, help="JSON list or CSV of jobs")
+    ap.add_argument("--symbol", default=None, help="override symbol for --glob (default: file name prefix)")
+    ap.add_argument("--exchange", default="GLOBAL")
+    ap.add_argument("--interval", default=None, help="override interval for --glob (default: 2nd name token)")
+    ap.add_argument("--workers", type=int, default=None, help="process count, default: all cores")
+    ap.add_argument("--chunk", type=int, default=500_000, help="rows per HDF read inside a worker")
+    ap.add_argument("--validate", action="store_true", help="record gaps and bad OHLC rows in the quality index")
+    ap.add_argument("--catalog", action="store_true", help="record uncatalogued files in the dataset catalog")
+    args = ap.parse_args()
+
+    if args.glob:
+        jobs = jobs_from_glob(args.glob, args.symbol, args.exchange, args.interval)
+    else:
+        jobs = jobs_from_manifest(args.manifest)
+    if not jobs:
+        print("no files matched")
+        return
+    run_batch(jobs, workers=args.workers, chunk_rows=args.chunk, validate=args.validate, update_catalog=args.catalog)
+
+
+if __name__ == "__main__":
+    main()
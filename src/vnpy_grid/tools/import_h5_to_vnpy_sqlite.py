@@ -1,14 +1,19 @@
 from __future__ import annotations
 import os
-import sys
-from datetime import datetime, timezone
+from contextlib import nullcontext
+from datetime import timezone
+from typing import Iterator
 
+import numpy as np
 import pandas as pd
 
 from vnpy.trader.object import BarData
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.database import get_database
 
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays
+from vnpy_grid.data.sqlite_bulk import SqliteBulkWriter
+
 # 浣跨敤锛?#   python -X utf8 tools/import_h5_to_vnpy_sqlite.py ETHUSDT_1m_2019-11-01_to_2025-06-15.h5 ETHUSDT.GLOBAL 1m
 # 璇存槑锛?#   - 鐩存帴瀵煎叆浣犲凡鏈夌殑 HDF5 K绾垮埌 vn.py SQLite 鏁版嵁搴擄紝涓嶉渶瑕侀噸鏂颁笅杞姐€?#   - VT_SYMBOL 鐨勪氦鏄撴墍鏋氫妇蹇呴』鏄?vn.py 鍐呯疆锛堟棤 BINANCE/OKX锛夛紝鎺ㄨ崘鐢?GLOBAL 琛ㄧず澶栫洏/鍔犲瘑銆?#   - 鍒楀悕鍏煎锛歰pen/high/low/close/volume 鎴?Open/High/Low/Close/Volume锛涙椂闂村垪 index 鎴?columns 涓寘鍚?time/datetime/date銆?
 COL_CANDIDATES = {
@@ -74,7 +79,32 @@ def row_to_bar(symbol: str, exchange: Exchange, interval: Interval, ts: pd.Times
     )
 
 
-def import_h5(path: str, vt_symbol: str, interval_str: str) -> None:
+def frame_to_bar_arrays(df: pd.DataFrame) -> BarArrays:
+    """Prepared frame (UTC DatetimeIndex, renamed OHLCV) -> columnar arrays for the bulk writer."""
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is None:
+        idx = idx.tz_localize("UTC")
+    n = len(df)
+    return BarArrays(
+        ts_ns=idx.as_unit("ns").asi8,
+        open=df["open"].to_numpy(dtype="float64"),
+        high=df["high"].to_numpy(dtype="float64"),
+        low=df["low"].to_numpy(dtype="float64"),
+        close=df["close"].to_numpy(dtype="float64"),
+        volume=df["volume"].fillna(0.0).to_numpy(dtype="float64"),
+        turnover=np.zeros(n, dtype="float64"),
+    )
+
+
+def import_h5(
+    path: str,
+    vt_symbol: str,
+    interval_str: str,
+    bulk: bool = False,
+    stream: bool = False,
+    row_budget: int = 200_000,
+    key: str | None = None,
+) -> None:
     if "." not in vt_symbol:
         raise ValueError("VT_SYMBOL 蹇呴』褰㈠ SYMBOL.EXCHANGE锛屼緥濡?ETHUSDT.GLOBAL")
     symbol, exch_str = vt_symbol.split(".")
@@ -92,42 +122,169 @@ def import_h5(path: str, vt_symbol: str, interval_str: str) -> None:
     if not os.path.exists(path):
         raise FileNotFoundError(path)
 
-    df = pd.read_hdf(path)
+    if stream:
+        _import_streaming(path, key, symbol, exchange, interval, bulk=bulk, row_budget=row_budget)
+        return
+
+    df = pd.read_hdf(path, key=key)
     if not isinstance(df, pd.DataFrame):
         raise TypeError("read_hdf did not return a DataFrame")
 
     df = ensure_datetime_index(df)
-    df = df.sort_index()
+    df = prepare_frame(df, resolve_mapping(df)).sort_index()
 
+    if bulk:
+        with SqliteBulkWriter() as writer:
+            n = writer.write_arrays(frame_to_bar_arrays(df), symbol, exchange, interval)
+        print(f"Imported bars (bulk): {n} into {vt_symbol} {interval.value}")
+        return
+
+    n = save_frame(get_database(), df, symbol, exchange, interval, stream=True)
+    print(f"Imported bars: {n} into {vt_symbol} {interval.value}")
+
+
+def resolve_mapping(df: pd.DataFrame) -> dict[str, str]:
     mapping = {}
     for k, cands in COL_CANDIDATES.items():
         col = pick_col(df, cands)
         if not col:
             raise KeyError(f"Missing column for {k}, candidates={cands}")
         mapping[k] = col
-    df = df.rename(columns={
-        mapping["open"]: "open",
-        mapping["high"]: "high",
-        mapping["low"]: "low",
-        mapping["close"]: "close",
-        mapping["volume"]: "volume",
-    })
+    return mapping
+
 
+def prepare_frame(df: pd.DataFrame, mapping: dict[str, str]) -> pd.DataFrame:
+    """UTC DatetimeIndex, canonical OHLCV names, rows without time/price removed."""
+    df = ensure_datetime_index(df)
+    df = df.rename(columns={col: k for k, col in mapping.items()})
     df = df[~df.index.isna()]
-    df = df.dropna(subset=["open", "high", "low", "close"])  # 閲忓彲绌?
-    bars: list[BarData] = [row_to_bar(symbol, exchange, interval, ts, row) for ts, row in df.iterrows()]
+    return df.dropna(subset=["open", "high", "low", "close"])  # 閲忓彲绌?
 
-    db = get_database()
+
+def save_frame(db, df: pd.DataFrame, symbol: str, exchange: Exchange, interval: Interval, stream: bool) -> int:
+    bars: list[BarData] = [row_to_bar(symbol, exchange, interval, ts, row) for ts, row in df.iterrows()]
     batch = 5000
     for i in range(0, len(bars), batch):
-        ok = db.save_bar_data(bars[i:i + batch], stream=True)
+        ok = db.save_bar_data(bars[i:i + batch], stream=stream)
         if not ok:
             raise RuntimeError(f"save_bar_data failed at batch {i}")
-    print(f"Imported bars: {len(bars)} into {vt_symbol} {interval.value}")
+    return len(bars)
+
+
+def iter_h5_slices(path: str, key: str | None, rows: int) -> Iterator[pd.DataFrame]:
+    """Yield consecutive row slices of one H5 key; works for table and fixed stores."""
+    with pd.HDFStore(path, mode="r") as store:
+        use_key = key or store.keys()[0]
+        start = 0
+        while True:
+            df = store.select(use_key, start=start, stop=start + rows)
+            if df is None or not len(df):
+                return
+            yield df
+            start += rows
+
+
+class OrderedChunker:
+    """
+    Carry state across chunks so the emitted stream is strictly increasing in time.
+
+    Duplicates keep the last occurrence (as the DB upsert would). The newest row
+    of every chunk is held back until the next chunk proves no duplicate of it
+    follows. Rows older than what was already emitted are returned separately
+    as `late` so the caller can upsert them without corrupting stream overviews.
+    """
+
+    def __init__(self) -> None:
+        self.carry: pd.DataFrame | None = None
+        self.last_emitted: pd.Timestamp | None = None
+        self.late_rows = 0
+
+    def push(self, df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        if self.carry is not None:
+            df = pd.concat([self.carry, df])
+        df = df[~df.index.duplicated(keep="last")].sort_index(kind="stable")
+
+        late = df.iloc[:0]
+        if self.last_emitted is not None:
+            is_late = df.index <= self.last_emitted
+            late = df[is_late]
+            df = df[~is_late]
+            self.late_rows += len(late)
+
+        self.carry = df.iloc[-1:] if len(df) else None
+        emit = df.iloc[:-1]
+        if len(emit):
+            self.last_emitted = emit.index[-1]
+        return emit, late
+
+    def flush(self) -> pd.DataFrame:
+        tail, self.carry = self.carry, None
+        if tail is not None and len(tail):
+            self.last_emitted = tail.index[-1]
+            return tail
+        return pd.DataFrame()
+
+
+def _import_streaming(
+    path: str,
+    key: str | None,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    bulk: bool,
+    row_budget: int,
+) -> None:
+    """Read, convert and write `row_budget` rows at a time; peak memory does not grow with the file."""
+    chunker = OrderedChunker()
+    mapping: dict[str, str] | None = None
+    total = 0
+
+    writer = SqliteBulkWriter() if bulk else None
+    db = None if writer else get_database()
+
+    def write(df: pd.DataFrame, in_order: bool) -> int:
+        if not len(df):
+            return 0
+        if writer is not None:
+            return writer.write_arrays(frame_to_bar_arrays(df), symbol, exchange, interval)
+        # late rows go through the non-stream path so the overview is recounted
+        return save_frame(db, df, symbol, exchange, interval, stream=in_order)
+
+    with writer or nullcontext():
+        for raw in iter_h5_slices(path, key, row_budget):
+            if mapping is None:
+                mapping = resolve_mapping(ensure_datetime_index(raw))
+            emit, late = chunker.push(prepare_frame(raw, mapping))
+            del raw
+            total += write(emit, in_order=True)
+            total += write(late, in_order=False)
+            print(f"[stream] {total} rows written (late={chunker.late_rows})")
+        total += write(chunker.flush(), in_order=True)
+
+    if chunker.late_rows:
+        print(f"[WARN] {chunker.late_rows} rows arrived out of order and were upserted; consider sorting the source")
+    print(f"Imported bars (stream): {total} into {symbol}.{exchange.value} {interval.value}")
+
+
+def main() -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(
+        usage="python -X utf8 tools/import_h5_to_vnpy_sqlite.py <h5_path> <VT_SYMBOL> <interval> [--bulk] [--stream --rows N]"
+    )
+    ap.add_argument("h5_path")
+    ap.add_argument("vt_symbol")
+    ap.add_argument("interval")
+    ap.add_argument("--key", default=None, help="H5 key, defaults to the first one")
+    ap.add_argument("--bulk", action="store_true", help="bulk-load via sqlite3 executemany, deferred index")
+    ap.add_argument("--stream", action="store_true", help="read/convert/write chunk by chunk with bounded memory")
+    ap.add_argument("--rows", type=int, default=200_000, help="row budget per chunk in --stream mode")
+    args = ap.parse_args()
+    import_h5(
+        args.h5_path, args.vt_symbol, args.interval,
+        bulk=args.bulk, stream=args.stream, row_budget=args.rows, key=args.key,
+    )
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Usage: python -X utf8 tools/import_h5_to_vnpy_sqlite.py <h5_path> <VT_SYMBOL> <interval>")
-        sys.exit(2)
-    import_h5(sys.argv[1], sys.argv[2], sys.argv[3])
+    main()
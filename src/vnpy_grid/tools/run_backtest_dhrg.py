@@ -1,5 +1,6 @@
 from __future__ import annotations
 from datetime import datetime
+import argparse
 from pathlib import Path
 import json
 import sys
@@ -12,6 +13,7 @@ if str(ROOT) not in sys.path:
 from vnpy.trader.constant import Interval
 from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
 
+from vnpy_grid.data.bar_cache import load_engine_history
 from vnpy_grid.paths import get_output_dir
 from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
 
@@ -23,6 +25,15 @@ def default(o):
 
 
 def main() -> None:
+    ap = argparse.ArgumentParser(description="Full-load DHRG backtest.")
+    ap.add_argument("--cache", action="store_true", help="load bars through the memory-mapped bar cache")
+    ap.add_argument(
+        "--columnar", action="store_true",
+        help="replay from the cache columns through one reused bar (implies --cache; "
+             "only for strategies that keep no reference to past bars)",
+    )
+    args = ap.parse_args()
+
     engine = BacktestingEngine()
     engine.set_parameters(
         vt_symbol="ETHUSDT.GLOBAL",
@@ -50,7 +61,12 @@ def main() -> None:
 
     engine.add_strategy(DynamicHedgedRebateGridStrategy, setting)
 
-    engine.load_data()
+    if args.cache or args.columnar:
+        # memory-mapped cache of the DB series, rebuilt automatically when the DB changes;
+        # columnar replays straight from its columns through one reused bar (DHRG keeps no bar references)
+        load_engine_history(engine, columnar=args.columnar)
+    else:
+        engine.load_data()
     engine.run_backtesting()
 
     print(f"limit_orders={len(engine.limit_orders)}, active_limit={len(engine.active_limit_orders)}, trades={len(engine.trades)}")
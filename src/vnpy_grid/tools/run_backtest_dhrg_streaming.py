@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import pandas as pd
+
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.database import get_database
 from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
 
+from vnpy_grid.backtest.checkpoint import load_checkpoint, save_checkpoint
+from vnpy_grid.backtest.daily import StreamingDailyResults
+from vnpy_grid.backtest.multi import MultiEngineReplay
+from vnpy_grid.backtest.skipping import QuietBarSkipper
+from vnpy_grid.data.bar_cache import open_bar_cache
+from vnpy_grid.data.chunking import ChunkBudget, stream_windows
+from vnpy_grid.data.prefetch import PrefetchLoader, floor_to_step
+from vnpy_grid.data.quality import QualityIndex, apply_policy
 from vnpy_grid.paths import get_output_dir
 from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
 
@@ -17,6 +28,9 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+# gap between consecutive windows (queries are inclusive on both ends)
+STEP = timedelta(minutes=1)
+
 
 def default(obj):
     if hasattr(obj, "isoformat"):
@@ -24,7 +38,7 @@ def default(obj):
     return str(obj)
 
 
-def streaming_backtest(
+def new_engine(
     vt_symbol: str,
     interval: Interval,
     start: datetime,
@@ -36,12 +50,9 @@ def streaming_backtest(
     size: float = 1,
     pricetick: float = 0.01,
     capital: int = 1_000_000,
-    chunk_days: int = 15,
-) -> dict:
-    """
-    Feed bar data chunk-by-chunk from the database to the backtesting engine.
-    Useful for smoke-testing large datasets without exploding memory.
-    """
+    streaming_results: bool = False,
+) -> BacktestingEngine:
+    """A bar-mode engine with its strategy started, ready for `new_bar`."""
     engine = BacktestingEngine()
     engine.set_parameters(
         vt_symbol=vt_symbol,
@@ -57,26 +68,130 @@ def streaming_backtest(
     )
 
     engine.add_strategy(strategy_cls, setting)
+    if streaming_results:
+        StreamingDailyResults.attach(engine)
     engine.strategy.on_start()
     engine.strategy.trading = True
+    return engine
+
 
+def open_stream(
+    vt_symbol: str,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    chunk_days: int = 15,
+    bad_spans: str = "warn",
+    use_cache: bool = False,
+    prefetch: int = 2,
+    row_budget: int | None = None,
+    memory_budget_mb: float | None = None,
+):
+    """Chunks of bars from the database (or bar cache) between start and end: (loader, windows)."""
     symbol, exch = vt_symbol.split(".")
     exchange = Exchange(exch)
 
     db = get_database()
-    cur = start
-    total_days = max((end - start).days, 1)
+    cache = open_bar_cache(symbol, exchange, interval) if use_cache else None
+    quality = QualityIndex.for_series(symbol, exchange, interval)
+    if not quality.exists:
+        quality = None
+
+    def load(cur: datetime, chunk_end: datetime) -> list:
+        if cache is not None:
+            bars = cache.load_bars(cur, chunk_end)
+        else:
+            bars = db.load_bar_data(symbol, exchange, interval, cur, chunk_end)
+        return apply_policy(bars, quality, bad_spans)
+
+    budget = ChunkBudget(rows=row_budget, memory_mb=memory_budget_mb)
+    windows = stream_windows(
+        start, end, [(symbol, exchange, interval)], chunk_days, budget, depth=prefetch, step=STEP
+    )
+    return PrefetchLoader(windows, load, depth=prefetch), windows
+
+
+def streaming_backtest(
+    vt_symbol: str,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    strategy_cls,
+    setting: dict,
+    rate: float = 2.5e-5,
+    slippage: float = 0.2,
+    size: float = 1,
+    pricetick: float = 0.01,
+    capital: int = 1_000_000,
+    chunk_days: int = 15,
+    bad_spans: str = "warn",
+    use_cache: bool = False,
+    prefetch: int = 2,
+    row_budget: int | None = None,
+    memory_budget_mb: float | None = None,
+    checkpoint_dir: str | Path | None = None,
+    checkpoint_every: int = 1,
+    resume_from: str | Path | None = None,
+    fork_setting: dict | None = None,
+    streaming_results: bool = False,
+    skip_quiet_bars: bool = False,
+) -> dict:
+    """
+    Feed bar data chunk-by-chunk from the database to the backtesting engine.
+    Useful for smoke-testing large datasets without exploding memory.
+
+    `bad_spans` (ignore / warn / skip / ffill) applies the import-time quality
+    index of the series, if one was recorded with `--validate`.
+    `use_cache` reads chunks from the memory-mapped bar cache instead of the DB.
+    `prefetch` chunks are loaded ahead on a worker thread (0: load in the replay loop).
+    `row_budget` (rows per chunk) or `memory_budget_mb` (peak RSS) replace the
+    fixed `chunk_days` with adaptively sized windows, see data.chunking.
+    `checkpoint_dir` receives an engine snapshot every `checkpoint_every`
+    chunks. `resume_from` (a checkpoint file, or a directory for its newest)
+    continues from that state instead of `start`; `fork_setting` overrides
+    strategy parameters of the restored run, for what-if branches.
+    `streaming_results` closes daily results as the replay passes them and
+    drops their trades (a resumed run keeps the mode of its checkpoint).
+    `skip_quiet_bars` fast-forwards bars that touch no resting order when the
+    strategy allows it (`can_skip_quiet_bars`); results are unchanged.
+    """
     total_bars = 0
+    if resume_from is not None:
+        ckpt = load_checkpoint(resume_from)
+        ckpt.check(vt_symbol, interval.value, strategy_cls)
+        engine = ckpt.fork(fork_setting)
+        engine.end = end
+        total_bars = ckpt.rows
+        replay_start = floor_to_step(ckpt.cursor, STEP) + STEP
+        print(f"[checkpoint] resuming from {ckpt.path} at {replay_start}, bars so far={total_bars}")
+    else:
+        engine = new_engine(
+            vt_symbol, interval, start, end, strategy_cls, setting,
+            rate, slippage, size, pricetick, capital, streaming_results,
+        )
+        replay_start = start
 
-    while cur <= end:
-        chunk_end = min(end, cur + timedelta(days=chunk_days))
-        bars = db.load_bar_data(symbol, exchange, interval, cur, chunk_end)
-        for bar in bars:
-            engine.new_bar(bar)
-        total_bars += len(bars)
-        progress = min(100, int((chunk_end - start).days * 100 / total_days))
-        print(f"[stream] {cur.date()} -> {chunk_end.date()} ({progress}%), bars={len(bars)}")
-        cur = chunk_end + timedelta(minutes=1)
+    total_days = max((end - start).days, 1)
+    loader, windows = open_stream(
+        vt_symbol, interval, replay_start, end, chunk_days, bad_spans, use_cache, prefetch, row_budget, memory_budget_mb
+    )
+    skipper = QuietBarSkipper(engine) if skip_quiet_bars else None
+    for n, chunk in enumerate(loader, 1):
+        if skipper is not None:
+            skipper.feed(chunk.bars)
+        else:
+            for bar in chunk.bars:
+                engine.new_bar(bar)
+        total_bars += len(chunk.bars)
+        progress = min(100, int((chunk.end - start).days * 100 / total_days))
+        print(f"[stream] {chunk.start.date()} -> {chunk.end.date()} ({progress}%), bars={len(chunk.bars)}")
+        if checkpoint_dir is not None and n % max(checkpoint_every, 1) == 0:
+            save_checkpoint(checkpoint_dir, engine, chunk.end, rows=total_bars)
+    print(loader.stats.summary())
+    if hasattr(windows, "summary"):
+        print(windows.summary())
+    if skipper is not None:
+        print(skipper.summary())
 
     engine.strategy.on_stop()
 
@@ -96,7 +211,70 @@ def streaming_backtest(
     return stats
 
 
+def multi_streaming_backtest(
+    vt_symbol: str,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    strategy_cls,
+    settings: list[dict],
+    rate: float = 2.5e-5,
+    slippage: float = 0.2,
+    size: float = 1,
+    pricetick: float = 0.01,
+    capital: int = 1_000_000,
+    chunk_days: int = 15,
+    bad_spans: str = "warn",
+    use_cache: bool = False,
+    prefetch: int = 2,
+    row_budget: int | None = None,
+    memory_budget_mb: float | None = None,
+    streaming_results: bool = True,
+    skip_quiet_bars: bool = False,
+) -> pd.DataFrame:
+    """
+    Backtest every setting of `settings` in one pass over the data: each chunk
+    is loaded once and replayed into one engine per setting (see
+    backtest.multi). Returns one row per setting with its statistics.
+
+    Streaming options are those of `streaming_backtest`; `streaming_results`
+    defaults to on so memory stays flat with N engines.
+    """
+    engines = [
+        new_engine(
+            vt_symbol, interval, start, end, strategy_cls, setting,
+            rate, slippage, size, pricetick, capital, streaming_results,
+        )
+        for setting in settings
+    ]
+    replay = MultiEngineReplay(engines, skip_quiet_bars=skip_quiet_bars)
+    loader, windows = open_stream(
+        vt_symbol, interval, start, end, chunk_days, bad_spans, use_cache, prefetch, row_budget, memory_budget_mb
+    )
+    for chunk in loader:
+        replay.feed(chunk.bars)
+        print(f"[multi] {chunk.start.date()} -> {chunk.end.date()}, bars={len(chunk.bars)}")
+    print(loader.stats.summary())
+    if hasattr(windows, "summary"):
+        print(windows.summary())
+    print(replay.summary())
+
+    rows = []
+    for k, (setting, stats) in enumerate(zip(settings, replay.finish())):
+        rows.append({"variant": k, **setting, **stats, "replay_seconds": replay.seconds[k]})
+    table = pd.DataFrame(rows)
+
+    out_dir = get_output_dir("backtest_outputs_dhrg_multi")
+    out_dir.mkdir(exist_ok=True)
+    table.to_csv(out_dir / "variants.csv", index=False, encoding="utf-8")
+    return table
+
+
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Streaming DHRG backtest.")
+    ap.add_argument("--cache", action="store_true", help="read chunks from the memory-mapped bar cache")
+    args = ap.parse_args()
+
     streaming_backtest(
         vt_symbol="ETHUSDT.GLOBAL",
         interval=Interval.MINUTE,
@@ -118,4 +296,5 @@ if __name__ == "__main__":
             "initial_equity_quote": 10_000.0,
         },
         chunk_days=10,
+        use_cache=args.cache,
     )
@@ -4,7 +4,7 @@ import argparse
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, Iterator, Optional, Tuple
 
 import pandas as pd
 
@@ -12,6 +12,14 @@ from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData
 from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
 
+from vnpy_grid.data.bar_cache import open_bar_cache
+from vnpy_grid.data.catalog import DatasetEntry, lookup_h5
+from vnpy_grid.data.import_h5_to_vnpy import (
+    build_time_range_where,
+    iter_h5_chunks,
+    locate_fixed_rows,
+    parse_dt_col,
+)
 from vnpy_grid.paths import get_output_dir
 from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
 
@@ -25,6 +33,39 @@ def infer_time_column(df: pd.DataFrame) -> Optional[str]:
     return None
 
 
+def open_range_cursor(
+    store: pd.HDFStore,
+    key: str,
+    chunksize: int,
+    start_ns: Optional[int],
+    end_ns: Optional[int],
+    entry: Optional[DatasetEntry] = None,
+) -> Tuple[Iterator[pd.DataFrame], bool]:
+    """
+    Chunks of `key` limited to [start_ns, end_ns] by the store itself:
+    a `where` clause on tables, a binary-searched row slice on fixed frames
+    known (from the catalog) or checked to be sorted, or the catalogued chunk map. Falls back to reading every chunk otherwise.
+    The flag is True when the rows are known to be sorted by time (the
+    binary-searched slice), so the caller may stop at the first row past the end.
+    """
+    if start_ns is None and end_ns is None:
+        return iter_h5_chunks(store, key, chunksize), False
+    where = build_time_range_where(store, key, start_ns, end_ns)
+    if where:
+        print(f"[h5] where: {where}")
+        return iter_h5_chunks(store, key, chunksize, where=where), False
+    rows = locate_fixed_rows(store, key, start_ns, end_ns, known_sorted=entry.sorted if entry else None)
+    if rows is not None:
+        print(f"[h5] rows {rows[0]}..{rows[1]}")
+        return iter_h5_chunks(store, key, chunksize, start_row=rows[0], stop_row=rows[1]), True
+    rows = entry.row_range(start_ns, end_ns) if entry else None
+    if rows is not None:
+        print(f"[h5] catalogued rows {rows[0]}..{rows[1]}")
+        return iter_h5_chunks(store, key, chunksize, start_row=rows[0], stop_row=rows[1]), False
+    print("[h5] time range cannot be pushed down for this key, scanning all chunks")
+    return iter_h5_chunks(store, key, chunksize), False
+
+
 def iter_bars_from_h5(
     path: Path,
     key: Optional[str],
@@ -37,26 +78,37 @@ def iter_bars_from_h5(
     if not path.exists():
         raise FileNotFoundError(path)
 
+    start_ns = pd.Timestamp(start, tz="UTC").value if start else None
+    end_ns = pd.Timestamp(end, tz="UTC").value if end else None
+
     with pd.HDFStore(path, mode="r") as store:
         keys = store.keys()
         if not keys:
             raise RuntimeError("H5 文件没有任何数据")
         h5_key = key or next(k for k in keys if not k.endswith("/_i_table"))
-        cursor = store.select(h5_key, chunksize=chunksize)
+        entry = lookup_h5(path, h5_key)
+        cursor, time_sorted = open_range_cursor(store, h5_key, chunksize, start_ns, end_ns, entry)
         for chunk in cursor:
             df = chunk
-            time_col = infer_time_column(df)
+            if entry is not None:
+                time_col = entry.time_column if entry.time_column in entry.dtypes else None
+            else:
+                time_col = infer_time_column(df)
             if time_col:
-                ts = pd.to_datetime(df[time_col], errors="coerce", utc=True)
+                ts = pd.DatetimeIndex(parse_dt_col(df[time_col]))
             else:
                 ts = pd.to_datetime(df.index, errors="coerce", utc=True)
 
+            # the pushed-down range is coarse (epoch units, unsearchable stores); keep the exact filter
             if start:
                 df = df[ts >= pd.Timestamp(start, tz="UTC")]
                 ts = ts[ts >= pd.Timestamp(start, tz="UTC")]
             if end:
+                past_end = len(ts) and ts.min() > pd.Timestamp(end, tz="UTC")
                 df = df[ts <= pd.Timestamp(end, tz="UTC")]
                 ts = ts[ts <= pd.Timestamp(end, tz="UTC")]
+                if past_end and time_sorted:
+                    break  # binary-searched slice: nothing later can be in range
 
             for (_, row), dt in zip(df.iterrows(), ts):
                 if pd.isna(dt):
@@ -83,7 +135,18 @@ def run_backtest_from_h5(
     exchange: Exchange,
     start: Optional[datetime],
     end: Optional[datetime],
+    use_cache: bool = False,
 ) -> None:
+    if start is None or end is None:
+        # an open-ended range: take it from the catalog instead of 1970..now
+        with pd.HDFStore(h5_path, mode="r") as store:
+            h5_key = key or next(k for k in store.keys() if not k.endswith("/_i_table"))
+        entry = lookup_h5(h5_path, h5_key)
+        if entry is not None and entry.first_ns is not None:
+            print(f"[catalog] {h5_path.name}{h5_key}: {entry.coverage()}")
+            start = start or pd.Timestamp(entry.first_ns).to_pydatetime()
+            end = end or pd.Timestamp(entry.last_ns).to_pydatetime()
+
     engine = BacktestingEngine()
     engine.set_parameters(
         vt_symbol=f"{symbol}.{exchange.value}",
@@ -99,8 +162,15 @@ def run_backtest_from_h5(
     )
     engine.add_strategy(DynamicHedgedRebateGridStrategy, {})
 
+    if use_cache:
+        # compiled once per file version, then memory-mapped: no HDF decoding on repeat runs
+        cache = open_bar_cache(symbol, exchange, Interval.MINUTE, source=h5_path, key=key)
+        bars: Iterable[BarData] = (bar for chunk in cache.iter_chunks(start, end) for bar in chunk)
+    else:
+        bars = iter_bars_from_h5(h5_path, key, symbol, exchange, start=start, end=end)
+
     fed = 0
-    for bar in iter_bars_from_h5(h5_path, key, symbol, exchange, start=start, end=end):
+    for bar in bars:
         engine.new_bar(bar)
         fed += 1
         if fed % 100_000 == 0:
@@ -131,6 +201,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--exchange", type=str, default="GLOBAL", help="交易所枚举名")
     parser.add_argument("--start", type=str, default=None, help="起始日期 YYYY-MM-DD")
     parser.add_argument("--end", type=str, default=None, help="结束日期 YYYY-MM-DD")
+    parser.add_argument("--cache", action="store_true", help="read bars through the memory-mapped bar cache")
     return parser.parse_args()
 
 
@@ -139,7 +210,7 @@ def main() -> None:
     start = datetime.fromisoformat(args.start) if args.start else None
     end = datetime.fromisoformat(args.end) if args.end else None
     exchange = Exchange[args.exchange]
-    run_backtest_from_h5(args.h5, args.key, args.symbol, exchange, start, end)
+    run_backtest_from_h5(args.h5, args.key, args.symbol, exchange, start, end, use_cache=args.cache)
 
 
 if __name__ == "__main__":
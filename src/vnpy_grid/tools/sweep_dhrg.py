@@ -0,0 +1,75 @@
+"""
+Parameter sweep of DynamicHedgedRebateGridStrategy over one bar series.
+
+The series is read once (through the bar cache) into shared memory and the
+variants run on a process pool, see vnpy_grid.backtest.sweep.
+
+Usage:
+  python -m vnpy_grid.tools.sweep_dhrg --start 2022-08-20 --end 2023-08-20 \
+      --grid '{"grid_pct": [0.0012, 0.0016, 0.002], "levels": [5, 10], "maker_only_mode": [true, false]}'
+  python -m vnpy_grid.tools.sweep_dhrg --grid sweep.json --workers 8 --backend sim
+
+`--grid` is JSON (inline or a file): a {parameter: [values]} grid expanded
+to its cartesian product, or a list of settings. Each variant starts from
+`run_backtest_dhrg`'s setting.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+from vnpy.trader.constant import Exchange, Interval
+
+from vnpy_grid.backtest.sweep import BACKENDS, expand_grid, run_sweep
+from vnpy_grid.data.bar_cache import open_bar_cache
+from vnpy_grid.paths import get_output_dir
+from vnpy_grid.tools.run_grid_sim import DEFAULT_SETTING
+
+BRIEF = ["total_net_pnl", "total_return", "sharpe_ratio", "max_ddpercent", "total_trade_count", "seconds"]
+
+
+def load_grid(text: str):
+    path = Path(text)
+    if path.suffix == ".json" and path.exists():
+        text = path.read_text(encoding="utf-8")
+    return json.loads(text)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Parallel DHRG parameter sweep on shared-memory bars.")
+    ap.add_argument("--grid", required=True, help="JSON grid {param: [values]} or list of settings (inline or .json file)")
+    ap.add_argument("--symbol", default="ETHUSDT")
+    ap.add_argument("--exchange", default="GLOBAL")
+    ap.add_argument("--h5", type=Path, default=None, help="read bars from this HDF5 file instead of the database")
+    ap.add_argument("--key", default=None, help="HDF5 key")
+    ap.add_argument("--start", default=None, help="YYYY-MM-DD")
+    ap.add_argument("--end", default=None, help="YYYY-MM-DD")
+    ap.add_argument("--workers", type=int, default=None, help="process count, default: all cores")
+    ap.add_argument("--backend", choices=BACKENDS, default="engine", help="vnpy engine, or the array simulator")
+    ap.add_argument("--out", type=Path, default=None, help="result CSV (default: backtest_outputs_sweep/sweep.csv)")
+    args = ap.parse_args()
+
+    start = datetime.fromisoformat(args.start) if args.start else None
+    end = datetime.fromisoformat(args.end) if args.end else None
+    settings = expand_grid(load_grid(args.grid), base=DEFAULT_SETTING)
+
+    exchange = Exchange[args.exchange]
+    cache = open_bar_cache(args.symbol, exchange, Interval.MINUTE, source=args.h5, key=args.key)
+    table = run_sweep(
+        cache.arrays(start, end), settings, tz=cache.tz, workers=args.workers, backend=args.backend,
+        vt_symbol=f"{args.symbol}.{exchange.value}", interval=Interval.MINUTE,
+    )
+
+    out = args.out or get_output_dir("backtest_outputs_sweep") / "sweep.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(out, index=False, encoding="utf-8")
+    swept = sorted({k for s in settings for k in s if len({json.dumps(x.get(k)) for x in settings}) > 1})
+    cols = ["variant"] + swept + [c for c in BRIEF if c in table]
+    print(table[cols].sort_values("total_net_pnl", ascending=False).to_string(index=False))
+    print(f"results: {out}")
+
+
+if __name__ == "__main__":
+    main()
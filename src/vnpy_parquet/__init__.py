@@ -0,0 +1,4 @@
+"""vn.py database plugin shim: `"database.name": "parquet"` in vt_setting.json loads this module."""
+from vnpy_grid.data.parquet_store import ParquetDatabase as Database
+
+__all__ = ["Database"]
@@ -0,0 +1,85 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+
+from vnpy_grid.data.bar_cache import BAR_DTYPE, open_bar_cache, read_header
+
+
+def write_h5(path, rows: int, offset: float = 0.0) -> None:
+    idx = pd.date_range("2022-01-01", periods=rows, freq="min")
+    close = np.arange(rows, dtype="float64") + 100 + offset
+    pd.DataFrame(
+        {"datetime": idx, "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0}
+    ).to_hdf(path, key="k", format="fixed")
+
+
+def test_cache_roundtrip_and_range(tmp_path) -> None:
+    src = tmp_path / "bars.h5"
+    write_h5(src, 3_000)
+    cache = open_bar_cache("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, source=src, root=tmp_path)
+
+    assert isinstance(cache.data, np.memmap) and cache.data.dtype == BAR_DTYPE
+    assert len(cache) == 3_000
+    bars = cache.load_bars(datetime(2022, 1, 1, 1, 0), datetime(2022, 1, 1, 2, 0))
+    assert len(bars) == 61
+    assert bars[0].close_price == 160.0 and bars[0].datetime.hour == 1
+    chunks = list(cache.iter_chunks(rows=700))
+    assert [len(c) for c in chunks] == [700, 700, 700, 700, 200]
+
+
+def test_cache_is_reused_until_source_changes(tmp_path) -> None:
+    src = tmp_path / "bars.h5"
+    write_h5(src, 500)
+    first = open_bar_cache("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, source=src, root=tmp_path)
+    created = read_header(first.path)["created"]
+    mtime = first.path.stat().st_mtime_ns
+
+    again = open_bar_cache("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, source=src, root=tmp_path)
+    assert again.path.stat().st_mtime_ns == mtime
+    assert read_header(again.path)["created"] == created
+
+    write_h5(src, 800, offset=1.0)
+    os.utime(src, ns=(mtime + 10**9, mtime + 10**9))
+    rebuilt = open_bar_cache("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, source=src, root=tmp_path)
+    assert rebuilt.path != first.path
+    assert len(rebuilt) == 800
+    assert rebuilt.data["close"][0] == 101.0
+    assert len(list(tmp_path.glob("*.bars"))) == 1
+
+
+def test_sqlite_source_reads_dst_fall_back(tmp_path, monkeypatch) -> None:
+    import sqlite3
+    from datetime import timedelta
+    from zoneinfo import ZoneInfo
+
+    import vnpy_grid.data.bar_cache as bar_cache
+    import vnpy_grid.data.watermark as watermark
+
+    london = ZoneInfo("Europe/London")
+    monkeypatch.setattr(watermark, "DB_TZ", london)
+    path = tmp_path / "database.db"
+    monkeypatch.setattr(bar_cache, "default_sqlite_path", lambda: path)
+
+    # naive London wall clock over the 2022-10-30 fall-back: 01:00-01:59 happens twice
+    naive = [datetime(2022, 10, 30, 0, 0) + timedelta(minutes=i) for i in range(4 * 60)]
+    conn = sqlite3.connect(path)
+    conn.execute(
+        'CREATE TABLE "dbbardata" ("symbol", "exchange", "datetime", "interval", "volume", "turnover", '
+        '"open_interest", "open_price", "high_price", "low_price", "close_price")'
+    )
+    conn.executemany(
+        'INSERT INTO "dbbardata" VALUES (?, ?, ?, ?, 1, 1, 0, 1, 1, 1, 1)',
+        [("ETHUSDT", "GLOBAL", dt.isoformat(sep=" "), "1m") for dt in naive],
+    )
+    conn.commit()
+    conn.close()
+
+    arrays = list(bar_cache._iter_sqlite("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE))
+    assert len(arrays) == 1
+    # vn.py reads naive times with fold=0: the repeated hour is the first (BST) one
+    expected = [pd.Timestamp(dt.replace(tzinfo=london)).value for dt in naive]
+    assert arrays[0].ts_ns.tolist() == expected
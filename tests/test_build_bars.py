@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from vnpy.trader.constant import Exchange, Interval
+
+from vnpy_grid.data.import_h5_to_vnpy import build_bars, infer_columns
+from vnpy_grid.tools.bench_build_bars import build_bars_rowwise
+
+
+def test_columnar_build_matches_row_loop() -> None:
+    df = pd.DataFrame({
+        "open_time": [1_577_836_800_000, None, 1_577_836_920_000, 1_577_836_980_000],
+        "open": [100.0, 101.0, np.nan, 103.0],
+        "high": [101.0, 102.0, 103.0, 104.0],
+        "low": [99.0, 100.0, 101.0, 102.0],
+        "close": [100.5, 101.5, 102.5, "bad"],
+        "volume": [1.0, 2.0, 3.0, np.nan],
+        "quote_volume": [10.0, 20.0, 30.0, 40.0],
+    })
+    cmap = infer_columns(df)
+    kw = dict(symbol="ETHUSDT", exchange=Exchange.GLOBAL, interval=Interval.MINUTE)
+
+    fast = build_bars(df, cmap, **kw)
+    slow = build_bars_rowwise(df, cmap, **kw)
+
+    assert len(fast) == 3
+    assert fast == slow
+    assert fast[0].datetime.tzinfo is not None
@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange
+
+import vnpy_grid.tools.run_backtest_from_h5 as runner
+from vnpy_grid.data.catalog import DatasetCatalog, describe_h5, lookup_h5
+
+
+def write_h5(path, rows: int, time_as_text: bool = False) -> None:
+    idx = pd.date_range("2022-01-01", periods=rows, freq="min")
+    close = np.arange(rows, dtype="float64") + 100
+    times = idx.strftime("%Y-%m-%d %H:%M:%S") if time_as_text else idx
+    pd.DataFrame(
+        {"Timestamp": times, "Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Vol": 1.0}
+    ).to_hdf(path, key="k", format="fixed")
+
+
+def test_scan_records_schema_range_and_chunks(tmp_path) -> None:
+    src = tmp_path / "bars.h5"
+    write_h5(src, 2_500)
+    catalog = DatasetCatalog(tmp_path / "catalog.json")
+    entry = describe_h5(src, "/k", catalog, chunk_rows=1_000)
+
+    assert entry.storage == "fixed" and entry.rows == 2_500 and entry.sorted
+    assert entry.columns["time"] == "Timestamp" and entry.columns["volume"] == "Vol"
+    assert entry.column_map().close == "Close"
+    assert entry.first_ns == pd.Timestamp("2022-01-01", tz="UTC").value
+    assert entry.last_ns == pd.Timestamp("2022-01-01 00:00", tz="UTC").value + 2_499 * 60 * 10**9
+    assert [c[:2] for c in entry.chunks] == [[0, 1_000], [1_000, 2_000], [2_000, 2_500]]
+
+    minute = 60 * 10**9
+    assert entry.row_range(entry.first_ns + 1_500 * minute, entry.first_ns + 1_600 * minute) == (1_000, 2_000)
+    assert entry.row_range(entry.last_ns + 1) == (0, 0)
+
+    # reloaded without reading the file; a changed file is no longer matched
+    assert lookup_h5(src, "/k", DatasetCatalog(catalog.path)).rows == 2_500
+    write_h5(src, 10)
+    os.utime(src, ns=(1, 1))
+    assert lookup_h5(src, "/k", DatasetCatalog(catalog.path)) is None
+
+
+def test_runner_uses_chunk_map_for_text_times(tmp_path, monkeypatch) -> None:
+    # a string time column cannot be binary-searched on disk; the chunk map narrows the read
+    src = tmp_path / "bars.h5"
+    write_h5(src, 3_000, time_as_text=True)
+    catalog = DatasetCatalog(tmp_path / "catalog.json")
+    describe_h5(src, "/k", catalog, chunk_rows=500)
+    monkeypatch.setattr(runner, "lookup_h5", lambda p, k: lookup_h5(p, k, catalog))
+
+    read = []
+    real = runner.iter_h5_chunks
+
+    def spy(store, key, chunksize, **kw):
+        read.append((kw.get("start_row"), kw.get("stop_row")))
+        return real(store, key, chunksize, **kw)
+
+    monkeypatch.setattr(runner, "iter_h5_chunks", spy)
+    bars = list(runner.iter_bars_from_h5(
+        src, "/k", "ETHUSDT", Exchange.GLOBAL, chunksize=500,
+        start=pd.Timestamp("2022-01-01 20:00").to_pydatetime(),
+        end=pd.Timestamp("2022-01-01 21:00").to_pydatetime(),
+    ))
+    assert read == [(1_000, 1_500)]
+    assert len(bars) == 61 and bars[0].datetime.hour == 20 and bars[-1].datetime.hour == 21
+
+
+def test_concurrent_catalogs_keep_each_others_entries(tmp_path) -> None:
+    a, b = tmp_path / "a.h5", tmp_path / "b.h5"
+    write_h5(a, 100)
+    write_h5(b, 200)
+    first = DatasetCatalog(tmp_path / "catalog.json")
+    second = DatasetCatalog(tmp_path / "catalog.json")
+
+    describe_h5(a, "/k", first)
+    describe_h5(b, "/k", second)  # second was loaded before first saved
+    assert set(DatasetCatalog(first.path).entries) == {f"{a.resolve()}::/k", f"{b.resolve()}::/k"}
+
+    first.remove(str(a.resolve()), "/k")
+    assert set(DatasetCatalog(first.path).entries) == {f"{b.resolve()}::/k"}
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+
+from vnpy_grid.backtest.checkpoint import latest_checkpoint, list_checkpoints, load_checkpoint, save_checkpoint
+from vnpy_grid.data.import_h5_to_vnpy import build_bars_from_arrays
+from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
+
+from test_history import make_arrays
+
+
+def new_engine() -> BacktestingEngine:
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol="ETHUSDT.GLOBAL", interval=Interval.MINUTE.value,
+        start=datetime(2022, 1, 1), end=datetime(2022, 1, 5), rate=2.5e-5, slippage=0.2,
+        size=1, pricetick=0.01, capital=1_000_000, mode=BacktestingMode.BAR,
+    )
+    engine.add_strategy(DynamicHedgedRebateGridStrategy, {"grid_pct": 0.001})
+    engine.strategy.on_init()
+    engine.strategy.on_start()
+    engine.strategy.trading = True
+    return engine
+
+
+def replay(engine: BacktestingEngine, bars) -> BacktestingEngine:
+    for bar in bars:
+        engine.new_bar(bar)
+    return engine
+
+
+def fingerprint(engine: BacktestingEngine):
+    engine.strategy.on_stop()
+    df = engine.calculate_result()
+    trades = [(t.datetime, t.direction, t.price, t.volume) for t in engine.trades.values()]
+    return trades, df["net_pnl"].tolist(), len(engine.active_limit_orders)
+
+
+def test_resume_matches_uninterrupted_run(tmp_path) -> None:
+    bars = build_bars_from_arrays(make_arrays(4_000), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, gateway_name="DB")
+    expected = fingerprint(replay(new_engine(), bars))
+
+    engine = replay(new_engine(), bars[:2_500])
+    path = save_checkpoint(tmp_path, engine, bars[2_499].datetime, rows=2_500)
+    assert engine.output is not None and latest_checkpoint(tmp_path) == path
+    replay(engine, bars[2_500:3_000])  # state after the snapshot must not leak into it
+
+    ckpt = load_checkpoint(tmp_path)
+    ckpt.check("ETHUSDT.GLOBAL", Interval.MINUTE.value, DynamicHedgedRebateGridStrategy)
+    assert ckpt.rows == 2_500 and ckpt.cursor == bars[2_499].datetime
+    resumed = ckpt.engine
+    assert resumed.strategy.cta_engine is resumed
+    assert resumed.strategy.take_profit_orders is not engine.strategy.take_profit_orders
+    assert fingerprint(replay(resumed, bars[2_500:])) == expected
+
+    with pytest.raises(ValueError):
+        ckpt.check("BTCUSDT.GLOBAL", Interval.MINUTE.value, DynamicHedgedRebateGridStrategy)
+
+
+def test_fork_and_pruning(tmp_path) -> None:
+    bars = build_bars_from_arrays(make_arrays(3_000), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, gateway_name="DB")
+    engine = new_engine()
+    for i in range(0, 3_000, 500):
+        replay(engine, bars[i:i + 500])
+        save_checkpoint(tmp_path, engine, bars[i + 499].datetime, rows=i + 500, keep=2)
+    assert [p.name for p in list_checkpoints(tmp_path)] == [
+        f"{bars[i].datetime:%Y%m%dT%H%M%S%f}.ckpt" for i in (2_499, 2_999)
+    ]
+
+    fork = load_checkpoint(list_checkpoints(tmp_path)[0]).fork({"grid_pct": 0.002})
+    assert fork.strategy.grid_pct == 0.002
+    assert fork.trade_count == len(fork.trades) > 0
@@ -0,0 +1,75 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import pytest
+
+import vnpy_grid.data.chunking as chunking
+from vnpy_grid.data.chunking import AdaptiveWindows, ChunkBudget
+from vnpy_grid.data.prefetch import PrefetchLoader, time_windows
+
+
+def timestamps(start: datetime, end: datetime, busy_from: datetime = datetime.max) -> list:
+    """One row per minute, one every 6 seconds from `busy_from` on."""
+    rows, cur = [], start
+    while cur <= end:
+        rows.append(cur)
+        cur += timedelta(seconds=6) if cur >= busy_from else timedelta(minutes=1)
+    return rows
+
+
+def range_load(rows: list):
+    """Loads `[start, end]` inclusive, like the databases do."""
+    def load(start: datetime, end: datetime) -> list:
+        return rows[bisect_left(rows, start):bisect_right(rows, end)]
+    return load
+
+
+def replay(windows, rows: list) -> list:
+    loaded = [row for chunk in PrefetchLoader(windows, range_load(rows), depth=1) for row in chunk.bars]
+    assert loaded == rows  # every row exactly once, in order
+    return loaded
+
+
+def test_row_budget_sizes_windows_and_reacts_to_density() -> None:
+    start, end, busy = datetime(2022, 1, 1), datetime(2022, 3, 1), datetime(2022, 2, 1)
+    windows = AdaptiveWindows(
+        start, end, ChunkBudget(rows=14_400), rows_per_day=1440.0, step=timedelta(seconds=6)
+    )
+    assert windows.chunk_days == pytest.approx(10)
+
+    replay(windows, timestamps(start, end, busy))
+    sizes = [r.rows for r in windows.history]
+    # quiet January: ~10 days per chunk; busy February: one oversized chunk, then ~1 day
+    assert sizes[0] == 14_401
+    assert max(sizes[-5:]) <= 14_400 * 1.1
+    assert windows.history[-1].end == end
+
+
+@pytest.mark.parametrize("rows", [1_000, 777, 5_000])
+def test_fractional_windows_lose_no_bar(rows) -> None:
+    start, end = datetime(2022, 1, 1, 0, 0), datetime(2022, 1, 11, 0, 0)
+    bars = timestamps(start, end)
+    windows = AdaptiveWindows(start, end, ChunkBudget(rows=rows), rows_per_day=1440.0)
+    replay(windows, bars)
+    assert all(r.end.second == 0 and r.end.microsecond == 0 for r in windows.history[:-1])
+    # fixed windows with a fractional chunk_days, and a start off the minute grid
+    replay(time_windows(start, end, 0.37), bars)
+    replay(time_windows(start + timedelta(seconds=30), end, 0.37), bars[1:])
+
+
+def test_memory_budget_shrinks_when_rss_is_over(monkeypatch) -> None:
+    rss = {"now": 100 * 2**20}
+    monkeypatch.setattr(chunking, "current_rss", lambda: rss["now"])
+    windows = AdaptiveWindows(
+        datetime(2022, 1, 1), datetime(2022, 12, 31), ChunkBudget(memory_mb=200, bytes_per_row=1_000),
+        rows_per_day=1440.0, depth=2,
+    )
+    # 100 MB free / (4 chunks alive * 1000 B) = 26k rows = ~18 days
+    assert windows.chunk_days == pytest.approx(100 * 2**20 / 4_000 / 1440)
+    it = iter(windows)
+    next(it)
+    first = windows.chunk_days
+    rss["now"] = 400 * 2**20
+    next(it)
+    assert windows.chunk_days < first / 2
+    assert windows.history == []  # nothing recorded without a loader
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy_grid.data.catalog import DatasetCatalog
+from vnpy_grid.tools.convert_h5_to_table import benchmark_compressors, convert_to_table
+
+
+@pytest.mark.parametrize("fmt", ["fixed", "table"])
+def test_streaming_convert_verifies_and_indexes(tmp_path, fmt) -> None:
+    idx = pd.date_range("2022-01-01", periods=5_000, freq="min")
+    src = tmp_path / "src.h5"
+    dst = tmp_path / "dst.h5"
+    pd.DataFrame({"datetime": idx, "close": np.arange(5_000.0)}).to_hdf(src, key="klines", format=fmt)
+
+    catalog = DatasetCatalog(tmp_path / "catalog.json")
+    report = convert_to_table(src, dst, "/klines", chunksize=1_200, catalog=catalog)
+
+    assert report.ok, report.problems
+    assert report.rows == report.dst_rows == 5_000
+    assert report.dst_max == idx[-1]
+    with pd.HDFStore(dst, mode="r") as store:
+        table = store.get_storer("/klines").table
+        assert table.colindexes["index"].is_csi
+        rows = store.select("/klines", where="index >= '2022-01-02 00:00' & index < '2022-01-02 00:10'")
+    assert rows["close"].tolist() == list(np.arange(1_440.0, 1_450.0))
+
+    entry = catalog.get(str(dst.resolve()), "/klines")
+    assert entry.storage == "table" and entry.rows == 5_000 and entry.time_column == "index"
+    assert entry.last_ns == idx[-1].value and len(entry.chunks) == 5
+
+
+@pytest.mark.parametrize("fmt", ["fixed", "table"])
+def test_verify_reads_source_bounds_independently(tmp_path, monkeypatch, fmt) -> None:
+    import vnpy_grid.tools.convert_h5_to_table as convert
+
+    idx = pd.date_range("2022-01-01", periods=3_000, freq="min")
+    src = tmp_path / "src.h5"
+    data_columns = ["datetime"] if fmt == "table" else None
+    pd.DataFrame({"datetime": idx, "close": np.arange(3_000.0)}).to_hdf(
+        src, key="klines", format=fmt, data_columns=data_columns
+    )
+
+    # a conversion that shifts every timestamp: same row count, self-consistent chunk bounds
+    original = convert.to_time_indexed
+    monkeypatch.setattr(convert, "to_time_indexed", lambda df, col: original(df, col).shift(freq="1h"))
+    report = convert_to_table(src, tmp_path / "dst.h5", "/klines", chunksize=1_000,
+                              catalog=DatasetCatalog(tmp_path / "catalog.json"))
+
+    assert report.dst_rows == report.src_rows == 3_000
+    assert (report.src_min, report.src_max) == (idx[0], idx[-1])
+    assert not report.ok and report.problems == ["min/max timestamp mismatch"]
+
+
+def test_benchmark_reports_each_compressor(tmp_path) -> None:
+    idx = pd.date_range("2022-01-01", periods=2_000, freq="min")
+    src = tmp_path / "src.h5"
+    pd.DataFrame({"datetime": idx, "close": np.arange(2_000.0)}).to_hdf(src, key="klines", format="fixed")
+
+    table = benchmark_compressors(src, "/klines", complibs=["blosc:zstd", "zlib", "none"])
+    assert set(table.index) == {"blosc:zstd", "zlib", "none"}
+    assert (table["ratio"] > 0).all()
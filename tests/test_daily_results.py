@@ -0,0 +1,182 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+
+from vnpy_grid.backtest.checkpoint import load_checkpoint, save_checkpoint
+from vnpy_grid.backtest.daily import StreamingDailyResults
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays, build_bars_from_arrays
+from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
+
+
+def make_bars(rows: int) -> list:
+    ts = pd.date_range("2022-01-01", periods=rows, freq="min", tz="UTC").as_unit("ns").asi8
+    close = 1_000 + np.cumsum(np.sin(np.arange(rows) / 7.0)) + np.arange(rows) * 0.002
+    arrays = BarArrays(ts, close, close + 0.8, close - 0.8, close, np.ones(rows), close)
+    return build_bars_from_arrays(arrays, "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, gateway_name="DB")
+
+
+def run(bars, streaming: bool) -> BacktestingEngine:
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol="ETHUSDT.GLOBAL", interval=Interval.MINUTE.value,
+        start=datetime(2022, 1, 1), end=datetime(2022, 1, 9), rate=2.5e-5, slippage=0.2,
+        size=1, pricetick=0.01, capital=1_000_000, mode=BacktestingMode.BAR,
+    )
+    engine.add_strategy(DynamicHedgedRebateGridStrategy, {"grid_pct": 0.001})
+    if streaming:
+        StreamingDailyResults.attach(engine)
+    engine.history_data = bars
+    engine.run_backtesting()
+    return engine
+
+
+def test_streaming_results_match_stock_and_release_trades(tmp_path) -> None:
+    bars = make_bars(6 * 1440 + 300)
+    stock = run(bars, streaming=False)
+    streamed = run(bars, streaming=True)
+
+    # before the final calculate_result only the last day is still held
+    agg = streamed.streaming_results
+    assert agg.days == 6 and len(streamed.daily_results) == 1
+    assert len(streamed.trades) < len(stock.trades) / 3
+    assert all(t.datetime.date() == bars[-1].datetime.date() for t in streamed.trades.values())
+    assert len(streamed.limit_orders) < len(stock.limit_orders) / 3
+
+    expected = stock.calculate_result().drop(columns=["trades"])
+    got = streamed.calculate_result()
+    pd.testing.assert_frame_equal(got, expected)
+    assert agg.released_trades == len(stock.trades)
+    assert streamed.calculate_statistics(output=False) == stock.calculate_statistics(output=False)
+
+    # hooks survive a checkpoint pickle, and detach restores the stock methods
+    clone = load_checkpoint(save_checkpoint(tmp_path, streamed, bars[-1].datetime)).engine
+    assert clone.new_bar.__self__ is clone.streaming_results
+    StreamingDailyResults.detach(streamed)
+    assert streamed.new_bar.__func__ is BacktestingEngine.new_bar
+
+
+def test_trade_aggregate_matches_per_trade_pnl() -> None:
+    from datetime import date
+
+    from vnpy.trader.constant import Direction
+    from vnpy.trader.object import TradeData
+    from vnpy_ctastrategy.backtesting import DailyResult
+
+    from vnpy_grid.backtest.daily import TradeAggregate
+
+    rng = np.random.default_rng(7)
+    stock, agg = DailyResult(date(2022, 1, 3), 1_012.37), DailyResult(date(2022, 1, 3), 1_012.37)
+    stats = TradeAggregate()
+    for i in range(20_000):
+        trade = TradeData(
+            gateway_name="BACKTESTING", symbol="ETHUSDT", exchange=Exchange.GLOBAL,
+            orderid=str(i), tradeid=str(i), direction=Direction.LONG if rng.random() < 0.5 else Direction.SHORT,
+            price=round(1_000 + rng.normal(0, 10), 2), volume=round(float(rng.integers(1, 50)) * 0.01, 2),
+        )
+        stock.add_trade(trade)
+        stats.add(trade)
+    assert not hasattr(stats, "__dict__")
+
+    stock.calculate_pnl(1_003.5, 0.37, 10, 2.5e-5, 0.2)
+    agg.calculate_pnl(1_003.5, 0.37, 10, 2.5e-5, 0.2)
+    stats.apply(agg, 10, 2.5e-5, 0.2)
+    assert agg.trade_count == stock.trade_count == 20_000
+    for name in ("end_pos", "trading_pnl", "holding_pnl", "turnover", "commission", "slippage"):
+        assert getattr(agg, name) == pytest.approx(getattr(stock, name), rel=1e-9, abs=1e-6), name
+
+
+@pytest.fixture
+def patched_daily_result(monkeypatch):
+    """patch_ctabacktester with only its DailyResult methods applied; everything is restored afterwards."""
+    import sys
+    from pathlib import Path
+
+    from vnpy_ctabacktester.engine import BacktesterEngine
+    from vnpy_ctastrategy.backtesting import DailyResult
+
+    saved = [(cls, name, cls.__dict__[name]) for cls, names in (
+        (DailyResult, ("add_trade", "calculate_pnl")),
+        (BacktestingEngine, ("cross_limit_order",)),
+        (BacktesterEngine, ("load_strategy_class", "load_strategy_class_from_folder",
+                            "load_strategy_class_from_module", "run_backtesting")),
+    ) for name in names]
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[1]))
+    import patch_ctabacktester  # applies all of its patches on import
+
+    for cls, name, func in saved:
+        setattr(cls, name, func)
+    monkeypatch.delitem(sys.modules, "patch_ctabacktester")
+    monkeypatch.setattr(DailyResult, "add_trade", patch_ctabacktester.patched_daily_result_add_trade)
+    monkeypatch.setattr(DailyResult, "calculate_pnl", patch_ctabacktester.patched_daily_result_calculate_pnl)
+    return patch_ctabacktester
+
+
+def test_memory_optimized_stats_match_standard_mode_with_idle_days(patched_daily_result, monkeypatch) -> None:
+    bars = make_bars(3 * 1440)
+    last = bars[-1]
+    # one more day that never moves: nothing reaches the resting grid
+    price = last.close_price
+    for i in range(1, 1441):
+        bars.append(replace(last, datetime=last.datetime + timedelta(minutes=i),
+                            open_price=price, high_price=price, low_price=price, close_price=price))
+
+    monkeypatch.setattr(patched_daily_result, "MEMORY_OPTIMIZE_STATS", False)
+    expected = run(bars, streaming=False).calculate_result()
+    monkeypatch.setattr(patched_daily_result, "MEMORY_OPTIMIZE_STATS", True)
+    got = run(bars, streaming=False).calculate_result()
+
+    assert (got["trade_count"] == 0).any() and (got["trade_count"] > 0).any()
+    assert "_trade_stats" not in got
+    assert all(trades == [] for trades in got["trades"])
+    pd.testing.assert_frame_equal(got.drop(columns=["trades"]), expected.drop(columns=["trades"]), rtol=1e-9)
+
+
+def test_replay_falls_back_to_fixed_windows_without_vnpy_grid(patched_daily_result, monkeypatch) -> None:
+    import sys
+
+    monkeypatch.setitem(sys.modules, "vnpy_grid.data.chunking", None)
+    monkeypatch.setitem(sys.modules, "vnpy_grid.backtest.daily", None)
+    monkeypatch.setattr(patched_daily_result, "STREAMING_RESULTS", True)
+    logs: list = []
+    start, end = datetime(2022, 1, 1), datetime(2022, 1, 3, 12)
+
+    windows, loader, meter = patched_daily_result.open_chunk_loader(
+        start, end, "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, 1, lambda a, b: [a, b], False, log=logs.append
+    )
+    chunks = list(loader)
+    patched_daily_result.attach_streaming_results(BacktestingEngine(), log=logs.append)
+
+    assert meter is None and not hasattr(loader, "stats")
+    assert chunks[0].start == start and chunks[-1].end == end and len(chunks) == 3
+    assert all(b.start == a.end + timedelta(microseconds=1) for a, b in zip(chunks, chunks[1:]))
+    assert len(logs) == 2
+
+
+def test_patches_keep_stock_matching_without_vnpy_grid(patched_daily_result, monkeypatch) -> None:
+    import sys
+
+    from vnpy_ctabacktester.engine import BacktesterEngine
+    from vnpy_ctastrategy.backtesting import DailyResult
+
+    for cls, name in ((BacktesterEngine, "run_backtesting"), (BacktesterEngine, "load_strategy_class"),
+                      (BacktesterEngine, "load_strategy_class_from_folder"),
+                      (BacktesterEngine, "load_strategy_class_from_module"),
+                      (DailyResult, "add_trade"), (DailyResult, "calculate_pnl")):
+        monkeypatch.setattr(cls, name, cls.__dict__[name])  # restored after the test
+    stock = BacktestingEngine.__dict__["cross_limit_order"]
+    monkeypatch.setitem(sys.modules, "vnpy_grid.backtest.matching", None)
+    monkeypatch.setattr(patched_daily_result, "INDEXED_MATCHING", True)
+
+    patched_daily_result.apply_patches()
+    patched_daily_result.set_indexed_matching(True)
+
+    assert BacktesterEngine.run_backtesting is patched_daily_result.patched_run_backtesting
+    assert BacktestingEngine.__dict__["cross_limit_order"] is stock
+    assert patched_daily_result.INDEXED_MATCHING is False
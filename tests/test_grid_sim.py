@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy_grid.backtest.grid_sim import GridSimulator, check_parity
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays
+
+
+def random_walk(rows: int, seed: int, sigma: float = 0.002) -> BarArrays:
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2022-01-01", periods=rows, freq="min", tz="UTC").as_unit("ns").asi8
+    close = 1_600 * np.exp(np.cumsum(rng.normal(0, sigma, rows)))
+    open_ = np.r_[1_600, close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, rows))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, rows))
+    return BarArrays(ts, open_, high, low, close, np.ones(rows), close)
+
+
+@pytest.mark.parametrize("setting", [
+    {},
+    {"maker_only_mode": False, "levels": 3},
+    # net exposure reduce orders and taker fees
+    {"grid_pct": 0.003, "max_net_exposure_limit": 0.02, "assume_maker_for_resting_orders": False},
+    # drawdown pause
+    {"initial_equity_quote": 100, "max_account_drawdown_percent": 0.01, "taker_fee_rate": 0.01,
+     "assume_maker_for_resting_orders": False},
+])
+def test_parity_with_engine(setting) -> None:
+    report = check_parity(random_walk(3_000, seed=7), setting)
+    assert report.ok, report.summary()
+    assert report.trades > 0
+
+
+def test_drawdown_pause_and_quiet_bars_are_skipped() -> None:
+    setting = {"initial_equity_quote": 100, "max_account_drawdown_percent": 0.01, "taker_fee_rate": 0.01,
+               "assume_maker_for_resting_orders": False}
+    paused = GridSimulator(setting).run(random_walk(3_000, seed=7))
+    assert paused.state["paused_by_drawdown"]
+
+    result = GridSimulator({"grid_pct": 0.01}).run(random_walk(20_000, seed=3, sigma=0.0005))
+    assert 0 < result.events < result.bars // 10
+    assert len(result.daily_df) == 14 and "trades" not in result.daily_df
+    assert result.statistics["total_trade_count"] == len(result.trades)
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy.trader.constant import Exchange
+
+from vnpy_grid.data.import_h5_to_vnpy import locate_fixed_rows
+from vnpy_grid.tools.run_backtest_from_h5 import iter_bars_from_h5
+
+START = datetime(2022, 1, 1, 3, 0)
+END = datetime(2022, 1, 1, 4, 30)
+
+
+def frame() -> pd.DataFrame:
+    idx = pd.date_range("2022-01-01", periods=600, freq="min")
+    close = np.arange(600, dtype="float64") + 100
+    return pd.DataFrame(
+        {"datetime": idx, "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0}
+    )
+
+
+@pytest.mark.parametrize(
+    "layout",
+    ["table_index", "table_column", "table_epoch_ms", "fixed_index", "fixed_column", "fixed_epoch_s", "fixed_str"],
+)
+def test_range_matches_full_scan(tmp_path, layout) -> None:
+    df = frame()
+    path = tmp_path / "bars.h5"
+    if layout == "table_index":
+        df.set_index("datetime").to_hdf(path, key="k", format="table")
+    elif layout == "table_column":
+        df.to_hdf(path, key="k", format="table", data_columns=["datetime"])
+    elif layout == "table_epoch_ms":
+        df.assign(datetime=df["datetime"].dt.as_unit("ms").astype("int64")).to_hdf(
+            path, key="k", format="table", data_columns=["datetime"]
+        )
+    elif layout == "fixed_index":
+        df.set_index("datetime").to_hdf(path, key="k", format="fixed")
+    elif layout == "fixed_column":
+        df.to_hdf(path, key="k", format="fixed")
+    elif layout == "fixed_epoch_s":
+        df.assign(datetime=df["datetime"].dt.as_unit("s").astype("int64")).to_hdf(path, key="k", format="fixed")
+    else:
+        df.assign(datetime=df["datetime"].astype(str)).to_hdf(path, key="k", format="fixed")
+
+    bars = list(iter_bars_from_h5(path, "k", "ETHUSDT", Exchange.GLOBAL, chunksize=50, start=START, end=END))
+    assert len(bars) == 91
+    assert bars[0].close_price == 280.0 and bars[-1].close_price == 370.0
+
+
+def test_locate_fixed_rows_reads_only_the_slice(tmp_path) -> None:
+    df = frame()
+    path = tmp_path / "bars.h5"
+    df.to_hdf(path, key="col", format="fixed")
+    df.set_index("datetime").to_hdf(path, key="idx", format="fixed")
+    df.assign(datetime=df["datetime"].astype(str)).to_hdf(path, key="str", format="fixed")
+
+    start_ns = pd.Timestamp(START, tz="UTC").value
+    end_ns = pd.Timestamp(END, tz="UTC").value
+    with pd.HDFStore(path, mode="r") as store:
+        assert locate_fixed_rows(store, "col", start_ns, end_ns) == (180, 271)
+        assert locate_fixed_rows(store, "idx", start_ns, end_ns) == (180, 271)
+        assert locate_fixed_rows(store, "idx", None, end_ns) == (0, 271)
+        assert locate_fixed_rows(store, "idx", end_ns * 2, None) == (600, 600)
+        assert locate_fixed_rows(store, "str", start_ns, end_ns) is None
+
+
+def test_unsorted_store_is_scanned_to_the_end(tmp_path) -> None:
+    df = frame()
+    # later rows first, and string times that cannot be binary searched
+    df = pd.concat([df.iloc[300:], df.iloc[:300]]).assign(datetime=lambda d: d["datetime"].astype(str))
+    path = tmp_path / "bars.h5"
+    df.to_hdf(path, key="k", format="fixed")
+
+    bars = list(iter_bars_from_h5(path, "k", "ETHUSDT", Exchange.GLOBAL, chunksize=50, start=START, end=END))
+    assert len(bars) == 91
+    assert bars[0].close_price == 280.0 and bars[-1].close_price == 370.0
+
+
+def test_unsorted_middle_block_is_not_binary_searched(tmp_path) -> None:
+    df = frame()
+    # first row still before the last, one block moved into the middle
+    df = pd.concat([df.iloc[:100], df.iloc[400:500], df.iloc[100:400], df.iloc[500:]])
+    path = tmp_path / "bars.h5"
+    df.to_hdf(path, key="k", format="fixed")
+
+    start_ns = pd.Timestamp(START, tz="UTC").value
+    end_ns = pd.Timestamp(END, tz="UTC").value
+    with pd.HDFStore(path, mode="r") as store:
+        assert locate_fixed_rows(store, "k", start_ns, end_ns) is None
+        assert locate_fixed_rows(store, "k", start_ns, end_ns, known_sorted=False) is None
+
+    bars = list(iter_bars_from_h5(path, "k", "ETHUSDT", Exchange.GLOBAL, chunksize=50, start=START, end=END))
+    assert sorted(b.close_price for b in bars) == [float(v) for v in range(280, 371)]
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+
+from vnpy_grid.data.history import ColumnarHistory
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays, build_bars_from_arrays
+from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
+
+
+def make_arrays(rows: int) -> BarArrays:
+    ts = pd.date_range("2022-01-01", periods=rows, freq="min", tz="UTC").as_unit("ns").asi8
+    close = 1_000 + np.cumsum(np.sin(np.arange(rows) / 7.0))
+    return BarArrays(ts, close, close + 0.8, close - 0.8, close, np.ones(rows), close)
+
+
+def run(history) -> BacktestingEngine:
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol="ETHUSDT.GLOBAL", interval=Interval.MINUTE.value,
+        start=datetime(2022, 1, 1), end=datetime(2022, 1, 5), rate=2.5e-5, slippage=0.2,
+        size=1, pricetick=0.01, capital=1_000_000, mode=BacktestingMode.BAR,
+    )
+    engine.add_strategy(DynamicHedgedRebateGridStrategy, {"grid_pct": 0.001})
+    engine.history_data = history
+    engine.run_backtesting()
+    engine.calculate_result()
+    return engine
+
+
+def test_list_protocol_and_flyweight() -> None:
+    history = ColumnarHistory(make_arrays(40_000), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, block_rows=1_000)
+    assert len(history) == 40_000
+    assert history[5].datetime == datetime(2022, 1, 1, 0, 5, tzinfo=timezone.utc)
+    assert history[-1] is not history[-1]
+
+    window = history[100:2_500]
+    assert len(window) == 2_400
+    seen = [(bar.datetime, bar.close_price) for bar in window]
+    assert seen[0][0].minute == 40 and len(seen) == 2_400
+    assert len({id(bar) for bar in history[:3_000]}) == 1
+
+    history.clear()
+    assert len(history) == 0 and list(history) == []
+
+
+def test_replay_matches_list_of_bars() -> None:
+    arrays = make_arrays(3_000)
+    bars = build_bars_from_arrays(arrays, "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, gateway_name="DB")
+    expected = run(bars)
+    for flyweight in (True, False):
+        got = run(ColumnarHistory(arrays, "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, flyweight=flyweight))
+        assert len(got.trades) == len(expected.trades) > 0
+        assert [t.price for t in got.trades.values()] == [t.price for t in expected.trades.values()]
+        assert got.daily_df["net_pnl"].tolist() == expected.daily_df["net_pnl"].tolist()
@@ -0,0 +1,59 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays
+from vnpy_grid.data.sqlite_bulk import SqliteBulkWriter
+from vnpy_grid.tools.import_h5_batch import FileResult, ImportJob, run_batch, spool_arrays, write_result
+
+
+def write_h5(path, start: str, periods: int) -> None:
+    idx = pd.date_range(start, periods=periods, freq="min")
+    close = np.arange(periods, dtype="float64") + 100
+    pd.DataFrame(
+        {"datetime": idx, "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0}
+    ).to_hdf(path, key="k", format="fixed")
+
+
+def test_batch_streams_chunks_and_reports_write_errors(tmp_path) -> None:
+    db = tmp_path / "bars.db"
+    write_h5(tmp_path / "a.h5", "2022-01-01", 250)
+    write_h5(tmp_path / "b.h5", "2022-01-02", 120)
+    jobs = [
+        ImportJob(str(tmp_path / "a.h5"), "ETHUSDT", "GLOBAL", "1m", key="k", db=str(db)),
+        ImportJob(str(tmp_path / "b.h5"), "BTCUSDT", "GLOBAL", "1m", key="k", db=str(tmp_path)),  # not a file
+        ImportJob(str(tmp_path / "b.h5"), "BTCUSDT", "GLOBAL", "1m", key="k", db=str(db)),
+    ]
+
+    summaries = run_batch(jobs, workers=2, chunk_rows=100)
+
+    assert [s.rows for s in summaries] == [250, 0, 120]
+    assert not summaries[0].error and summaries[1].error.startswith("write:") and not summaries[2].error
+    assert summaries[0].first_ns == pd.Timestamp("2022-01-01", tz="UTC").value
+    conn = sqlite3.connect(db)
+    counts = conn.execute('SELECT "symbol", "count" FROM dbbaroverview ORDER BY "symbol"').fetchall()
+    assert counts == [("BTCUSDT", 120), ("ETHUSDT", 250)]
+
+
+def test_failed_file_leaves_no_rows_past_the_commit_threshold(tmp_path) -> None:
+    db = tmp_path / "bars.db"
+    ts = pd.date_range("2022-01-01", periods=300, freq="min", tz="UTC").as_unit("ns").asi8
+    ones = np.ones(300)
+    parts = []
+    for i, lo in enumerate((0, 100, 200)):
+        sl = slice(lo, lo + 100)
+        part = str(tmp_path / f"{i}.npz")
+        spool_arrays(BarArrays(ts[sl], ones[sl], ones[sl], ones[sl], ones[sl], ones[sl], ones[sl]), part)
+        parts.append(part)
+    parts[2] = str(tmp_path / "lost.npz")  # the last chunk cannot be read
+    job = ImportJob("x.h5", "ETHUSDT", "GLOBAL", "1m", db=str(db))
+    result = FileResult(job, parts, 300, int(ts[0]), int(ts[-1]), 0.0)
+
+    writer = SqliteBulkWriter(db, commit_rows=50).open()
+    with pytest.raises(FileNotFoundError):
+        write_result({str(db): writer}, result)
+    writer.close()
+
+    assert sqlite3.connect(db).execute('SELECT COUNT(*) FROM dbbardata').fetchone() == (0,)
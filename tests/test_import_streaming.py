@@ -0,0 +1,37 @@
+import pandas as pd
+
+from vnpy_grid.tools.import_h5_to_vnpy_sqlite import OrderedChunker, iter_h5_slices
+
+
+def _frame(minutes: list[int], tag: float) -> pd.DataFrame:
+    idx = pd.to_datetime(minutes, unit="m", utc=True)
+    return pd.DataFrame({"close": [tag] * len(minutes)}, index=idx)
+
+
+def test_ordered_chunker_dedups_across_boundaries() -> None:
+    chunker = OrderedChunker()
+
+    out1, late1 = chunker.push(_frame([0, 1, 2], 1.0))
+    out2, late2 = chunker.push(_frame([2, 3, 4], 2.0))
+    out3, late3 = chunker.push(_frame([1, 5], 3.0))
+    tail = chunker.flush()
+
+    emitted = pd.concat([out1, out2, out3, tail])
+    assert list(emitted.index.minute) == [0, 1, 2, 3, 4, 5]
+    assert emitted.index.is_monotonic_increasing
+    assert emitted["close"].tolist() == [1.0, 1.0, 2.0, 2.0, 2.0, 3.0]
+    assert late1.empty and late2.empty
+    assert list(late3.index.minute) == [1]
+    assert chunker.late_rows == 1
+
+
+def test_iter_h5_slices_reads_fixed_and_table(tmp_path) -> None:
+    df = pd.DataFrame({"close": range(10)}, index=pd.date_range("2022-01-01", periods=10, freq="min"))
+    path = tmp_path / "bars.h5"
+    df.to_hdf(path, key="/fixed", format="fixed")
+    df.to_hdf(path, key="/table", format="table")
+
+    for key in ("/fixed", "/table"):
+        slices = list(iter_h5_slices(str(path), key, rows=4))
+        assert [len(s) for s in slices] == [4, 4, 2]
+        assert pd.concat(slices)["close"].tolist() == list(range(10))
@@ -0,0 +1,125 @@
+import pickle
+import random
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy.trader.constant import Direction, Exchange, Interval
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+from vnpy_ctastrategy.template import CtaTemplate
+
+from vnpy_grid.backtest.matching import PriceIndexedOrders, cross_limit_order
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays, build_bars_from_arrays
+from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
+
+
+def make_bars(rows: int) -> list:
+    ts = pd.date_range("2022-01-01", periods=rows, freq="min", tz="UTC").as_unit("ns").asi8
+    close = 1_000 + np.cumsum(np.sin(np.arange(rows) / 9.0) * 0.7)
+    arrays = BarArrays(ts, close - 0.1, close + 0.9, close - 0.9, close, np.ones(rows), close)
+    return build_bars_from_arrays(arrays, "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, gateway_name="DB")
+
+
+class ChurnStrategy(CtaTemplate):
+    """Sends and cancels orders from every callback, to exercise ordering corner cases."""
+
+    parameters = ["seed"]
+    seed = 0
+
+    def on_init(self) -> None:
+        self.rng = random.Random(self.seed)
+        self.log = []
+
+    def on_bar(self, bar) -> None:
+        for _ in range(self.rng.randint(0, 4)):
+            price = bar.close_price + self.rng.uniform(-3, 3)
+            send = self.buy if self.rng.random() < 0.5 else self.short
+            send(price, 1)
+        if self.rng.random() < 0.3:
+            self.cancel_all()
+
+    def on_order(self, order) -> None:
+        self.log.append(("order", order.vt_orderid, order.status.value))
+        if self.rng.random() < 0.1:
+            self.sell(order.price + 1, 1)
+        if self.rng.random() < 0.1 and self.cta_engine.active_limit_orders:
+            self.cancel_order(self.rng.choice(sorted(self.cta_engine.active_limit_orders)))
+
+    def on_trade(self, trade) -> None:
+        self.log.append(("trade", trade.vt_tradeid, trade.vt_orderid, trade.price))
+
+
+def run(bars, strategy, setting, patched: bool, monkeypatch) -> BacktestingEngine:
+    with monkeypatch.context() as m:
+        if patched:
+            m.setattr(BacktestingEngine, "cross_limit_order", cross_limit_order)
+        engine = BacktestingEngine()
+        engine.output = lambda msg: None
+        engine.set_parameters(
+            vt_symbol="ETHUSDT.GLOBAL", interval=Interval.MINUTE.value,
+            start=datetime(2022, 1, 1), end=datetime(2022, 1, 5), rate=2.5e-5, slippage=0.2,
+            size=1, pricetick=0.01, capital=1_000_000, mode=BacktestingMode.BAR,
+        )
+        engine.add_strategy(strategy, setting)
+        engine.history_data = bars
+        engine.run_backtesting()
+    return engine
+
+
+def trades_of(engine: BacktestingEngine) -> list:
+    return [(t.vt_tradeid, t.vt_orderid, t.direction, t.price, t.volume, t.datetime) for t in engine.trades.values()]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_churn_is_identical_to_stock(seed, monkeypatch) -> None:
+    bars = make_bars(1_500)
+    stock = run(bars, ChurnStrategy, {"seed": seed}, False, monkeypatch)
+    indexed = run(bars, ChurnStrategy, {"seed": seed}, True, monkeypatch)
+    assert isinstance(indexed.active_limit_orders, PriceIndexedOrders)
+    assert indexed.strategy.log == stock.strategy.log
+    assert trades_of(indexed) == trades_of(stock) != []
+    assert list(indexed.active_limit_orders) == list(stock.active_limit_orders)
+
+
+def test_wide_grid_is_identical_to_stock(monkeypatch) -> None:
+    bars = make_bars(1_500)
+    setting = {"grid_pct": 0.004, "levels": 200}
+    stock = run(bars, DynamicHedgedRebateGridStrategy, setting, False, monkeypatch)
+    indexed = run(bars, DynamicHedgedRebateGridStrategy, setting, True, monkeypatch)
+    assert trades_of(indexed) == trades_of(stock) != []
+    assert [(o.vt_orderid, o.status) for o in indexed.limit_orders.values()] == [
+        (o.vt_orderid, o.status) for o in stock.limit_orders.values()
+    ]
+
+
+def test_index_follows_dict_mutations() -> None:
+    from vnpy.trader.object import OrderData
+
+    def order(i: int, direction: Direction, price: float) -> OrderData:
+        return OrderData(
+            gateway_name="BACKTESTING", symbol="ETHUSDT", exchange=Exchange.GLOBAL,
+            orderid=str(i), direction=direction, price=price, volume=1,
+        )
+
+    book = PriceIndexedOrders()
+    for i, (d, p) in enumerate([(Direction.LONG, 99), (Direction.SHORT, 101), (Direction.LONG, 100.5),
+                                (Direction.SHORT, 100.2), (Direction.LONG, 98)], 1):
+        book[f"BACKTESTING.{i}"] = order(i, d, p)
+    assert [o.orderid for o in book.touched(100, 100.4)] == ["1", "2", "3", "4", "5"]  # all new
+    assert [o.orderid for o in book.touched(100, 100.4)] == ["3", "4"]
+
+    book.pop("BACKTESTING.3")
+    del book["BACKTESTING.4"]
+    assert book.pop("missing", None) is None
+    assert [o.orderid for o in book.touched(98, 101)] == ["1", "2", "5"]
+    book["BACKTESTING.6"] = order(6, Direction.LONG, 97)
+    assert [o.orderid for o in book.touched(98, 101)] == ["1", "2", "5", "6"]
+    assert [o.orderid for o in book.touched(97, 100)] == ["1", "5", "6"]
+    del book["BACKTESTING.6"]
+
+    clone = pickle.loads(pickle.dumps(book))
+    assert list(clone) == list(book) and [o.orderid for o in clone.touched(0, 0)] == ["1", "2", "5"]
+    book.clear()
+    assert book.touched(0, 1_000) == []
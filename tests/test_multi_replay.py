@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from vnpy_grid.backtest.multi import MultiEngineReplay
+
+from test_skipping import calm_bars, new_engine
+
+SETTINGS = [{"grid_pct": 0.001}, {"grid_pct": 0.002, "levels": 8}, {"grid_pct": 0.004, "max_net_exposure_limit": 0.02}]
+
+
+def engine_for(setting: dict):
+    engine = new_engine(streaming=True)
+    engine.strategy.update_setting(setting)
+    return engine
+
+
+@pytest.mark.parametrize("skip", [False, True])
+def test_one_pass_matches_separate_runs(skip) -> None:
+    bars = calm_bars(6_000, seed=4)
+    chunks = [bars[i:i + 2_000] for i in range(0, len(bars), 2_000)]
+
+    replay = MultiEngineReplay([engine_for(s) for s in SETTINGS], skip_quiet_bars=skip)
+    for chunk in chunks:
+        replay.feed(chunk)
+    stats = replay.finish()
+    assert replay.bars == len(bars)
+
+    for setting, engine, ours in zip(SETTINGS, replay.engines, stats):
+        alone = engine_for(setting)
+        for bar in bars:
+            alone.new_bar(bar)
+        alone.strategy.on_stop()
+        alone.calculate_result()
+        expected = alone.calculate_statistics(output=False)
+        assert engine.trade_count == alone.trade_count > 0
+        pd.testing.assert_frame_equal(engine.daily_df, alone.daily_df)
+        pd.testing.assert_series_equal(pd.Series(ours), pd.Series(expected))
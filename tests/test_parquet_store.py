@@ -0,0 +1,129 @@
+import importlib
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy.trader.constant import Exchange, Interval
+
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays
+from vnpy_grid.data.parquet_store import ParquetDatabase
+
+
+def make_arrays(start: str, rows: int, offset: float = 0.0) -> BarArrays:
+    ts = pd.date_range(start, periods=rows, freq="h", tz="UTC").as_unit("ns").asi8
+    close = np.arange(rows, dtype="float64") + 100 + offset
+    return BarArrays(ts, close, close + 1, close - 1, close, np.ones(rows), close)
+
+
+def test_partitions_roundtrip_and_pruning(tmp_path) -> None:
+    db = ParquetDatabase(tmp_path)
+    # 2022-01-30 .. 2022-03-03: three month partitions
+    db.write_arrays(make_arrays("2022-01-30", 24 * 32), "ETHUSDT", Exchange.GLOBAL, Interval.HOUR)
+    files = db.partitions("ETHUSDT", Exchange.GLOBAL, Interval.HOUR)
+    assert [f.stem for f in files] == ["2022-01", "2022-02", "2022-03"]
+
+    start = datetime(2022, 2, 10, tzinfo=timezone.utc)
+    end = datetime(2022, 2, 10, 5, tzinfo=timezone.utc)
+    lo, hi = pd.Timestamp(start).value, pd.Timestamp(end).value
+    assert [f.stem for f in db.partitions("ETHUSDT", Exchange.GLOBAL, Interval.HOUR, lo, hi)] == ["2022-02"]
+
+    bars = db.load_bar_data("ETHUSDT", Exchange.GLOBAL, Interval.HOUR, start, end)
+    assert len(bars) == 6
+    assert bars[0].datetime == start and bars[0].close_price == 100 + 11 * 24
+    assert bars[0].gateway_name == "DB" and bars[0].interval is Interval.HOUR
+
+    arrays = db.load_bar_arrays("ETHUSDT", Exchange.GLOBAL, Interval.HOUR, start, end)
+    assert arrays.ts_ns.tolist() == [pd.Timestamp(b.datetime).value for b in bars]
+
+
+def test_upsert_overview_and_delete(tmp_path) -> None:
+    db = ParquetDatabase(tmp_path)
+    db.write_arrays(make_arrays("2022-01-01", 48), "ETHUSDT", Exchange.GLOBAL, Interval.HOUR)
+    # overlapping rewrite: last write wins, no duplicate timestamps
+    db.write_arrays(make_arrays("2022-01-02", 48, offset=1000), "ETHUSDT", Exchange.GLOBAL, Interval.HOUR)
+    db.flush()  # buffered until then: other instances only see flushed partitions
+
+    reopened = ParquetDatabase(tmp_path)
+    (ov,) = reopened.get_bar_overview()
+    assert ov.count == 72
+    assert ov.start == datetime(2022, 1, 1, tzinfo=timezone.utc)
+    assert ov.end == datetime(2022, 1, 3, 23, tzinfo=timezone.utc)
+    bars = reopened.load_bar_data(
+        "ETHUSDT", Exchange.GLOBAL, Interval.HOUR, ov.start, ov.end
+    )
+    assert len(bars) == 72 and bars[24].close_price == 1100.0
+
+    # BarData path
+    reopened.save_bar_data(bars[:2])
+    assert reopened.get_bar_overview()[0].count == 72
+
+    assert reopened.delete_bar_data("ETHUSDT", Exchange.GLOBAL, Interval.HOUR) == 72
+    assert reopened.get_bar_overview() == []
+    assert reopened.load_bar_data("ETHUSDT", Exchange.GLOBAL, Interval.HOUR, ov.start, ov.end) == []
+
+
+def test_batched_writes_rewrite_each_month_once(tmp_path, monkeypatch) -> None:
+    db = ParquetDatabase(tmp_path)
+    writes = []
+    original = ParquetDatabase._write_partition
+
+    def write_partition(path, table):
+        writes.append(path.stem)
+        return original(path, table)
+
+    monkeypatch.setattr(ParquetDatabase, "_write_partition", staticmethod(write_partition))
+    monkeypatch.setattr(ParquetDatabase, "partition_stats", None)  # the overview must not rescan footers
+
+    arrays = make_arrays("2022-01-20", 24 * 60)  # 2022-01-20 .. 2022-03-20
+    for i in range(0, len(arrays), 50):
+        db.write_arrays(arrays.select(np.arange(len(arrays))[i:i + 50]), "ETHUSDT", Exchange.GLOBAL, Interval.HOUR)
+    # overlapping batch into a month already on disk
+    db.write_arrays(make_arrays("2022-01-31", 2, offset=1000), "ETHUSDT", Exchange.GLOBAL, Interval.HOUR)
+    db.flush()
+    assert writes == ["2022-01", "2022-02", "2022-03", "2022-01"]
+
+    (ov,) = ParquetDatabase(tmp_path).get_bar_overview()
+    assert ov.count == 24 * 60
+    assert ov.start == datetime(2022, 1, 20, tzinfo=timezone.utc)
+    assert ov.end == datetime(2022, 3, 20, 23, tzinfo=timezone.utc)
+
+
+def test_ticks_are_refused_on_both_sides(tmp_path) -> None:
+    db = ParquetDatabase(tmp_path)
+    with pytest.raises(NotImplementedError):
+        db.save_tick_data([])
+    with pytest.raises(NotImplementedError):
+        db.load_tick_data("ETHUSDT", Exchange.GLOBAL, datetime(2022, 1, 1), datetime(2022, 1, 2))
+
+
+def test_vnpy_plugin_module() -> None:
+    module = importlib.import_module("vnpy_parquet")
+    assert module.Database is ParquetDatabase
+
+
+def test_naive_bars_are_database_time_across_dst(tmp_path, monkeypatch) -> None:
+    from datetime import timedelta
+    from zoneinfo import ZoneInfo
+
+    from vnpy.trader.object import BarData
+
+    import vnpy_grid.data.parquet_store as parquet_store
+    import vnpy_grid.data.watermark as watermark
+
+    london = ZoneInfo("Europe/London")
+    monkeypatch.setattr(watermark, "DB_TZ", london)
+    monkeypatch.setattr(parquet_store, "DB_TZ", london)
+    naive = [datetime(2022, 10, 30, 0, 30) + timedelta(minutes=10 * i) for i in range(15)]
+    bars = [
+        BarData(gateway_name="DB", symbol="ETHUSDT", exchange=Exchange.GLOBAL, datetime=dt,
+                interval=Interval.MINUTE, open_price=1, high_price=1, low_price=1, close_price=1)
+        for dt in naive
+    ]
+    db = ParquetDatabase(tmp_path)
+    db.save_bar_data(bars)
+
+    expected = [pd.Timestamp(dt.replace(tzinfo=london)).value for dt in naive]
+    start, end = naive[0], naive[-1]
+    assert db.load_bar_arrays("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, start, end).ts_ns.tolist() == expected
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays
+from vnpy_grid.data.pipeline import ConvertedChunk, ImportPipeline
+
+
+def test_pipeline_preserves_order_and_counts_rows() -> None:
+    written: list[list[int]] = []
+
+    def write(item: list[int]) -> int:
+        written.append(item)
+        return len(item)
+
+    chunks = [[i, i + 1] for i in range(0, 20, 2)]
+    report = ImportPipeline(chunks, lambda c: [x * 10 for x in c], write, queue_size=1).run()
+
+    assert written == [[x * 10 for x in c] for c in chunks]
+    assert report.rows_written == 20
+    assert [s.items for s in report.stages] == [10, 10, 10]
+
+
+def test_pipeline_surfaces_stage_errors() -> None:
+    def convert(item: list[int]) -> list[int]:
+        if item[0] == 4:
+            raise ValueError("bad chunk")
+        return item
+
+    chunks = ([i] for i in range(100))
+    with pytest.raises(ValueError, match="bad chunk"):
+        ImportPipeline(chunks, convert, len, queue_size=2).run()
+
+
+def make_arrays(rows: int, offset: int = 0) -> BarArrays:
+    ts = (np.arange(rows, dtype="int64") + offset) * 60_000_000_000
+    ones = np.ones(rows)
+    return BarArrays(ts, ones, ones, ones, ones, ones, ones)
+
+
+def test_pipeline_counts_rows_of_non_bulk_chunks() -> None:
+    chunks = [make_arrays(1_000, offset=i * 1_000) for i in range(5)]
+    bars_written: list = []
+
+    def convert(arrays: BarArrays) -> ConvertedChunk:
+        return ConvertedChunk(arrays, list(arrays.ts_ns))  # stand-ins for BarData
+
+    def write(item: ConvertedChunk) -> int:
+        bars_written.extend(item.bars)
+        return len(item.arrays)
+
+    report = ImportPipeline(iter(chunks), convert, write, queue_size=2).run()
+
+    assert [s.rows for s in report.stages] == [5_000, 5_000, 5_000]
+    assert len(bars_written) == report.rows_written == 5_000
@@ -0,0 +1,52 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from vnpy_grid.data.prefetch import PrefetchLoader, time_windows
+
+
+def test_time_windows_cover_range() -> None:
+    windows = list(time_windows(datetime(2022, 1, 1), datetime(2022, 1, 31), chunk_days=10))
+    assert windows[0] == (datetime(2022, 1, 1), datetime(2022, 1, 11))
+    assert windows[1][0] == datetime(2022, 1, 11, 0, 1)
+    assert windows[-1][1] == datetime(2022, 1, 31)
+
+
+def slow_load(start: datetime, end: datetime) -> list:
+    time.sleep(0.05)
+    return [start] * 3
+
+
+@pytest.mark.parametrize("depth", [0, 2])
+def test_chunks_arrive_in_order_and_waits_are_measured(depth) -> None:
+    windows = list(time_windows(datetime(2022, 1, 1), datetime(2022, 3, 1), chunk_days=7))
+    loader = PrefetchLoader(windows, slow_load, depth=depth)
+    seen = []
+    for chunk in loader:
+        time.sleep(0.05)  # replay as slow as the load: prefetch hides it
+        seen.append(chunk.start)
+    assert seen == [w[0] for w in windows]
+    assert loader.stats.chunks == len(windows) and loader.stats.rows == 3 * len(windows)
+    if depth:
+        assert loader.stats.wait_s < 0.5 * loader.stats.load_s
+    else:
+        assert loader.stats.wait_s == pytest.approx(loader.stats.load_s)
+
+
+def test_errors_surface_and_early_exit_stops_worker() -> None:
+    def failing(start: datetime, end: datetime) -> list:
+        if start.month == 2:
+            raise RuntimeError("db gone")
+        return [start]
+
+    windows = time_windows(datetime(2022, 1, 1), datetime(2022, 3, 1), chunk_days=7)
+    with pytest.raises(RuntimeError, match="db gone"):
+        for _ in PrefetchLoader(windows, failing, depth=2):
+            pass
+
+    loader = PrefetchLoader(time_windows(datetime(2022, 1, 1), datetime(2023, 1, 1), chunk_days=1), slow_load, depth=3)
+    for _ in loader:
+        break
+    assert not any(t.name == "bar-prefetch" for t in threading.enumerate())
@@ -0,0 +1,60 @@
+from datetime import timezone
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays, build_bars_from_arrays
+from vnpy_grid.data.quality import QualityIndex, QualityScanner, apply_policy
+
+MIN = 60 * 1_000_000_000
+
+
+def bars_with_defects() -> BarArrays:
+    ts = pd.date_range("2022-01-01", periods=20, freq="min", tz="UTC").as_unit("ns").asi8
+    ts = np.delete(ts, [5, 6, 7])  # three missing minutes
+    ts = np.insert(ts, 10, ts[9])  # duplicate
+    close = np.full(len(ts), 100.0)
+    high, low = close + 1, close - 1
+    close[3] = 0.0  # NaN filled with 0.0 on import
+    high[12], low[12] = 99.0, 101.0
+    return BarArrays(ts, close.copy(), high, low, close, np.ones(len(ts)), np.zeros(len(ts)))
+
+
+def test_scanner_finds_defects_across_chunks() -> None:
+    arrays = bars_with_defects()
+    scanner = QualityScanner(Interval.MINUTE)
+    for start in range(0, len(arrays), 4):
+        scanner.push(arrays.select(slice(start, start + 4)))
+
+    kinds = {s.kind: s for s in scanner.spans}
+    assert kinds["gap"].rows == 3
+    assert kinds["gap"].start_ns == pd.Timestamp("2022-01-01 00:05", tz="UTC").value
+    assert kinds["duplicate"].rows == 1
+    assert kinds["bad_price"].rows == 1
+    assert kinds["high_low"].rows == 1
+
+
+def test_index_roundtrip_and_policies(tmp_path) -> None:
+    arrays = bars_with_defects()
+    scanner = QualityScanner(Interval.MINUTE)
+    scanner.push(arrays)
+    index = QualityIndex.for_series("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, root=tmp_path)
+    index.record(scanner)
+
+    index = QualityIndex.for_series("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, root=tmp_path)
+    assert index.counts() == {"bad_price": 1, "gap": 3, "duplicate": 1, "high_low": 1}
+
+    keep = np.ones(len(arrays), dtype=bool)
+    keep[10] = False  # the database keeps one row per timestamp
+    bars = build_bars_from_arrays(arrays.select(keep), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+
+    assert len(apply_policy(bars, index, "skip", log=lambda _: None)) == len(bars) - 2
+
+    filled = apply_policy(bars, index, "ffill", log=lambda _: None)
+    ts = [b.datetime.astimezone(timezone.utc) for b in filled]
+    assert len(filled) == 20
+    assert ts == sorted(ts)
+    assert min(b.low_price for b in filled) > 0
+    assert all(b.high_price >= b.low_price for b in filled)
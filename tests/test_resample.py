@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy.trader.constant import Interval
+
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays
+from vnpy_grid.data.resample import BarResampler, derived_resamplers, rebuild_after_ns
+
+
+def minute_arrays(rows: int, start: str = "2022-01-01 23:00") -> BarArrays:
+    rng = np.random.default_rng(3)
+    ts = pd.date_range(start, periods=rows, freq="min", tz="UTC").as_unit("ns").asi8
+    close = 100 + np.cumsum(rng.normal(size=rows))
+    return BarArrays(ts, close - 0.1, close + 1.0, close - 1.0, close, rng.random(rows), rng.random(rows))
+
+
+def test_chunked_push_matches_pandas_resample() -> None:
+    arrays = minute_arrays(3_000)
+    r = BarResampler("1h")
+    parts = []
+    for start in range(0, len(arrays), 137):
+        parts.append(r.push(arrays.select(slice(start, start + 137))))
+    parts.append(r.flush())
+    ts = np.concatenate([p.ts_ns for p in parts])
+
+    df = pd.DataFrame(
+        {"open": arrays.open, "high": arrays.high, "low": arrays.low, "close": arrays.close, "volume": arrays.volume},
+        index=pd.DatetimeIndex(arrays.ts_ns, tz="UTC"),
+    )
+    expected = df.resample("1h").agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+
+    assert ts.tolist() == expected.index.as_unit("ns").asi8.tolist()
+    assert np.allclose(np.concatenate([p.high for p in parts]), expected["high"])
+    assert np.allclose(np.concatenate([p.close for p in parts]), expected["close"])
+    assert np.allclose(np.concatenate([p.volume for p in parts]), expected["volume"])
+
+
+def test_weeks_start_on_monday_and_late_rows_are_dropped() -> None:
+    r = BarResampler("1w")
+    arrays = minute_arrays(10 * 1440, start="2024-01-03")  # a Wednesday
+    out = r.push(arrays)
+    assert pd.Timestamp(int(out.ts_ns[0]), tz="UTC") == pd.Timestamp("2024-01-01", tz="UTC")
+
+    r.push(minute_arrays(5, start="2024-01-03"))
+    assert r.late_rows == 5
+
+
+def test_derive_validation_and_rebuild_point() -> None:
+    with pytest.raises(ValueError):
+        derived_resamplers(["5m"], Interval.MINUTE)
+    with pytest.raises(ValueError):
+        derived_resamplers(["1d"], Interval.HOUR)
+
+    resamplers = derived_resamplers(["1h", "d"], Interval.MINUTE)
+    assert [r.interval for r in resamplers] == [Interval.HOUR, Interval.DAILY]
+    mark = pd.Timestamp("2022-01-02 13:30", tz="UTC").value
+    assert rebuild_after_ns(resamplers, mark) == pd.Timestamp("2022-01-02", tz="UTC").value - 1
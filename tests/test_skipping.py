@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+
+from vnpy_grid.backtest.daily import StreamingDailyResults
+from vnpy_grid.backtest.skipping import QuietBarSkipper, RangeIndex
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays, build_bars_from_arrays
+from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
+
+
+def calm_bars(rows: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2022-01-01", periods=rows, freq="min", tz="UTC").as_unit("ns").asi8
+    close = 1_600 * np.exp(np.cumsum(rng.normal(0, 0.0003, rows)))
+    open_ = np.r_[1_600, close[:-1]]
+    high = np.maximum(open_, close) * 1.0001
+    low = np.minimum(open_, close) * 0.9999
+    arrays = BarArrays(ts, open_, high, low, close, np.ones(rows), close)
+    return build_bars_from_arrays(arrays, "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE, gateway_name="DB")
+
+
+def new_engine(streaming: bool) -> BacktestingEngine:
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol="ETHUSDT.GLOBAL", interval=Interval.MINUTE.value,
+        start=datetime(2022, 1, 1), end=datetime(2022, 2, 1), rate=2.5e-5, slippage=0.2,
+        size=1, pricetick=0.01, capital=1_000_000, mode=BacktestingMode.BAR,
+    )
+    engine.add_strategy(DynamicHedgedRebateGridStrategy, {"grid_pct": 0.002})
+    if streaming:
+        StreamingDailyResults.attach(engine)
+    engine.strategy.on_start()
+    engine.strategy.trading = True
+    return engine
+
+
+def fingerprint(engine: BacktestingEngine):
+    trades = [(t.vt_tradeid, t.vt_orderid, t.price, t.volume, t.datetime) for t in engine.trades.values()]
+    df = engine.calculate_result().drop(columns=["trades"], errors="ignore")
+    orders = [(o.vt_orderid, o.status) for o in engine.limit_orders.values()]
+    return engine.trade_count, trades, orders, engine.datetime, df
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_skipping_is_identical_to_stock(streaming) -> None:
+    bars = calm_bars(12_000)
+    chunks = [bars[i:i + 5_000] for i in range(0, len(bars), 5_000)]
+
+    stock = new_engine(streaming)
+    for bar in bars:
+        stock.new_bar(bar)
+    engine = new_engine(streaming)
+    skipper = QuietBarSkipper(engine)
+    for chunk in chunks:
+        skipper.feed(chunk)
+
+    assert skipper.fed + skipper.skipped == len(bars) and skipper.skipped > len(bars) // 2
+    *ours, df = fingerprint(engine)
+    *theirs, ref_df = fingerprint(stock)
+    assert ours == theirs and ours[0] > 0
+    pd.testing.assert_frame_equal(df, ref_df)
+
+
+def test_range_index_first_cross() -> None:
+    rng = np.random.default_rng(5)
+    high = rng.uniform(100, 110, 1_000)
+    low = high - rng.uniform(0, 10, 1_000)
+    low[::97] = 0.0  # never crosses
+    index = RangeIndex(high, low)
+    for start, bid, ask in [(0, 95, 112), (3, 91, 109.9), (500, 90.5, 115), (999, 0, 1e9), (0, -np.inf, np.inf)]:
+        hits = [i for i in range(start, 1_000) if (0 < low[i] <= bid) or high[i] >= ask]
+        assert index.first_cross(start, bid, ask) == (hits[0] if hits else 1_000)
@@ -0,0 +1,85 @@
+import sqlite3
+
+import numpy as np
+import pytest
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.setting import SETTINGS
+
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays
+from vnpy_grid.data.sqlite_bulk import SqliteBulkWriter, require_sqlite_database
+
+
+def _arrays(minutes: list[int], close: float) -> BarArrays:
+    n = len(minutes)
+    ts = 1_577_836_800_000_000_000 + np.asarray(minutes, dtype="int64") * 60_000_000_000
+    ones = np.ones(n)
+    return BarArrays(ts, ones, ones * 2, ones * 0.5, ones * close, ones, np.zeros(n))
+
+
+def test_bulk_writer_dedups_and_refreshes_overview(tmp_path) -> None:
+    path = tmp_path / "bars.db"
+
+    with SqliteBulkWriter(path, commit_rows=2) as w:
+        w.write_arrays(_arrays([0, 1, 2], 10.0), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+        w.write_arrays(_arrays([2, 3], 20.0), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute('SELECT "datetime", "close_price" FROM dbbardata ORDER BY "datetime"').fetchall()
+    overview = conn.execute('SELECT "count", "start", "end" FROM dbbaroverview').fetchall()
+    index = conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='dbbardata'").fetchall()
+
+    assert [r[1] for r in rows] == [10.0, 10.0, 20.0, 20.0]
+    assert overview == [(4, rows[0][0], rows[-1][0])]
+    assert index == [("dbbardata_symbol_exchange_interval_datetime",)]
+
+
+def test_bulk_writer_rolls_back_the_open_batch_on_error(tmp_path) -> None:
+    path = tmp_path / "bars.db"
+
+    with pytest.raises(ValueError):
+        with SqliteBulkWriter(path, commit_rows=3) as w:
+            w.write_arrays(_arrays([0, 1, 2], 10.0), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+            w.write_arrays(_arrays([3, 4], 20.0), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+            raise ValueError("source broke mid-import")
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute('SELECT "close_price" FROM dbbardata ORDER BY "datetime"').fetchall()
+    overview = conn.execute('SELECT "count" FROM dbbaroverview').fetchall()
+    index = conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='dbbardata'").fetchall()
+
+    assert [r[0] for r in rows] == [10.0, 10.0, 10.0]
+    assert overview == [(3,)]
+    assert index == [("dbbardata_symbol_exchange_interval_datetime",)]
+
+
+def test_bulk_refused_unless_sqlite_is_configured(monkeypatch, tmp_path) -> None:
+    monkeypatch.setitem(SETTINGS, "database.name", "mysql")
+    with pytest.raises(RuntimeError, match="database.name"):
+        SqliteBulkWriter()
+    SqliteBulkWriter(tmp_path / "bars.db")  # an explicit file is still fine
+
+    monkeypatch.setitem(SETTINGS, "database.name", "sqlite")
+    require_sqlite_database()
+
+
+def test_reopen_repairs_an_import_killed_before_close(tmp_path) -> None:
+    path = tmp_path / "bars.db"
+    killed = SqliteBulkWriter(path, commit_rows=100).open()
+    killed.write_arrays(_arrays([0, 1, 2], 10.0), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+    killed.write_arrays(_arrays([2, 3], 20.0), "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+    killed.commit()
+    killed.conn.close()  # the process dies: no dedup, no index, no overview
+
+    with SqliteBulkWriter(path) as w:
+        w.write_arrays(_arrays([0, 1], 30.0), "BTCUSDT", Exchange.GLOBAL, Interval.MINUTE)
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        'SELECT "symbol", COUNT(*), COUNT(DISTINCT "datetime") FROM dbbardata GROUP BY "symbol" ORDER BY "symbol"'
+    ).fetchall()
+    overview = conn.execute('SELECT "symbol", "count" FROM dbbaroverview ORDER BY "symbol"').fetchall()
+    index = conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='dbbardata'").fetchall()
+
+    assert rows == [("BTCUSDT", 2, 2), ("ETHUSDT", 4, 4)]
+    assert overview == [("BTCUSDT", 2), ("ETHUSDT", 4)]
+    assert index == [("dbbardata_symbol_exchange_interval_datetime",)]
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from vnpy_grid.backtest.grid_sim import GridSimulator
+from vnpy_grid.backtest.sweep import SharedBars, expand_grid, run_sweep
+
+from test_grid_sim import random_walk
+
+
+def test_expand_grid() -> None:
+    settings = expand_grid({"grid_pct": [0.001, 0.002], "levels": [3, 5, 7]}, base={"levels": 1, "min_order_size": 0.01})
+    assert len(settings) == 6
+    assert settings[0] == {"levels": 3, "min_order_size": 0.01, "grid_pct": 0.001}
+    assert expand_grid([{"levels": 2}], base={"grid_pct": 0.003}) == [{"grid_pct": 0.003, "levels": 2}]
+
+
+def test_shared_bars_are_views_of_one_block() -> None:
+    arrays = random_walk(1_000, seed=1)
+    with SharedBars.create(arrays) as shared:
+        other = SharedBars.attach(shared.spec)
+        try:
+            assert np.array_equal(other.arrays.ts_ns, arrays.ts_ns)
+            assert np.array_equal(other.arrays.close, arrays.close)
+            assert not other.arrays.close.flags.owndata
+            shared.arrays.close[0] = -1.0
+            assert other.arrays.close[0] == -1.0
+        finally:
+            other.close()
+
+
+def test_sweep_backends_agree() -> None:
+    arrays = random_walk(2_000, seed=2)
+    settings = expand_grid({"grid_pct": [0.002, 0.004], "maker_only_mode": [True, False]})
+    engine = run_sweep(arrays, settings, workers=2, backend="engine", log=lambda msg: None)
+    sim = run_sweep(arrays, settings, workers=2, backend="sim", log=lambda msg: None)
+
+    assert list(engine["variant"]) == [0, 1, 2, 3] and engine["error"].isna().all()
+    stats = [c for c in engine.columns if c not in ("seconds", "cpu_seconds", "pid")]
+    pd.testing.assert_frame_equal(engine[stats], sim[stats])
+    direct = GridSimulator(settings[3]).run(arrays).statistics
+    assert sim.loc[3, "total_net_pnl"] == direct["total_net_pnl"]
+    assert sim.loc[3, "total_trade_count"] == direct["total_trade_count"] > 0
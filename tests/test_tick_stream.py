@@ -0,0 +1,94 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import TickData
+from vnpy_ctastrategy.backtesting import BacktestingEngine, BacktestingMode
+
+from vnpy_grid.data.chunking import ChunkBudget
+from vnpy_grid.data.prefetch import PrefetchLoader
+from vnpy_grid.data.tick_stream import ReplayMeter, tick_windows
+from vnpy_grid.strategies import DynamicHedgedRebateGridStrategy
+
+START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def make_ticks(hours: int) -> list:
+    # one tick every 2.5s, so some land exactly on window boundaries and some between seconds
+    n = hours * 1440
+    price = 1_000 + np.cumsum(np.sin(np.arange(n) / 11.0) * 0.3)
+    ticks = []
+    for i, p in enumerate(price.tolist()):
+        ticks.append(TickData(
+            gateway_name="DB", symbol="ETHUSDT", exchange=Exchange.GLOBAL,
+            datetime=START + timedelta(milliseconds=2_500 * i),
+            last_price=p, volume=float(i), bid_price_1=p - 0.05, ask_price_1=p + 0.05,
+            bid_volume_1=1, ask_volume_1=1,
+        ))
+    return ticks
+
+
+def make_engine() -> BacktestingEngine:
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol="ETHUSDT.GLOBAL", interval=Interval.TICK.value,
+        start=START, end=START + timedelta(days=1), rate=2.5e-5, slippage=0.0,
+        size=1, pricetick=0.01, capital=1_000_000, mode=BacktestingMode.TICK,
+    )
+    engine.add_strategy(DynamicHedgedRebateGridStrategy, {"grid_pct": 0.0005})
+    return engine
+
+
+def test_windows_cover_every_tick_once() -> None:
+    ticks = make_ticks(5)
+    times = [t.datetime for t in ticks]
+    end = times[-1]
+
+    def load(s, e):
+        return ticks[bisect_left(times, s): bisect_right(times, e)]
+
+    windows = list(tick_windows(START, end, "ETHUSDT", Exchange.GLOBAL))
+    assert len(windows) == 5 and windows[1][0] - windows[0][1] == timedelta(microseconds=1)
+    loaded = [t for s, e in windows for t in load(s, e)]
+    assert loaded == ticks
+
+    budget = ChunkBudget(rows=500)
+    adaptive = tick_windows(START, end, "ETHUSDT", Exchange.GLOBAL, budget)
+    adaptive.rows_per_day = 1440 * 24
+    loader = PrefetchLoader(adaptive, load, depth=2)
+    assert [t for chunk in loader for t in chunk.bars] == ticks
+    assert loader.stats.chunks > 10
+
+
+def test_streamed_ticks_match_full_replay() -> None:
+    ticks = make_ticks(6)
+    times = [t.datetime for t in ticks]
+
+    full = make_engine()
+    full.history_data = ticks
+    full.run_backtesting()
+
+    streamed = make_engine()
+    streamed.strategy.on_init()
+    streamed.strategy.on_start()
+    streamed.strategy.trading = True
+    meter = ReplayMeter(every_s=0)
+    loader = PrefetchLoader(
+        tick_windows(START, times[-1], "ETHUSDT", Exchange.GLOBAL),
+        lambda s, e: ticks[bisect_left(times, s): bisect_right(times, e)],
+    )
+    for chunk in loader:
+        for tick in chunk.bars:
+            streamed.new_tick(tick)
+        meter.add(len(chunk.bars))
+    streamed.strategy.on_stop()
+
+    assert meter.rows == len(ticks) and meter.due()
+    assert "ticks/s" in meter.line(START, times[-1], times[-1])
+    assert len(streamed.trades) == len(full.trades) > 0
+    assert [(t.datetime, t.price, t.volume) for t in streamed.trades.values()] == [
+        (t.datetime, t.price, t.volume) for t in full.trades.values()
+    ]
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from vnpy.trader.constant import Exchange, Interval
+
+from vnpy_grid.data.import_h5_to_vnpy import BarArrays, build_time_where
+from vnpy_grid.data.parquet_store import ParquetDatabase
+from vnpy_grid.data.watermark import ImportManifest, resolve_watermark_ns
+
+
+def test_manifest_checkpoint_survives_reload(tmp_path) -> None:
+    path = tmp_path / "manifest.json"
+    manifest = ImportManifest(path, database="sqlite:/a.db")
+
+    manifest.checkpoint("ETHUSDT.GLOBAL.1m", 2_000, 10, source="a.h5")
+    manifest.checkpoint("ETHUSDT.GLOBAL.1m", 1_000, 5, source="a.h5")
+
+    reloaded = ImportManifest(path, database="sqlite:/a.db")
+    assert reloaded.watermark_ns("ETHUSDT.GLOBAL.1m") == 2_000
+    assert reloaded.entries["ETHUSDT.GLOBAL.1m"]["rows"] == 15
+    assert reloaded.watermark_ns("BTCUSDT.GLOBAL.1m") is None
+
+    # keyed by database: another database has no watermark, and keeps the first one's section
+    other = ImportManifest(path, database="sqlite:/b.db")
+    assert other.watermark_ns("ETHUSDT.GLOBAL.1m") is None
+    other.checkpoint("ETHUSDT.GLOBAL.1m", 500, 1)
+    assert ImportManifest(path, database="sqlite:/a.db").watermark_ns("ETHUSDT.GLOBAL.1m") == 2_000
+
+    # a manifest from before the keying belongs to no known database
+    path.write_text(json.dumps({"ETHUSDT.GLOBAL.1m": {"last_ts_ns": 2_000, "rows": 1}}), encoding="utf-8")
+    assert ImportManifest(path, database="sqlite:/a.db").watermark_ns("ETHUSDT.GLOBAL.1m") is None
+
+
+def test_database_is_authoritative_over_a_stale_manifest(tmp_path, monkeypatch) -> None:
+    ts = pd.date_range("2022-01-01", periods=60, freq="min", tz="UTC").as_unit("ns").asi8
+    close = np.full(60, 100.0)
+    db = ParquetDatabase(tmp_path / "db")
+    db.write_arrays(BarArrays(ts[:30], close[:30], close[:30], close[:30], close[:30], close[:30], close[:30]),
+                    "ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+    manifest = ImportManifest(tmp_path / "manifest.json", database="parquet:db")
+    series = ("ETHUSDT", Exchange.GLOBAL, Interval.MINUTE)
+    logs = []
+
+    # behind or equal: the database's overview
+    manifest.checkpoint("ETHUSDT.GLOBAL.1m", int(ts[10]), 11)
+    assert resolve_watermark_ns(*series, manifest, db, log=logs.append) == ts[29]
+
+    # ahead, and the bar is not in the database (recreated / switched): overview, with a warning
+    manifest.checkpoint("ETHUSDT.GLOBAL.1m", int(ts[59]), 49)
+    assert resolve_watermark_ns(*series, manifest, db, log=logs.append) == ts[29]
+    assert len(logs) == 1 and "not in parquet:db" in logs[0]
+
+    # ahead, and the bar is there but the overview lags (killed bulk import): manifest
+    manifest.entries["ETHUSDT.GLOBAL.1m"]["last_ts_ns"] = int(ts[29])
+    monkeypatch.setattr(db, "get_bar_overview", lambda: [])
+    assert resolve_watermark_ns(*series, manifest, db, log=logs.append) == ts[29]
+    assert len(logs) == 1
+
+
+def test_where_pushdown_on_datetime_index(tmp_path) -> None:
+    idx = pd.date_range("2022-01-01", periods=10, freq="min")
+    path = tmp_path / "bars.h5"
+    pd.DataFrame({"close": range(10)}, index=idx).to_hdf(path, key="/k", format="table")
+    pd.DataFrame({"close": range(10)}, index=idx).to_hdf(path, key="/f", format="fixed")
+
+    after = pd.Timestamp("2022-01-01 00:06", tz="UTC").value
+    with pd.HDFStore(path, mode="r") as store:
+        where = build_time_where(store, "/k", after)
+        rows = store.select("/k", where=where)
+        assert build_time_where(store, "/f", after) is None
+
+    assert rows["close"].tolist() == [7, 8, 9]